@@ -1,70 +1,261 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import json
-from createKnowledgeGraph import build_knowledge_graph
-from reviseKnowledgeGraph import revise_knowledge_graph
-from generatePatientReport import generate_patient_report
+import queue
+import threading
+from createKnowledgeGraph import build_knowledge_graph, update_knowledge_graph
+from reviseKnowledgeGraph import BASE_SIZE, NODE_COLORS, revise_knowledge_graph, revise_knowledge_graph_incremental
+from graphExport import export_graph, get_export_store
+from reportPipeline import load_pipeline_inputs, run_report
+from reportJobs import ReportJobQueue
+from batchReports import run_batch
+import llmCache
+import pipelineMetrics
+import requestOptions
+from neo4jClient import neo4j_provider
+from promptRegistry import registry
 import os
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)  # allow all origins for local dev
 
-ALLOWED_ORIGINS = {"http://localhost:3000", "http://localhost:3001"}
+# Probe Neo4j in the background so the first report can persist its graph;
+# startup itself never waits on the database.
+neo4j_provider.start()
+
+# Load and validate prompt templates / fixtures once; edits are picked up
+# on later requests via mtime checks.
+registry.load_all()
 
 @app.after_request
 def add_cors_headers(resp):
-    origin = request.headers.get("Origin")
-    if origin in ALLOWED_ORIGINS and request.path.startswith("/generate_report"):
-        resp.headers["Access-Control-Allow-Origin"] = origin
-        resp.headers["Vary"] = "Origin"
-        resp.headers["Access-Control-Allow-Headers"] = "Content-Type"
-        resp.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+    resp.headers.update(requestOptions.cors_headers(request.headers.get("Origin"), request.path))
     return resp
 
+def _no_cache_requested(data):
+    return requestOptions.no_cache_requested(data, request.headers)
+
+def _deadline_requested(data):
+    return requestOptions.deadline_requested(data, request.headers)
+
+def _compact_graph_requested(data):
+    return requestOptions.compact_graph_requested(data, request.args)
+
+
 @app.route("/generate_report", methods=["POST", "OPTIONS"])
 def generate_report():
     if request.method == "OPTIONS":
         return ("", 204)
 
     data = request.json
-    transcript = data.get("transcript") if data else None
+    transcript = requestOptions.transcript_requested(data) if data else None
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    with pipelineMetrics.track_request() as usage:
+        response, timings = run_report(transcript, no_cache=_no_cache_requested(data),
+                                       deadline=_deadline_requested(data))
+    app.logger.debug("generate_report stage timings: %s", timings)
+
+    if _compact_graph_requested(data) and response.get("graph"):
+        response["graph"] = export_graph(response["graph"], NODE_COLORS, BASE_SIZE)
+
+    if requestOptions.timings_requested(data, request.args):
+        response["timings"] = {"stages": timings, "usage": usage.snapshot()}
+
+    return jsonify(response)
+
+
+@app.route("/generate_report/stream", methods=["POST", "OPTIONS"])
+def generate_report_stream():
+    """
+    NDJSON variant of /generate_report. Emits one JSON object per line as
+    results become available:
+      {"event": "graph", "data": <raw graph>}
+      {"event": "node", "data": {"index", "name", "llm_summary"}}  (per node)
+      {"event": "summary_tab" | "emr_tab", "data": <tab>}
+      {"event": "done", "data": <legacy /generate_report response>}
+    or {"event": "error", "data": {"error": ...}} if a stage fails.
+    """
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = request.json
+    transcript = requestOptions.transcript_requested(data) if data else None
     if not transcript:
         return jsonify({"error": "Transcript missing"}), 400
 
-    # Load EMR data
-    emr_path = os.path.join("backend", "exampleEMR.json")
-    with open(emr_path, "r") as f:
-        emr_data = json.load(f)
+    no_cache = _no_cache_requested(data)
+    events = queue.Queue()
+
+    def emit(event, payload):
+        # Serialize immediately: later stages mutate the graph dict in place.
+        events.put(json.dumps({"event": event, "data": payload}, ensure_ascii=False) + "\n")
+
+    def on_node(index, node, summary):
+        emit("node", {"index": index, "name": node.get("name"), "llm_summary": summary})
+
+    def on_stage(name, result):
+        # annotated_graph has already been streamed node by node
+        if name != "annotated_graph":
+            emit(name, result)
+
+    def run_pipeline():
+        try:
+            response, timings = run_report(transcript, no_cache=no_cache, on_node=on_node, on_stage=on_stage)
+            app.logger.debug("generate_report/stream stage timings: %s", timings)
+            emit("done", response)
+        except Exception as e:
+            emit("error", {"error": str(e)})
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run_pipeline, daemon=True).start()
+
+    def generate():
+        while True:
+            line = events.get()
+            if line is None:
+                break
+            yield line
+
+    return Response(generate(), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-    # Step 1: Build initial knowledge graph
-    prompt_path = os.path.join(os.path.dirname(__file__), "LLM_Prompts", "knowledgeGraphPrompt.txt")
-    try:
-        with open(prompt_path, "r") as f:
-            graph_prompt = f.read()
-    except FileNotFoundError:
-        graph_prompt = ""
+@app.route("/generate_reports", methods=["POST", "OPTIONS"])
+def generate_reports():
+    """
+    Batch variant of /generate_report for many patients.
+    Body: {"items": [{"id", "transcript" | "conversation", "emr"}, ...], "no_cache": bool}
+    or an NDJSON body with one item per line. Streams one NDJSON record
+    per patient as it completes (see batchReports.run_batch).
+    """
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    if request.mimetype == "application/x-ndjson":
+        items = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        no_cache = _no_cache_requested({})
+    else:
+        data = request.json or {}
+        items = data.get("items")
+        no_cache = _no_cache_requested(data)
+    if not items:
+        return jsonify({"error": "No items"}), 400
+
+    def generate():
+        for record in run_batch(items, no_cache=no_cache):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/knowledge_graph/update", methods=["POST", "OPTIONS"])
+def update_knowledge_graph_route():
+    """
+    Incremental graph update for a transcript that is still growing.
+    Body: {"graph": <previously returned graph, optional>,
+           "transcript": <full transcript so far> (or "conversation": [{"role", "content"}, ...]),
+           "new_turns": <only the turns added since `graph`, a string or conversation array>}
+    Without a previous graph the full graph is built from `transcript`.
+    These graphs are provisional and not written to Neo4j; the final report
+    (/generate_report) persists the visit once.
+    """
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = request.json or {}
+    transcript = requestOptions.transcript_requested(data)
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
 
+    emr_data, graph_prompt = load_pipeline_inputs()
     api_key = os.getenv("OPENAI_API_KEY")
-    initial_graph = build_knowledge_graph(transcript, graph_prompt, api_key)
+    previous_graph = data.get("graph")
+
+    with llmCache.bypass(_no_cache_requested(data)):
+        if not previous_graph or not previous_graph.get("nodes"):
+            graph = build_knowledge_graph(transcript, graph_prompt, api_key)
+            graph = revise_knowledge_graph(graph, emr_data, transcript, persist=False)
+            changed = {node.get("name") for node in graph.get("nodes", [])}
+        else:
+            delta_prompt = registry.get("knowledge_graph_delta").text
+            graph, changed = update_knowledge_graph(previous_graph, data.get("new_turns", ""), delta_prompt, api_key)
+            graph, changed = revise_knowledge_graph_incremental(graph, emr_data, transcript, changed)
+
+    return jsonify({"graph": graph, "changed_nodes": sorted(changed)})
+
+# -----------------------------
+# REPORT JOBS
+# -----------------------------
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def _run_report_job(payload, on_stage, on_node):
+    response, timings = run_report(payload["transcript"], no_cache=payload.get("no_cache", False),
+                                   on_node=on_node, on_stage=on_stage)
+    app.logger.debug("report job stage timings: %s", timings)
+    return response
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = ReportJobQueue(_run_report_job)
+    return _job_queue
+
+@app.route("/report_jobs", methods=["POST", "OPTIONS"])
+def create_report_job():
+    """
+    Enqueue a report and return immediately with its job id.
+    Same body as /generate_report. An `Idempotency-Key` header (or
+    "idempotency_key" field) makes retries return the existing job
+    instead of starting a second one.
+    Returns 202 {"job_id", "status"} for a new job, 200 for an existing one.
+    """
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = request.json
+    transcript = requestOptions.transcript_requested(data) if data else None
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+    payload = {"transcript": transcript, "no_cache": _no_cache_requested(data)}
+    job_id, created = get_job_queue().submit(payload, idempotency_key)
+    job = get_job_queue().get(job_id)
+    return jsonify({"job_id": job_id, "status": job["status"] if job else "queued"}), 202 if created else 200
 
-    # Step 2: Revise / annotate graph
-    annotated_graph = revise_knowledge_graph(initial_graph, emr_data, transcript)
+@app.route("/report_jobs/<job_id>", methods=["GET"])
+def get_report_job(job_id):
+    """Job status, partial stage results while running, and the final response once succeeded."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
 
-    # Step 3: Generate (summary_tab + emr_tab); keep legacy response keys
-    report = generate_patient_report(annotated_graph, emr_data, transcript)
+@app.route("/graph/<graph_id>/node", methods=["GET"])
+def get_graph_node(graph_id):
+    """
+    On-demand details (context, llm_summary) for one node of a compact graph.
+    The node is given as ?name=<node id>, since names may contain "/".
+    """
+    details = get_export_store().node_details(graph_id, request.args.get("name", ""))
+    if details is None:
+        return jsonify({"error": "Node not found"}), 404
+    return jsonify(details)
 
-    summary_tab = report.get("summary_tab", {})
-    emr_tab = report.get("emr_tab", {})
-    next_steps = summary_tab.get("next_best_actions", [])
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Stage, LLM call, token, cost, cache and Neo4j metrics in Prometheus text format."""
+    return Response(pipelineMetrics.metrics.render(), mimetype="text/plain; version=0.0.4")
 
-    return jsonify({
-        "message": "Report generated successfully",
-        "insights_report": summary_tab,            # summary tab object (legacy key)
-        "next_steps": next_steps,                  # convenience array
-        "graph": report.get("annotated_graph"),    # unchanged
-        "emr_tab": emr_tab                         # NEW: EMR insights tab
-    })
+@app.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify(llmCache.llm_cache.stats())
 
 if __name__ == "__main__":
     if not os.getenv("OPENAI_API_KEY"):
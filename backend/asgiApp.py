@@ -0,0 +1,238 @@
+# backend/asgiApp.py
+"""
+Async (ASGI) variant of app.py, built on Quart. Same routes and responses,
+but reports run as coroutines on the server's event loop (AsyncOpenAI, the
+async Neo4j driver), so an in-flight report holds no OS thread while it
+waits on the LLM and one process can serve hundreds of concurrent intakes.
+
+Production: hypercorn --config hypercorn.toml asgiApp:app
+(or SERVER_MODE=asgi python run_server.py).
+"""
+import asyncio
+import json
+import os
+
+from quart import Quart, Response, jsonify, request
+
+import llmCache
+import pipelineMetrics
+import requestOptions
+from batchReports import run_batch_async
+from createKnowledgeGraph import build_knowledge_graph_async, update_knowledge_graph_async
+from graphExport import export_graph, get_export_store
+from neo4jClient import neo4j_provider
+from promptRegistry import registry
+from reportJobs import ReportJobQueue
+from reportPipeline import load_pipeline_inputs, run_report, run_report_async
+from reviseKnowledgeGraph import (BASE_SIZE, NODE_COLORS, revise_knowledge_graph_async,
+                                  revise_knowledge_graph_incremental_async)
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+ASGI_RESPONSE_TIMEOUT = float(os.getenv("ASGI_RESPONSE_TIMEOUT", "600"))  # seconds; reports can take a minute+
+
+app = Quart(__name__)
+app.config["RESPONSE_TIMEOUT"] = ASGI_RESPONSE_TIMEOUT
+
+neo4j_provider.start()
+registry.load_all()
+
+@app.after_request
+async def add_cors_headers(resp):
+    resp.headers.update(requestOptions.cors_headers(request.headers.get("Origin"), request.path))
+    return resp
+
+async def _json_body():
+    return await request.get_json(silent=True) or {}
+
+def _ndjson(generator):
+    return Response(generator, mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/generate_report", methods=["POST", "OPTIONS"])
+async def generate_report():
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = await _json_body()
+    transcript = requestOptions.transcript_requested(data)
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    with pipelineMetrics.track_request() as usage:
+        response, timings = await run_report_async(
+            transcript,
+            no_cache=requestOptions.no_cache_requested(data, request.headers),
+            deadline=requestOptions.deadline_requested(data, request.headers))
+    app.logger.debug("generate_report stage timings: %s", timings)
+
+    if requestOptions.compact_graph_requested(data, request.args) and response.get("graph"):
+        # Layout and the SQLite detail store write stay off the event loop.
+        response["graph"] = await asyncio.to_thread(export_graph, response["graph"], NODE_COLORS, BASE_SIZE)
+    if requestOptions.timings_requested(data, request.args):
+        response["timings"] = {"stages": timings, "usage": usage.snapshot()}
+
+    return jsonify(response)
+
+
+@app.route("/generate_report/stream", methods=["POST", "OPTIONS"])
+async def generate_report_stream():
+    """NDJSON variant of /generate_report; same events as app.py. Disconnecting cancels the report."""
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = await _json_body()
+    transcript = requestOptions.transcript_requested(data)
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    no_cache = requestOptions.no_cache_requested(data, request.headers)
+    events = asyncio.Queue()
+
+    def emit(event, payload):
+        # Serialize immediately: later stages mutate the graph dict in place.
+        events.put_nowait(json.dumps({"event": event, "data": payload}, ensure_ascii=False) + "\n")
+
+    def on_node(index, node, summary):
+        emit("node", {"index": index, "name": node.get("name"), "llm_summary": summary})
+
+    def on_stage(name, result):
+        if name != "annotated_graph":
+            emit(name, result)
+
+    async def run_pipeline():
+        try:
+            response, timings = await run_report_async(transcript, no_cache=no_cache,
+                                                       on_node=on_node, on_stage=on_stage)
+            app.logger.debug("generate_report/stream stage timings: %s", timings)
+            emit("done", response)
+        except Exception as e:
+            emit("error", {"error": str(e)})
+        finally:
+            events.put_nowait(None)
+
+    async def generate():
+        task = asyncio.ensure_future(run_pipeline())
+        try:
+            while True:
+                line = await events.get()
+                if line is None:
+                    break
+                yield line
+        finally:
+            task.cancel()
+
+    return _ndjson(generate())
+
+
+@app.route("/generate_reports", methods=["POST", "OPTIONS"])
+async def generate_reports():
+    """Batch variant of /generate_report; same body and records as app.py."""
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    if request.mimetype == "application/x-ndjson":
+        body = await request.get_data(as_text=True)
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        no_cache = requestOptions.no_cache_requested({}, request.headers)
+    else:
+        data = await _json_body()
+        items = data.get("items")
+        no_cache = requestOptions.no_cache_requested(data, request.headers)
+    if not items:
+        return jsonify({"error": "No items"}), 400
+
+    async def generate():
+        async for record in run_batch_async(items, no_cache=no_cache):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return _ndjson(generate())
+
+
+@app.route("/knowledge_graph/update", methods=["POST", "OPTIONS"])
+async def update_knowledge_graph_route():
+    """Incremental graph update; same body and response as app.py."""
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = await _json_body()
+    transcript = requestOptions.transcript_requested(data)
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    emr_data, graph_prompt = load_pipeline_inputs()
+    api_key = os.getenv("OPENAI_API_KEY")
+    previous_graph = data.get("graph")
+
+    with llmCache.bypass(requestOptions.no_cache_requested(data, request.headers)):
+        if not previous_graph or not previous_graph.get("nodes"):
+            graph = await build_knowledge_graph_async(transcript, graph_prompt, api_key)
+            graph = await revise_knowledge_graph_async(graph, emr_data, transcript, persist=False)
+            changed = {node.get("name") for node in graph.get("nodes", [])}
+        else:
+            delta_prompt = registry.get("knowledge_graph_delta").text
+            graph, changed = await update_knowledge_graph_async(previous_graph, data.get("new_turns", ""),
+                                                                delta_prompt, api_key)
+            graph, changed = await revise_knowledge_graph_incremental_async(graph, emr_data, transcript, changed)
+
+    return jsonify({"graph": graph, "changed_nodes": sorted(changed)})
+
+# -----------------------------
+# REPORT JOBS
+# -----------------------------
+# Jobs run on ReportJobQueue's worker threads (via the blocking run_report),
+# not on the server loop; the SQLite job store is used from worker threads too.
+_job_queue = None
+
+def _run_report_job(payload, on_stage, on_node):
+    response, timings = run_report(payload["transcript"], no_cache=payload.get("no_cache", False),
+                                   on_node=on_node, on_stage=on_stage)
+    return response
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = ReportJobQueue(_run_report_job)
+    return _job_queue
+
+@app.route("/report_jobs", methods=["POST", "OPTIONS"])
+async def create_report_job():
+    """Enqueue a report; same body, headers and responses as app.py."""
+    if request.method == "OPTIONS":
+        return ("", 204)
+
+    data = await _json_body()
+    transcript = requestOptions.transcript_requested(data)
+    if not transcript:
+        return jsonify({"error": "Transcript missing"}), 400
+
+    idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+    payload = {"transcript": transcript, "no_cache": requestOptions.no_cache_requested(data, request.headers)}
+    queue = get_job_queue()
+    job_id, created = await asyncio.to_thread(queue.submit, payload, idempotency_key)
+    job = await asyncio.to_thread(queue.get, job_id)
+    return jsonify({"job_id": job_id, "status": job["status"] if job else "queued"}), 202 if created else 200
+
+@app.route("/report_jobs/<job_id>", methods=["GET"])
+async def get_report_job(job_id):
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route("/graph/<graph_id>/node", methods=["GET"])
+async def get_graph_node(graph_id):
+    details = await asyncio.to_thread(get_export_store().node_details, graph_id, request.args.get("name", ""))
+    if details is None:
+        return jsonify({"error": "Node not found"}), 404
+    return jsonify(details)
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    return Response(pipelineMetrics.metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/cache_stats", methods=["GET"])
+async def cache_stats():
+    return jsonify(llmCache.llm_cache.stats())
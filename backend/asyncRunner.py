@@ -0,0 +1,61 @@
+# backend/asyncRunner.py
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """Shared event loop on a daemon thread, started on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-runner", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro):
+    """
+    Run `coro` to completion from synchronous code and return its result.
+
+    Every caller shares one background event loop, so sync callers (Flask
+    request threads, batch workers) get the same pooled async clients and
+    concurrency as the ASGI app instead of a new loop per call. The
+    coroutine runs in a copy of the caller's context, so per-request
+    settings (cache bypass, deadline, metrics, priority) carry over.
+    Callbacks passed into `coro` run on the loop thread and must not block.
+
+    Raises RuntimeError when called from a running event loop: await the
+    coroutine there instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("run_sync() called from a running event loop; await the coroutine instead")
+
+    loop = _get_loop()
+    context = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def finish(task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def start():
+        loop.create_task(coro, context=context).add_done_callback(finish)
+
+    loop.call_soon_threadsafe(start)
+    return future.result()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# backend/batchReports.py
+"""
+Batch report generation for many (transcript, EMR) pairs.
+
+Input sources:
+- a JSONL file, one {"id", "transcript" | "conversation", "emr" | "emr_path"}
+  object per line (emr_path is relative to the file and must stay inside
+  its directory);
+- a directory of <name>.txt transcripts, each with an optional <name>.json EMR;
+- an iterable of such dicts (used by the /generate_reports route, where
+  "emr" must be a JSON object: only the loaders above open EMR files).
+
+Patients run concurrently and share the process-wide OpenAI client, LLM
+cache and Neo4j driver; the LLM rate limit (LLM_RATE_LIMIT_RPM or
+--rpm) is global, so total time is bounded by the API limit rather than
+the sum of per-patient pipelines. Results are yielded / written as JSONL
+in completion order.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional
+
+from emrIndex import PatientEMR
+from rateLimiter import BATCH, request_priority
+from requestOptions import transcript_requested
+from reportPipeline import run_report, run_report_async
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))  # patients in flight
+
+# -----------------------------
+# INPUT
+# -----------------------------
+def _emr_file(base: str, relative: str) -> PatientEMR:
+    """The EMR file `relative` to `base`, refusing paths that resolve outside it."""
+    base = os.path.realpath(base)
+    path = os.path.realpath(os.path.join(base, relative))
+    if os.path.commonpath([base, path]) != base:
+        raise ValueError(f"emr_path escapes the input directory: {relative}")
+    return PatientEMR.from_file(path)  # streamed + indexed by emrIndex
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", str(line_no))
+            if "emr" not in item and item.get("emr_path"):
+                item["emr"] = _emr_file(base, item["emr_path"])
+            yield item
+
+
+def iter_directory(path: str) -> Iterator[Dict[str, Any]]:
+    for name in sorted(os.listdir(path)):
+        stem, ext = os.path.splitext(name)
+        if ext != ".txt":
+            continue
+        with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+            item = {"id": stem, "transcript": f.read()}
+        if os.path.exists(os.path.join(path, stem + ".json")):
+            item["emr"] = _emr_file(path, stem + ".json")
+        yield item
+
+
+def iter_batch_source(source: str) -> Iterator[Dict[str, Any]]:
+    """Items from a directory or a JSONL file path."""
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_jsonl(source)
+
+# -----------------------------
+# EXECUTION
+# -----------------------------
+def _run_item(item: Dict[str, Any], no_cache: bool) -> Dict[str, Any]:
+    start = time.perf_counter()
+    record = {"id": item.get("id")}
+    try:
+        transcript = transcript_requested(item)
+        if not transcript:
+            raise ValueError("Transcript missing")
+        with request_priority(BATCH):
+            response, timings = run_report(transcript, emr_data=item.get("emr"), no_cache=no_cache)
+        record.update(status="ok", report=response, timings=timings)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def run_batch(items: Iterable[Dict[str, Any]], max_concurrency: Optional[int] = None,
+              no_cache: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Generate reports for `items`, yielding one record per item as it
+    completes: {"id", "status": "ok", "report", "timings", "seconds"} or
+    {"id", "status": "error", "error", "seconds"}. At most
+    `max_concurrency` patients are in flight and items are read lazily,
+    so large inputs are streamed rather than loaded up front. LLM calls
+    run at BATCH priority, leaving rate-limit headroom for interactive
+    requests served by other workers.
+    """
+    limit = max(1, max_concurrency or BATCH_MAX_CONCURRENCY)
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="batch-report") as pool:
+        running = set()
+        exhausted = False
+        while running or not exhausted:
+            while not exhausted and len(running) < limit:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                ctx = contextvars.copy_context()
+                running.add(pool.submit(ctx.run, _run_item, item, no_cache))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+
+async def _run_item_async(item: Dict[str, Any], no_cache: bool) -> Dict[str, Any]:
+    start = time.perf_counter()
+    record = {"id": item.get("id")}
+    try:
+        transcript = transcript_requested(item)
+        if not transcript:
+            raise ValueError("Transcript missing")
+        with request_priority(BATCH):
+            response, timings = await run_report_async(transcript, emr_data=item.get("emr"),
+                                                       no_cache=no_cache)
+        record.update(status="ok", report=response, timings=timings)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+async def run_batch_async(items: Iterable[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                          no_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """run_batch as an async generator: patients run as tasks on the event loop."""
+    limit = max(1, max_concurrency or BATCH_MAX_CONCURRENCY)
+    items = iter(items)
+    running = set()
+    try:
+        exhausted = False
+        while running or not exhausted:
+            while not exhausted and len(running) < limit:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                running.add(asyncio.ensure_future(_run_item_async(item, no_cache)))
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in running:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate reports for a batch of transcripts")
+    parser.add_argument("input", help="JSONL file or directory of <name>.txt (+ <name>.json EMR)")
+    parser.add_argument("-o", "--output", help="JSONL output path (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_MAX_CONCURRENCY, help="patients in flight")
+    parser.add_argument("--rpm", type=float, default=None, help="global LLM requests/minute limit")
+    parser.add_argument("--tpm", type=float, default=None, help="global LLM tokens/minute limit")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM cache")
+    args = parser.parse_args()
+
+    if args.rpm is not None or args.tpm is not None:
+        from llmClient import LLM_RATE_LIMIT_RPM, set_rate_limit
+        set_rate_limit(LLM_RATE_LIMIT_RPM if args.rpm is None else args.rpm, args.tpm)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    counts = {"ok": 0, "error": 0}
+    try:
+        for record in run_batch(iter_batch_source(args.input), args.concurrency, args.no_cache):
+            counts[record["status"]] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{counts['ok']} ok, {counts['error']} failed in {time.perf_counter() - start:.1f}s", file=sys.stderr)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark for reviseKnowledgeGraph.annotate_graph_llm.
+Replays a synthetic 50-node graph against the local fake OpenAI server,
+once sequentially and once with the concurrent worker pool, and reports
+the wall-clock speedup.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+from openai import OpenAI
+import llmCache
+import reviseKnowledgeGraph
+from llmClient import set_openai_client
+from fake_openai_server import FakeOpenAIServer
+
+
+def synthetic_graph(n_nodes):
+    nodes = [{"name": f"Node {i}", "type": "Symptom", "context": {}} for i in range(n_nodes)]
+    edges = [
+        {"from_node": f"Node {i}", "to_node": f"Node {i + 1}", "type": "related_to"}
+        for i in range(n_nodes - 1)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def run(workers, n_nodes):
+    graph = synthetic_graph(n_nodes)
+    start = time.perf_counter()
+    with llmCache.bypass():
+        reviseKnowledgeGraph.annotate_graph_llm(graph, {}, "Patient: headache", max_workers=workers)
+    elapsed = time.perf_counter() - start
+    assert all(node.get("llm_summary") for node in graph["nodes"])
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per call (s)")
+    parser.add_argument("--workers", type=int, default=reviseKnowledgeGraph.ANNOTATE_MAX_WORKERS)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        set_openai_client(OpenAI(api_key="stub-key", base_url=server.base_url))
+
+        sequential = run(1, args.nodes)
+        concurrent = run(args.workers, args.nodes)
+
+    print(f"nodes={args.nodes} latency={args.latency}s workers={args.workers}")
+    print(f"sequential: {sequential:.2f}s")
+    print(f"concurrent: {concurrent:.2f}s")
+    print(f"speedup:    {sequential / concurrent:.1f}x")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Load test for the serving modes. Starts the fake OpenAI server, launches
+the backend through run_server.py as a separate process, and fires
+concurrent POST /generate_report requests at it:
+
+- flask: the Flask app on Werkzeug's threaded server (one OS thread per
+  in-flight request);
+- asgi: SERVER_MODE=asgi, the Quart app (asgiApp.py) on hypercorn, where
+  each in-flight report is a coroutine on one event loop.
+
+`--baseline-dir` adds a "baseline" mode running flask from another checkout
+(e.g. `git worktree add /tmp/base <commit>`) to compare against older code.
+
+Per mode and concurrency level, prints request p50/p95 latency,
+throughput, errors, and the server process's CPU time per request, peak
+thread count and RSS. The stub and the clients share the machine with the
+server, so on few cores throughput is CPU-bound for every mode.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from bench_pipeline import percentile, synthetic_transcript
+from fake_openai_server import FakeOpenAIServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def proc_status(pid):
+    """(threads, rss_kb) of a running process, from /proc."""
+    threads = rss = 0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+    except OSError:
+        pass
+    return threads, rss
+
+
+def start_server(mode, directory, port, stub_url):
+    env = dict(os.environ,
+               OPENAI_API_KEY="stub-key", OPENAI_BASE_URL=stub_url,
+               NEO4J_URI="bolt://127.0.0.1:1", PATIENT_GRAPH_STORE_ENABLED="0",
+               LLM_CACHE_ENABLED="false", LLM_HEDGE_ENABLED="0", LLM_RATE_LIMIT_RPM="0",
+               FLASK_HOST="127.0.0.1", FLASK_PORT=str(port), FLASK_DEBUG="false",
+               SERVER_MODE="asgi" if mode == "asgi" else "flask")
+    process = subprocess.Popen([sys.executable, os.path.join(directory, "run_server.py")], cwd=directory,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def post_report(port, body, timeout):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("POST", "/generate_report", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def proc_cpu_seconds(pid):
+    """User + system CPU time of a process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0.0
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def run_level(port, pid, concurrency, requests_per_client, body, timeout):
+    samples, errors = [], 0
+    lock = threading.Lock()
+    peak = {"threads": 0, "rss_kb": 0}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            threads, rss = proc_status(pid)
+            peak["threads"] = max(peak["threads"], threads)
+            peak["rss_kb"] = max(peak["rss_kb"], rss)
+            time.sleep(0.1)
+
+    def client():
+        nonlocal errors
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            try:
+                ok = post_report(port, body, timeout) == 200
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    samples.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    cpu_before = proc_cpu_seconds(pid)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - start
+    cpu = proc_cpu_seconds(pid) - cpu_before
+    done.set()
+    sampler.join()
+
+    return {
+        "concurrency": concurrency,
+        "requests": concurrency * requests_per_client,
+        "errors": errors,
+        "p50_ms": round(statistics.median(samples) * 1000, 1) if samples else None,
+        "p95_ms": round(percentile(samples, 95) * 1000, 1) if samples else None,
+        "throughput_per_s": round(len(samples) / elapsed, 2),
+        "server_cpu_ms_per_request": round(cpu / max(1, len(samples)) * 1000, 1),
+        "peak_threads": peak["threads"],
+        "peak_rss_mb": round(peak["rss_kb"] / 1024, 1),
+    }
+
+
+def run_mode(mode, directory, args, stub, body):
+    port = free_port()
+    process = start_server(mode, directory, port, stub.base_url)
+    try:
+        post_report(port, body, args.timeout)  # warm-up: imports, clients, prompt registry
+        results = []
+        for concurrency in args.concurrency:
+            calls_before = stub.calls
+            result = run_level(port, process.pid, concurrency, args.requests_per_client, body, args.timeout)
+            result["mode"] = mode
+            result["llm_calls"] = stub.calls - calls_before
+            results.append(result)
+            print(f"{mode:<8} c={concurrency:<4} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                  f"rps={result['throughput_per_s']} errors={result['errors']} "
+                  f"cpu/req={result['server_cpu_ms_per_request']}ms "
+                  f"threads={result['peak_threads']} rss={result['peak_rss_mb']}MB", file=sys.stderr)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200], help="concurrent clients")
+    parser.add_argument("--requests-per-client", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=12, help="transcript turns")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=300, help="client timeout per request (s)")
+    parser.add_argument("--modes", nargs="+", default=["flask", "asgi"], choices=["flask", "asgi", "baseline"])
+    parser.add_argument("--baseline-dir", help="backend directory of another checkout, for the baseline mode")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.turns, random.Random(args.seed))
+    body = json.dumps({"transcript": transcript, "no_cache": True})
+    results = []
+    with FakeOpenAIServer(latency=args.latency, jitter=args.jitter, seed=args.seed) as stub:
+        for mode in args.modes:
+            if mode == "baseline" and not args.baseline_dir:
+                parser.error("--baseline-dir is required for the baseline mode")
+            directory = args.baseline_dir if mode == "baseline" else backend_dir
+            results.extend(run_mode(mode, directory, args, stub, body))
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
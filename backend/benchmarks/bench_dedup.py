@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for nodeDedup.dedupe_graph against naive pairwise
+createKnowledgeGraph.similar() over every pair of nodes. Builds a synthetic
+longitudinal graph in which about a third of the nodes are near-duplicates
+(plurals, case, typos), then reports wall-clock time and how far the two
+sets of merges agree.
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from createKnowledgeGraph import similar
+from nodeDedup import dedupe_graph
+
+SYLLABLES = ["ca", "ro", "mi", "tal", "pen", "zo", "lix", "dra", "ne", "fu", "por", "sem",
+             "qui", "lo", "vat", "ter", "bri", "ax", "mon", "del", "gas", "hep", "ur", "cor",
+             "der", "os", "bu", "pra", "sto", "kel", "nu", "thy", "ven", "gly", "pul", "ren"]
+SUFFIXES = ["itis", "algia", "osis", " pain", " syndrome", "ine", "ol", "amide"]
+
+
+def synthetic_graph(n_nodes, duplicate_rate, seed=0):
+    rng = random.Random(seed)
+    bases = []
+    while len(bases) < n_nodes * (1 - duplicate_rate):
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))) + rng.choice(SUFFIXES)
+        bases.append(name.capitalize())
+    names = list(bases)
+    while len(names) < n_nodes:
+        name = rng.choice(bases)
+        variant = rng.choice(["plural", "case", "typo"])
+        if variant == "plural":
+            name += "s"
+        elif variant == "case":
+            name = name.lower()
+        else:
+            i = rng.randrange(1, len(name))
+            name = name[:i] + rng.choice("aeiou") + name[i + 1:]
+        names.append(name)
+    rng.shuffle(names)
+    nodes = [{"name": name, "type": "Symptom"} for name in names]
+    edges = [{"from_node": rng.choice(names), "to_node": rng.choice(names), "type": "related_to"}
+             for _ in range(n_nodes * 2)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def naive_merges(graph_data):
+    """All-pairs similar() with union-find; returns {merged name: survivor}."""
+    nodes = graph_data["nodes"]
+    parent = list(range(len(nodes)))
+
+    def root(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(nodes)):
+        for j in range(i):
+            if similar(nodes[i]["name"], nodes[j]["name"]):
+                a, b = root(i), root(j)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+    return {node["name"]: nodes[root(i)]["name"]
+            for i, node in enumerate(nodes) if root(i) != i and node["name"] != nodes[root(i)]["name"]}
+
+
+def timed(func, graph_data):
+    start = time.perf_counter()
+    result = func(graph_data)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--skip-naive-above", type=int, default=1000,
+                        help="skip the O(n^2) baseline for larger graphs")
+    args = parser.parse_args()
+
+    for n in args.nodes:
+        graph = synthetic_graph(n, args.duplicate_rate)
+        fast, fast_s = timed(dedupe_graph, copy.deepcopy(graph))
+        line = f"nodes={n:<6} indexed: {fast_s * 1000:8.1f}ms merged={len(fast):<5}"
+        if n <= args.skip_naive_above:
+            naive, naive_s = timed(naive_merges, graph)
+            agree = len(set(fast) & set(naive))
+            line += (f" naive: {naive_s * 1000:9.1f}ms merged={len(naive):<5}"
+                     f" common={agree:<5} speedup={naive_s / fast_s:.0f}x")
+        print(line)
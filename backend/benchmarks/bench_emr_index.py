@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark for EMR ingestion (emrIndex) on synthetic records from 10 KB to
+50 MB. For each size, in a fresh interpreter:
+
+- full: json.load the file and json.dumps(indent=2) it, as the EMR tab
+  prompt embedded it before;
+- indexed: stream the file into an EMRIndex (chunks + BM25) and select
+  the chunks relevant to a headache transcript.
+
+Prints load/index and query time, peak RSS, the EMR tokens a prompt would
+carry (~4 chars/token), and the recall of the handful of planted records
+that mention the complaint ("photophobia"), which selection should find.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+TRANSCRIPT = "\n".join([
+    "AI: What brings you in today?",
+    "Patient: I keep getting headaches with photophobia, bright screens make it worse.",
+    "AI: Are you taking anything for it?",
+    "Patient: Ibuprofen helps a little. My blood pressure was high last time too.",
+])
+PLANTED = "photophobia"
+PLANTED_RECORDS = 5
+REASONS = ["Annual physical", "Knee pain", "Upper respiratory infection", "Back strain", "Rash on forearm",
+           "Diabetes follow-up", "Medication refill", "Ankle sprain", "Seasonal allergies", "Insomnia",
+           "Hypertension check", "Vaccination", "Chest wall pain", "Gastritis", "Anxiety follow-up"]
+WORDS = ("stable improved reviewed counseled advised continue taper increase decrease monitor referral "
+         "imaging normal elevated mild moderate tenderness swelling exam vitals plan follow weeks").split()
+TESTS = ["HbA1c", "LDL", "Creatinine", "TSH", "Hemoglobin", "Potassium", "ALT", "Vitamin D", "Blood Pressure"]
+DRUGS = ["Metformin", "Lisinopril", "Atorvastatin", "Sertraline", "Omeprazole", "Albuterol", "Ibuprofen"]
+
+
+def synthetic_emr(target_bytes, rng, planted=PLANTED_RECORDS):
+    """EMR of roughly `target_bytes` of JSON; `planted` encounters mention PLANTED."""
+    encounter = lambda i: {
+        "date": f"{2000 + i % 25}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        "reason": rng.choice(REASONS),
+        "notes": " ".join(rng.choice(WORDS) for _ in range(40)).capitalize() + ".",
+    }
+    emr = {"patient_id": "bench", "demographics": {"dob": "1970-01-01"},
+           "allergies": [{"substance": "Penicillin", "reaction": "Rash"}],
+           "alerts": ["Monitor blood pressure regularly"],
+           "conditions": [], "medications": [], "labs": [], "encounters": []}
+    size, i = 400, 0
+    while size < target_bytes:
+        record = encounter(i)
+        emr["encounters"].append(record)
+        lab = {"test": rng.choice(TESTS), "value": str(rng.randint(1, 200)), "date": record["date"]}
+        emr["labs"].append(lab)
+        size += len(json.dumps(record)) + len(json.dumps(lab)) + 4
+        if i % 20 == 0:
+            med = {"name": rng.choice(DRUGS), "dose": f"{rng.choice([5, 10, 20, 500])}mg", "start": record["date"]}
+            emr["medications"].append(med)
+            size += len(json.dumps(med))
+        i += 1
+    for index in rng.sample(range(len(emr["encounters"])), min(planted, len(emr["encounters"]))):
+        emr["encounters"][index]["notes"] += f" Headache with {PLANTED}, worse with screens."
+    return emr
+
+
+def worker(mode, path):
+    """Runs in a child process; prints one JSON result line."""
+    start = time.perf_counter()
+    if mode == "full":
+        with open(path, "r", encoding="utf-8") as f:
+            emr = json.load(f)
+        loaded = time.perf_counter()
+        prompt = json.dumps(emr, ensure_ascii=False, indent=2)
+        result = {"load_s": loaded - start, "query_s": time.perf_counter() - loaded,
+                  "prompt_tokens": len(prompt) // 4, "recall": prompt.count(PLANTED) / PLANTED_RECORDS}
+    else:
+        from emrIndex import EMRIndex
+        index = EMRIndex.from_file(path)
+        loaded = time.perf_counter()
+        selection = index.select(TRANSCRIPT)
+        prompt = json.dumps(selection.data, ensure_ascii=False, separators=(",", ":"))
+        result = {"load_s": loaded - start, "query_s": time.perf_counter() - loaded,
+                  "prompt_tokens": len(prompt) // 4, "chunks": len(index.chunks),
+                  "recall": prompt.count(PLANTED) / PLANTED_RECORDS}
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+
+def run_child(mode, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode, path],
+                         cwd=backend_dir, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def human(size):
+    return f"{size / 1e6:.1f}MB" if size >= 1e6 else f"{size / 1e3:.0f}KB"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[10e3, 100e3, 1e6, 10e6, 50e6],
+                        help="target EMR sizes in bytes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        sys.exit(0)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for target in args.sizes:
+            path = os.path.join(tmp, f"emr_{int(target)}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(synthetic_emr(int(target), random.Random(args.seed)), f, indent=2)
+            size = os.path.getsize(path)
+            for mode in ("full", "indexed"):
+                result = dict(run_child(mode, path), mode=mode, file_bytes=size)
+                results.append(result)
+                print(f"{human(size):>7} {mode:<8} load={result['load_s'] * 1000:.0f}ms "
+                      f"query={result['query_s'] * 1000:.1f}ms rss={result['peak_rss_mb']:.0f}MB "
+                      f"prompt_tokens={result['prompt_tokens']} recall={result['recall']:.2f}",
+                      file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
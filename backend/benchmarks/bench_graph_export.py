@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Payload size and export time of the verbose vs compact frontend graph
+export (reviseKnowledgeGraph.export_frontend_json), for synthetic annotated
+graphs of increasing node count and EMR size. The compact export includes
+the NumPy force-directed layout, timed separately, and the write of node
+details to the graph detail store (a temporary SQLite file here).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+os.environ.setdefault("NEO4J_URI", "bolt://127.0.0.1:1")
+os.environ.setdefault("GRAPH_EXPORT_DB", os.path.join(tempfile.mkdtemp(), "graph_exports.sqlite"))
+
+from graphExport import compact_graph, force_layout
+from reviseKnowledgeGraph import annotate_graph_manual, export_frontend_json
+from bench_pipeline import synthetic_emr, synthetic_transcript
+from fake_openai_server import CANNED_TERMS, TERM_TYPES
+
+
+def synthetic_graph(node_count, rng):
+    names = [CANNED_TERMS[i % len(CANNED_TERMS)] + ("" if i < len(CANNED_TERMS) else f" {i}")
+             for i in range(node_count)]
+    nodes = [{"name": name, "type": TERM_TYPES[i % len(TERM_TYPES)], "llm_summary": "Summary. " * 20}
+             for i, name in enumerate(names)]
+    edges = [{"from_node": names[i], "to_node": names[rng.randrange(node_count)], "type": "related_to"}
+             for i in range(node_count) for _ in range(2)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def export_size(graph, compact):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        path = f.name
+    try:
+        start = time.perf_counter()
+        export_frontend_json(graph, path, compact=compact)
+        seconds = time.perf_counter() - start
+        return os.path.getsize(path), seconds
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--emr-sizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for node_count in args.nodes:
+        for emr_size in args.emr_sizes:
+            rng = random.Random(args.seed + node_count + emr_size)
+            emr = synthetic_emr(emr_size, rng)
+            emr["alerts"] = [f"Alert {i}" for i in range(emr_size // 5 + 1)]
+            graph = annotate_graph_manual(synthetic_graph(node_count, rng), emr,
+                                          synthetic_transcript(emr_size, rng))
+            verbose_bytes, verbose_s = export_size(graph, compact=False)
+            compact_bytes, compact_s = export_size(graph, compact=True)
+            edges = [(a, b) for a, b, _ in compact_graph(graph, layout=False)["edges"]]
+            start = time.perf_counter()
+            force_layout(len(graph["nodes"]), edges)
+            layout_s = time.perf_counter() - start
+            results.append({
+                "nodes": node_count,
+                "emr_size": emr_size,
+                "verbose_kb": round(verbose_bytes / 1024, 1),
+                "compact_kb": round(compact_bytes / 1024, 1),
+                "ratio": round(verbose_bytes / compact_bytes, 1),
+                "verbose_ms": round(verbose_s * 1000, 1),
+                "compact_ms": round(compact_s * 1000, 1),
+                "layout_ms": round(layout_s * 1000, 1),
+            })
+            print(f"nodes={node_count:<5} emr={emr_size:<4} {results[-1]['verbose_kb']}KB -> "
+                  f"{results[-1]['compact_kb']}KB (x{results[-1]['ratio']})", file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for graphIndex.IndexedGraph on longitudinal-size graphs
+(10k+ nodes). Compares, per graph size:
+
+- connected nodes for every node: the old per-node scan over all edges
+  (timed on a sample and extrapolated, since it is O(N*E)) vs building the
+  index once and querying in/out adjacency;
+- lookups by name/alias: linear search vs the index;
+- edges touching a set of stale nodes: list filter vs edges_touching;
+- from_json / to_json conversion cost.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from graphIndex import IndexedGraph
+
+
+def synthetic_graph(node_count, edges_per_node, rng):
+    nodes = [{"name": f"Concept {i}", "type": "Symptom", "aliases": [f"concept-{i} alias"]}
+             for i in range(node_count)]
+    edges = [{"from_node": f"Concept {i}", "to_node": f"Concept {rng.randrange(node_count)}",
+              "type": "related_to"}
+             for i in range(node_count) for _ in range(edges_per_node)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def scan_connected(graph_data, name):
+    # Previous annotate_graph_llm lookup (outgoing edges only).
+    return [edge["to_node"] for edge in graph_data["edges"] if edge["from_node"] == name]
+
+
+def run(node_count, edges_per_node, sample, seed):
+    rng = random.Random(seed)
+    graph_data = synthetic_graph(node_count, edges_per_node, rng)
+    names = [node["name"] for node in graph_data["nodes"]]
+    probe = rng.sample(names, min(sample, node_count))
+    stale = set(rng.sample(names, max(1, node_count // 100)))
+
+    _, scan_sample_s = timed(lambda: [scan_connected(graph_data, n) for n in probe])
+    graph, build_s = timed(IndexedGraph.from_json, graph_data)
+    _, neighbors_s = timed(lambda: [graph.neighbors(n) for n in names])
+
+    aliases = [f"concept-{names.index(n)} alias" for n in probe]
+    _, alias_scan_s = timed(lambda: [next(node for node in graph_data["nodes"] if a in node["aliases"])
+                                     for a in aliases])
+    _, alias_index_s = timed(lambda: [graph.node(a) for a in aliases])
+
+    _, filter_s = timed(lambda: [e for e in graph_data["edges"]
+                                 if e["from_node"] in stale or e["to_node"] in stale])
+    _, touching_s = timed(graph.edges_touching, stale)
+    _, to_json_s = timed(lambda: json.dumps(graph.to_json()))
+    _, json_s = timed(lambda: json.dumps(graph_data))
+
+    return {
+        "nodes": node_count,
+        "edges": len(graph_data["edges"]),
+        "connected_scan_all_s_est": round(scan_sample_s / len(probe) * node_count, 2),
+        "index_build_ms": round(build_s * 1000, 1),
+        "connected_index_all_ms": round(neighbors_s * 1000, 1),
+        "alias_lookup_scan_us": round(alias_scan_s / len(aliases) * 1e6, 1),
+        "alias_lookup_index_us": round(alias_index_s / len(aliases) * 1e6, 2),
+        "stale_edges_filter_ms": round(filter_s * 1000, 2),
+        "stale_edges_index_ms": round(touching_s * 1000, 2),
+        "to_json_overhead_ms": round((to_json_s - json_s) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 20000])
+    parser.add_argument("--edges-per-node", type=int, default=3)
+    parser.add_argument("--sample", type=int, default=50, help="nodes timed with the O(N*E) scan")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for node_count in args.nodes:
+        results.append(run(node_count, args.edges_per_node, args.sample, args.seed))
+        r = results[-1]
+        print(f"nodes={node_count:<6} scan≈{r['connected_scan_all_s_est']}s "
+              f"index={r['index_build_ms'] + r['connected_index_all_ms']:.1f}ms", file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time `import app` in fresh interpreters, the cost each
+server worker pays on boot. Runs with Neo4j pointed at an unroutable
+address and without OPENAI_API_KEY, which previously stalled or failed the
+import. Exits non-zero if the median exceeds --target-ms.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = (
+    "import time; t = time.perf_counter(); import app; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def import_seconds(env):
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=500)
+    parser.add_argument("--neo4j-uri", default="bolt://10.255.255.1:7687",
+                        help="Neo4j URI to use during import (default: unroutable)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, NEO4J_URI=args.neo4j_uri)
+    env.pop("OPENAI_API_KEY", None)
+
+    samples = [import_seconds(env) * 1000 for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(json.dumps({
+        "runs": args.runs,
+        "median_ms": round(median, 1),
+        "max_ms": round(max(samples), 1),
+        "target_ms": args.target_ms,
+        "ok": median <= args.target_ms
+    }))
+    sys.exit(0 if median <= args.target_ms else 1)
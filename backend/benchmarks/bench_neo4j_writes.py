@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for reviseKnowledgeGraph.update_graph.
+Compares the batched UNWIND writer against the previous one-statement-
+per-row writer, in nodes/sec. Runs against a real Neo4j when --uri is
+given (e.g. a local `neo4j:5` container), otherwise against an in-process
+stand-in driver that charges a fixed round-trip time per statement.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+import reviseKnowledgeGraph
+
+
+class StubResult:
+    def consume(self):
+        return None
+
+
+class StubSession:
+    """Minimal neo4j.Session stand-in: every run() costs one round trip."""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        self.driver.round_trips += 1
+        self.driver.rows_written += len(kwargs.get("rows", [None]))
+        time.sleep(self.driver.rtt)
+        return StubResult()
+
+    def execute_write(self, func, *args, **kwargs):
+        result = func(self, *args, **kwargs)
+        self.run("COMMIT")  # commit is its own round trip
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StubDriver:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.round_trips = 0
+        self.rows_written = 0
+
+    def session(self, **kwargs):
+        return StubSession(self)
+
+    def close(self):
+        pass
+
+
+def legacy_update_graph(graph_data, neo4j_driver):
+    """Previous writer: one auto-commit MERGE per node and per edge."""
+    with neo4j_driver.session() as session:
+        for row in reviseKnowledgeGraph._node_rows(graph_data):
+            session.run(reviseKnowledgeGraph.NODE_UPSERT_QUERY, rows=[row]).consume()
+        for row in reviseKnowledgeGraph._edge_rows(graph_data):
+            session.run(reviseKnowledgeGraph.EDGE_UPSERT_QUERY, rows=[row]).consume()
+
+
+def synthetic_graph(n_nodes):
+    nodes = [{"name": f"Bench Node {i}", "type": "Symptom", "confidence": 0.9,
+              "aliases": [f"bench alias {i}"], "context": {}, "llm_summary": "stub"}
+             for i in range(n_nodes)]
+    edges = [{"from_node": f"Bench Node {i}", "to_node": f"Bench Node {i + 1}",
+              "type": "related_to", "confidence": 0.8}
+             for i in range(n_nodes - 1)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def timed_nodes_per_sec(func, graph, n_nodes):
+    start = time.perf_counter()
+    func(graph)
+    return n_nodes / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=reviseKnowledgeGraph.NEO4J_BATCH_SIZE)
+    parser.add_argument("--rtt", type=float, default=0.001, help="stand-in round-trip time (s)")
+    parser.add_argument("--uri", help="bolt URI of a real Neo4j to benchmark against")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default=os.getenv("NEO4J_PASSWORD"))
+    args = parser.parse_args()
+
+    graph = synthetic_graph(args.nodes)
+    if args.uri:
+        from neo4j import GraphDatabase
+        bench_driver = GraphDatabase.driver(args.uri, auth=(args.user, args.password))
+        reviseKnowledgeGraph.ensure_schema(bench_driver)
+        target = args.uri
+    else:
+        bench_driver = StubDriver(args.rtt)
+        target = f"in-process stand-in (rtt={args.rtt * 1000:.1f}ms)"
+
+    legacy = timed_nodes_per_sec(lambda g: legacy_update_graph(g, bench_driver), graph, args.nodes)
+    batched = timed_nodes_per_sec(
+        lambda g: reviseKnowledgeGraph.update_graph(g, neo4j_driver=bench_driver, batch_size=args.batch_size),
+        graph, args.nodes
+    )
+
+    if args.uri:
+        with bench_driver.session() as session:
+            session.run("MATCH (n:Entity) WHERE n.name STARTS WITH 'Bench Node' DETACH DELETE n").consume()
+    bench_driver.close()
+
+    print(f"target={target} nodes={args.nodes} edges={args.nodes - 1} batch_size={args.batch_size}")
+    print(f"per-row writes: {legacy:,.0f} nodes/sec")
+    print(f"UNWIND batches: {batched:,.0f} nodes/sec")
+    print(f"speedup:        {batched / legacy:.1f}x")
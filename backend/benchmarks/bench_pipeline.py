@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark harness. Drives build_knowledge_graph,
+revise_knowledge_graph, generate_patient_report and the /generate_report
+Flask route against the fake OpenAI server, with synthetic transcripts and
+EMRs of increasing size, and prints one JSON document with p50/p95
+latency, throughput, peak traced memory and LLM call counts per target and
+size. Compare two runs' JSON to catch regressions in the backend hot paths.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+os.environ.setdefault("NEO4J_URI", "bolt://127.0.0.1:1")    # fail fast: no Neo4j writes
+os.environ.setdefault("PATIENT_GRAPH_STORE_ENABLED", "0")   # every run summarizes from scratch
+os.environ.setdefault("LLM_BACKOFF_BASE", "0.05")
+
+from openai import OpenAI
+import llmCache
+import pipelineMetrics
+from createKnowledgeGraph import build_knowledge_graph
+from generatePatientReport import generate_patient_report
+from llmClient import set_openai_client
+from reviseKnowledgeGraph import revise_knowledge_graph
+from fake_openai_server import CANNED_TERMS, FakeOpenAIServer
+
+
+def synthetic_transcript(turns, rng):
+    lines = []
+    for i in range(turns):
+        if i % 2 == 0:
+            lines.append(f"Doctor: How has the {rng.choice(CANNED_TERMS).lower()} been since last week?")
+        else:
+            a, b = rng.sample(CANNED_TERMS, 2)
+            lines.append(f"Patient: The {a.lower()} comes with {b.lower()}, mostly in the evening.")
+    return "\n".join(lines)
+
+
+def synthetic_emr(size, rng):
+    return {
+        "patient_id": f"bench-{size}",
+        "conditions": [{"name": rng.choice(CANNED_TERMS), "status": "chronic"} for _ in range(size // 4 + 1)],
+        "medications": [{"name": rng.choice(CANNED_TERMS), "dose": "200mg"} for _ in range(size // 4 + 1)],
+        "labs": [{"test": f"Lab {i}", "value": str(i), "date": f"2025-01-{i % 28 + 1:02d}"} for i in range(size)],
+        "allergies": [{"substance": "Penicillin", "reaction": "Rash"}],
+        "alerts": ["History of chronic migraine"],
+        "encounters": [
+            {"date": f"2024-{i % 12 + 1:02d}-01", "reason": rng.choice(CANNED_TERMS),
+             "notes": f"Follow-up for {rng.choice(CANNED_TERMS).lower()}."}
+            for i in range(size)
+        ],
+    }
+
+
+def make_targets(transcript, emr, graph):
+    import app as app_module
+    client = app_module.app.test_client()
+
+    def route():
+        response = client.post("/generate_report", json={"transcript": transcript, "no_cache": True})
+        assert response.status_code == 200, response.status_code
+
+    return {
+        "build_knowledge_graph": lambda: build_knowledge_graph(transcript, "", None),
+        "revise_knowledge_graph": lambda: revise_knowledge_graph(json.loads(json.dumps(graph)), emr, transcript),
+        "generate_patient_report": lambda: generate_patient_report(graph, emr, transcript),
+        "flask_generate_report": route,
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, repeats, concurrency, server):
+    def timed_run(_):
+        with llmCache.bypass(), pipelineMetrics.track_request() as usage:
+            start = time.perf_counter()
+            func()
+            return time.perf_counter() - start, usage.snapshot()
+
+    with llmCache.bypass():
+        # Peak memory from one traced run; tracing would skew the timed runs.
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        calls_before, errors_before = server.calls, server.errors
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            runs = list(pool.map(timed_run, range(repeats)))
+        wall = time.perf_counter() - start
+
+    latencies = [seconds for seconds, _ in runs]
+    return {
+        "runs": repeats,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "throughput_per_s": round(repeats / wall, 3),
+        "peak_traced_kb": round(peak / 1024, 1),
+        "llm_calls_per_run": round((server.calls - calls_before) / repeats, 2),
+        "llm_errors": server.errors - errors_before,
+        "retries_per_run": round(sum(u["retries"] for _, u in runs) / repeats, 2),
+        "prompt_tokens_per_run": round(sum(u["prompt_tokens"] for _, u in runs) / repeats, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 40, 160],
+                        help="transcript turns / EMR records per size step")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent runs per target")
+    parser.add_argument("--targets", nargs="+", default=None, help="subset of targets to run")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra uniform stub latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this path")
+    args = parser.parse_args()
+
+    results = []
+    with FakeOpenAIServer(latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed) as server:
+        set_openai_client(OpenAI(api_key="stub-key", base_url=server.base_url))
+        for size in args.sizes:
+            rng = random.Random(args.seed + size)
+            transcript = synthetic_transcript(size, rng)
+            emr = synthetic_emr(size, rng)
+            with llmCache.bypass():
+                graph = build_knowledge_graph(transcript, "", None)
+            targets = make_targets(transcript, emr, graph)
+            for name in args.targets or targets:
+                result = measure(targets[name], args.repeats, args.concurrency, server)
+                results.append({"target": name, "size": size, "graph_nodes": len(graph["nodes"]), **result})
+                print(f"{name:<24} size={size:<4} p50={result['p50_ms']:>8}ms p95={result['p95_ms']:>8}ms",
+                      file=sys.stderr)
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "python": platform.python_version(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for schema-validated report tabs against the fake OpenAI server
+with a fraction of schema-invalid replies (--invalid-rate). Compares:
+
+- whole_retry: no response_format; an invalid tab repeats the whole call
+  (up to --max-attempts), which is what a caller had to do before;
+- field_retry: no response_format; only the invalid fields are re-requested;
+- structured: json_schema response_format plus field retry (the default).
+
+Prints LLM calls per report and p50/p95 latency of the summary + EMR tabs.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+from openai import OpenAI
+import generatePatientReport
+import llmCache
+import llmSchemas
+from llmClient import chat_text, get_openai_client, set_openai_client
+from promptRegistry import registry
+from fake_openai_server import FakeOpenAIServer
+from bench_pipeline import percentile
+
+TRANSCRIPT = "\n".join([
+    "Doctor: What brings you in today?",
+    "Patient: I've had headaches for two weeks, worse in the morning.",
+    "Doctor: Any nausea or vision changes?",
+    "Patient: Some nausea, no vision problems. Ibuprofen helps a little.",
+])
+EMR = {"conditions": [{"name": "Migraine", "status": "chronic"}],
+       "medications": [{"name": "Ibuprofen", "dose": "200mg"}]}
+
+
+def tab_messages():
+    lines = json.dumps(generatePatientReport.only_patient_lines(TRANSCRIPT), indent=2)
+    return [
+        (registry.get("summary_tab").render_messages(PATIENT_LINES_JSON=lines), llmSchemas.SUMMARY_TAB),
+        (registry.get("emr_tab").render_messages(EMR_JSON=json.dumps(EMR, indent=2), PATIENT_LINES_JSON=lines),
+         llmSchemas.EMR_TAB),
+    ]
+
+
+def whole_retry(messages, schema, max_attempts):
+    for _ in range(max_attempts):
+        content = chat_text(get_openai_client(), generatePatientReport.MODEL, messages, cache=False)
+        data = generatePatientReport._extract_json(content)
+        if data is not None and schema.is_valid(schema.fill_constants(data)):
+            return data
+    return None
+
+
+def run_mode(mode, server, repeats, max_attempts):
+    llmSchemas.STRUCTURED_OUTPUT = mode == "structured"
+    latencies, invalid_reports = [], 0
+    calls_before = server.calls
+    with llmCache.bypass():
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for messages, schema in tab_messages():
+                if mode == "whole_retry":
+                    data = whole_retry(messages, schema, max_attempts)
+                else:
+                    data = generatePatientReport.chat_json(messages, schema)
+                if data is None or not schema.is_valid(data):
+                    invalid_reports += 1
+            latencies.append(time.perf_counter() - start)
+    calls = (server.calls - calls_before) / repeats
+    return {
+        "mode": mode,
+        "llm_calls_per_report": round(calls, 2),
+        "extra_calls_per_report": round(calls - 2, 2),
+        "invalid_tabs": invalid_reports,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--invalid-rate", type=float, default=0.3)
+    parser.add_argument("--max-attempts", type=int, default=3, help="whole_retry attempts per tab")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("whole_retry", "field_retry", "structured"):
+        with FakeOpenAIServer(latency=args.latency, jitter=args.jitter, seed=args.seed,
+                              invalid_rate=args.invalid_rate) as server:
+            set_openai_client(OpenAI(api_key="stub-key", base_url=server.base_url))
+            results.append(run_mode(mode, server, args.repeats, args.max_attempts))
+        print(f"{mode:<12} calls/report={results[-1]['llm_calls_per_report']:<5} "
+              f"p95={results[-1]['p95_ms']}ms", file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tail-latency benchmark for hedged, deadline-aware LLM calls. Runs full
+reports (reportPipeline.run_report) against the fake OpenAI server with a
+fraction of calls delayed by a large outlier, and compares:
+
+- baseline: no hedging, no deadline;
+- hedged: duplicate request after the observed p90 per call type;
+- hedged+deadline: as above, plus an end-to-end --deadline with cheaper-model
+  and deterministic fallbacks.
+
+Prints p50/p95/p99/max report latency and hedge/fallback counts per mode.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+os.environ.setdefault("NEO4J_URI", "bolt://127.0.0.1:1")
+os.environ.setdefault("PATIENT_GRAPH_STORE_ENABLED", "0")
+
+from openai import OpenAI
+import llmClient
+import llmDeadline
+import pipelineMetrics
+from reportPipeline import run_report
+from bench_pipeline import percentile, synthetic_transcript
+from fake_openai_server import FakeOpenAIServer
+
+MODES = {
+    "baseline": {"hedge": False, "deadline": None},
+    "hedged": {"hedge": True, "deadline": None},
+    "hedged+deadline": {"hedge": True, "deadline": "arg"},
+}
+
+
+def run_mode(mode, args, transcript):
+    settings = MODES[mode]
+    llmClient.LLM_HEDGE_ENABLED = settings["hedge"]
+    deadline = args.deadline if settings["deadline"] else None
+    llmDeadline.latencies = llmClient.latencies = llmDeadline.LatencyTracker()
+
+    with FakeOpenAIServer(latency=args.latency, jitter=args.jitter, seed=args.seed,
+                          outlier_rate=args.outlier_rate, outlier_latency=args.outlier_latency) as server:
+        llmClient.set_openai_client(OpenAI(api_key="stub-key", base_url=server.base_url))
+        # Warm-up reports (fast stub) so every call type has a p90 to hedge on.
+        outlier_rate, server.outlier_rate = server.outlier_rate, 0.0
+        for _ in range(args.warmup):
+            run_report(transcript, no_cache=True)
+        server.outlier_rate = outlier_rate
+
+        latencies, calls_before = [], server.calls
+        with pipelineMetrics.track_request() as usage:
+            for _ in range(args.reports):
+                start = time.perf_counter()
+                run_report(transcript, no_cache=True, deadline=deadline)
+                latencies.append(time.perf_counter() - start)
+        totals = usage.snapshot()
+        calls = server.calls - calls_before
+
+    return {
+        "mode": mode,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "llm_calls_per_report": round(calls / args.reports, 2),
+        "hedges": totals["hedges"],
+        "fallbacks": totals["fallbacks"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=60)
+    parser.add_argument("--warmup", type=int, default=25, help="reports run first so each call type has a p90")
+    parser.add_argument("--turns", type=int, default=12, help="transcript turns")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--outlier-rate", type=float, default=0.03)
+    parser.add_argument("--outlier-latency", type=float, default=3.0)
+    parser.add_argument("--deadline", type=float, default=1.0, help="end-to-end deadline (s) for hedged+deadline")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.turns, random.Random(args.seed))
+    results = []
+    for mode in args.modes:
+        results.append(run_mode(mode, args, transcript))
+        r = results[-1]
+        print(f"{mode:<16} p50={r['p50_ms']}ms p99={r['p99_ms']}ms max={r['max_ms']}ms "
+              f"hedges={r['hedges']} fallbacks={r['fallbacks']}", file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
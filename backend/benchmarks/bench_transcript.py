@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the per-request transcript preprocessing (parsedTranscript).
+
+Times the deterministic transcript work one report does outside the LLM
+calls: patient lines + their JSON for the summary and EMR tabs, manual
+node annotation, and prompt packing for every node. The baseline re-parses
+the raw string in each stage as before; the parsed path builds one
+ParsedTranscript (from the string, or from the frontend's conversation
+array) and shares it. Checks that both produce the same prompt inputs.
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+from bench_annotate_manual import naive_annotate, synthetic_inputs
+from contextPacking import NodeContextPacker, count_tokens
+from generatePatientReport import only_patient_lines
+from parsedTranscript import ParsedTranscript
+from reviseKnowledgeGraph import annotate_graph_manual
+
+FIXED_TEXT = "Summarize this node for the clinician. " * 20
+
+
+def legacy_patient_lines(transcript):
+    out = []
+    for raw in transcript.splitlines():
+        s = raw.strip()
+        if s.lower().startswith("patient:"):
+            out.append(s.split(":", 1)[1].strip())
+    return out
+
+
+def legacy_pack(graph, emr, transcript, budget):
+    """Per-node packing as before: mention turns re-tokenized for every node."""
+    full_tokens = count_tokens(json.dumps(emr, indent=2)) + count_tokens(transcript)
+    packed = []
+    for node in graph["nodes"]:
+        remaining = budget - count_tokens(FIXED_TEXT)
+        turns = []
+        for turn in reversed(node["context"]["mentions"]):
+            cost = count_tokens(turn) + 1
+            if cost > remaining:
+                break
+            turns.append(turn)
+            remaining -= cost
+        packed.append(len(turns))
+    return full_tokens, packed
+
+
+def run_legacy(graph, emr, transcript, budget):
+    tabs = [json.dumps(legacy_patient_lines(transcript), ensure_ascii=False, indent=2) for _ in range(2)]
+    annotated = naive_annotate(graph, emr, transcript)
+    return tabs, annotated, legacy_pack(annotated, emr, transcript, budget)
+
+
+def run_parsed(graph, emr, raw, budget):
+    transcript = ParsedTranscript.parse(raw)
+    tabs = [transcript.patient_lines_json for _ in range(2)]
+    annotated = annotate_graph_manual(graph, emr, transcript)
+    packer = NodeContextPacker({}, transcript, budget)
+    packed = []
+    for node in annotated["nodes"]:
+        remaining = budget - count_tokens(FIXED_TEXT)
+        turns, _ = packer._fit(reversed(node["context"]["mentions"]), remaining, packer._turn_tokens)
+        packed.append(len(turns))
+    full_tokens = count_tokens(json.dumps(emr, indent=2)) + transcript.token_count
+    return tabs, annotated, (full_tokens, packed)
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        inputs = copy.deepcopy(args)
+        start = time.perf_counter()
+        result = func(*inputs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--encounters", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=3000, help="per-node prompt token budget")
+    args = parser.parse_args()
+
+    graph, emr, transcript = synthetic_inputs(args.lines, args.encounters, random.Random(0))
+    conversation = [{"role": "assistant" if line.startswith("AI:") else "user", "content": line.split(": ", 1)[1]}
+                    for line in transcript.split("\n")]
+
+    legacy, legacy_s = timed(run_legacy, graph, emr, transcript, args.budget)
+    parsed, parsed_s = timed(run_parsed, graph, emr, transcript, args.budget)
+    from_conversation, conversation_s = timed(run_parsed, graph, emr, conversation, args.budget)
+
+    assert legacy == parsed == from_conversation, "parsed transcript diverged from per-stage parsing"
+    assert only_patient_lines(transcript) == legacy_patient_lines(transcript)
+    print(f"lines={args.lines} nodes={len(graph['nodes'])} encounters={args.encounters}")
+    print(f"per-stage parsing:        {legacy_s * 1000:.1f}ms")
+    print(f"parsed once (string):     {parsed_s * 1000:.1f}ms  ({legacy_s / parsed_s:.1f}x)")
+    print(f"parsed once (array):      {conversation_s * 1000:.1f}ms  ({legacy_s / conversation_s:.1f}x)")
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub used by the benchmark scripts.
+Serves POST /v1/chat/completions with a configurable latency, jitter and
+error rate, and canned replies chosen by prompt type (graph, graph delta,
+node summary, summary tab, EMR tab), so pipeline performance can be
+measured without calling the real API. Jitter and errors are drawn from a
+seeded RNG, so runs are repeatable. Requests with "stream": true get a
+server-sent event stream, and `truncate_rate` cuts that fraction of
+replies in half (finish_reason "length") to exercise truncation handling.
+`outlier_rate` delays that fraction of calls by `outlier_latency` extra
+seconds to simulate tail-latency stragglers.
+`invalid_rate` breaks one field of that fraction of JSON replies, except
+for requests constrained by a json_schema response_format, which (like the
+real API) always match their schema and return only its fields.
+`rpm_quota` / `tpm_quota` enforce an account-style quota (requests and
+prompt + max_tokens per minute, bursting up to `quota_burst` seconds'
+worth): calls over it get HTTP 429 with a Retry-After header.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Stub summary for benchmarking."
+
+# Entity names the canned graph draws from; synthetic transcripts use the
+# same terms so manual annotation finds mentions.
+CANNED_TERMS = [
+    "Headache", "Nausea", "Dizziness", "Fatigue", "Ibuprofen", "Migraine", "Insomnia",
+    "Hypertension", "Photophobia", "Caffeine", "Stress", "Acetaminophen", "Neck pain",
+    "Blurred vision", "Vomiting", "Anxiety",
+]
+TERM_TYPES = ["Symptom", "Symptom", "Symptom", "Symptom", "Medication", "Condition", "Symptom",
+              "Condition", "Symptom", "Trigger", "Trigger", "Medication", "Symptom",
+              "Symptom", "Symptom", "Condition"]
+
+SUMMARY_TAB_REPLY = json.dumps({
+    "type": "summary_tab",
+    "visit_focus": {
+        "chief_complaint": "Headache",
+        "onset_duration_severity": "Two weeks, moderate",
+        "associated": {"positives": ["Nausea"], "negatives": ["Fever"]}
+    },
+    "concise_summary": "Patient reports two weeks of headaches with nausea.",
+    "next_best_actions": ["Check blood pressure", "Review analgesic use"],
+    "quick_checks": ["Any visual aura?"],
+    "transcript_snippets": ["My head has been pounding."]
+})
+
+EMR_TAB_REPLY = json.dumps({
+    "type": "emr_tab",
+    "relevant_history": {
+        "conditions": [{"name": "Chronic Migraine", "status": "chronic"}],
+        "meds": [{"name": "Ibuprofen", "purpose": "headache pain relief"}],
+        "allergies_alerts": ["Penicillin: rash"]
+    },
+    "risk_flags": ["Elevated blood pressure"],
+    "trend_insights": [],
+    "care_gaps": [],
+    "emr_transcript_conflicts": []
+})
+
+
+def canned_graph(text, max_nodes=len(CANNED_TERMS)):
+    """Graph over the canned terms the text mentions (at least two)."""
+    lowered = text.lower()
+    picked = [i for i, term in enumerate(CANNED_TERMS) if term.lower() in lowered][:max_nodes] or [0, 1]
+    nodes = [{"name": CANNED_TERMS[i], "type": TERM_TYPES[i], "confidence": 0.8} for i in picked]
+    edges = [
+        {"from_node": a["name"], "to_node": b["name"], "type": "related_to", "confidence": 0.6}
+        for a, b in zip(nodes, nodes[1:])
+    ]
+    return json.dumps({"nodes": nodes, "edges": edges})
+
+
+def canned_reply(text):
+    """Pick a reply by the prompt's distinguishing marker."""
+    # Graph prompts put the conversation first and the instructions
+    # ("You are a medical AI assistant...") after it.
+    conversation = text.split("\n\nYou are ", 1)[0]
+    if '"type": "summary_tab"' in text:
+        return SUMMARY_TAB_REPLY
+    if '"type": "emr_tab"' in text:
+        return EMR_TAB_REPLY
+    if "New conversation turns:" in text:
+        return canned_graph(conversation.split("New conversation turns:", 1)[1])
+    if text.startswith("Conversation:"):
+        return canned_graph(conversation)
+    return DEFAULT_REPLY
+
+
+def break_field(reply, rng):
+    """Make one field of a JSON reply schema-invalid (a graph node loses its name)."""
+    try:
+        data = json.loads(reply)
+    except ValueError:
+        return reply
+    if not isinstance(data, dict) or not data:
+        return reply
+    if data.get("nodes"):
+        rng.choice(data["nodes"]).pop("name", None)
+    else:
+        data[rng.choice(sorted(data))] = None
+    return json.dumps(data)
+
+
+def schema_fields(reply, response_format):
+    """Restrict a JSON reply to the top-level fields of a json_schema response_format."""
+    if (response_format or {}).get("type") != "json_schema":
+        return reply
+    properties = response_format["json_schema"]["schema"].get("properties", {})
+    try:
+        data = json.loads(reply)
+    except ValueError:
+        return reply
+    return json.dumps({k: v for k, v in data.items() if k in properties})
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # buffer headers + body into one send (avoids Nagle/delayed-ACK stalls)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client gave up (timeout / deadline)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        stub = self.server.stub
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        retry_after = stub.over_quota(len(prompt) // 4 + (body.get("max_tokens") or 0))
+        if retry_after is not None:
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub quota)", "type": "requests",
+                                            "code": "rate_limit_exceeded"}},
+                            headers={"Retry-After": f"{retry_after:.3f}"})
+            return
+
+        with stub.lock:
+            stub.calls += 1
+            call_id = stub.calls
+            delay = stub.latency + (stub.rng.uniform(0, stub.jitter) if stub.jitter else 0.0)
+            if stub.outlier_rate and stub.rng.random() < stub.outlier_rate:
+                delay += stub.outlier_latency
+            failed = stub.error_rate and stub.rng.random() < stub.error_rate
+            if failed:
+                stub.errors += 1
+            truncated = stub.truncate_rate and stub.rng.random() < stub.truncate_rate
+            invalid = stub.invalid_rate and stub.rng.random() < stub.invalid_rate
+        time.sleep(delay)
+
+        if failed:
+            self._send_json(500, {"error": {"message": "Injected stub error", "type": "server_error"}})
+            return
+
+        reply = stub.reply if stub.reply is not None else canned_reply(prompt)
+        response_format = body.get("response_format")
+        if (response_format or {}).get("type") == "json_schema":
+            reply = schema_fields(reply, response_format)
+        elif invalid:
+            with stub.lock:
+                stub.invalid += 1
+                reply = break_field(reply, stub.rng)
+        finish_reason = "stop"
+        if truncated:
+            reply, finish_reason = reply[:len(reply) // 2], "length"
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(reply) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        if body.get("stream"):
+            self._send_stream(body, call_id, reply, finish_reason, usage)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{call_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        })
+
+    def _send_stream(self, body, call_id, reply, finish_reason, usage, chunk_size=24):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, usage=None):
+            payload = {
+                "id": f"chatcmpl-stub-{call_id}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": choices,
+                "usage": usage
+            }
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+        try:
+            for i in range(0, len(reply), chunk_size):
+                event([{"index": 0, "delta": {"content": reply[i:i + chunk_size]}, "finish_reason": None}])
+            event([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                event([], usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client closed the stream early (e.g. a cancelled hedge)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog (5) drops connects under a burst of
+    # concurrent clients, adding 1s+ SYN retransmits to their latency.
+    request_queue_size = 1024
+
+
+class FakeOpenAIServer:
+    """
+    Threaded stub server; use as a context manager or call start()/stop().
+    `reply` fixes the content of every response; by default it is chosen
+    per prompt type (see canned_reply).
+    """
+
+    def __init__(self, latency=0.2, reply=None, host="127.0.0.1", port=0,
+                 jitter=0.0, error_rate=0.0, seed=0, truncate_rate=0.0, invalid_rate=0.0,
+                 outlier_rate=0.0, outlier_latency=5.0, rpm_quota=0, tpm_quota=0, quota_burst=5.0):
+        self.latency = latency
+        self.reply = reply
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.invalid_rate = invalid_rate
+        self.outlier_rate = outlier_rate
+        self.outlier_latency = outlier_latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.invalid = 0
+        self.rate_limited = 0
+        # [rate/s, capacity, available] per quota; refilled in over_quota()
+        self._quotas = {name: [per_minute / 60.0, per_minute / 60.0 * quota_burst, per_minute / 60.0 * quota_burst]
+                        for name, per_minute in (("requests", rpm_quota), ("tokens", tpm_quota)) if per_minute}
+        self._quota_updated = time.monotonic()
+        self.lock = threading.Lock()
+        self._httpd = _StubHTTPServer((host, port), FakeOpenAIHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = None
+
+    def over_quota(self, tokens):
+        """Charge one request and `tokens` to the quotas; seconds to wait if either is exhausted, else None."""
+        if not self._quotas:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self._quota_updated = now - self._quota_updated, now
+            cost = {"requests": 1.0, "tokens": float(tokens)}
+            for quota in self._quotas.values():
+                quota[2] = min(quota[1], quota[2] + elapsed * quota[0])
+            short = [(cost[name] - quota[2]) / quota[0]
+                     for name, quota in self._quotas.items() if quota[2] < cost[name]]
+            if short:
+                self.rate_limited += 1
+                return max(short)
+            for name, quota in self._quotas.items():
+                quota[2] -= cost[name]
+            return None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of replies cut in half")
+    parser.add_argument("--invalid-rate", type=float, default=0.0,
+                        help="fraction of JSON replies with a schema-invalid field")
+    parser.add_argument("--outlier-rate", type=float, default=0.0, help="fraction of calls delayed by --outlier-latency")
+    parser.add_argument("--outlier-latency", type=float, default=5.0)
+    parser.add_argument("--rpm-quota", type=float, default=0, help="requests/minute before HTTP 429 (0 = none)")
+    parser.add_argument("--tpm-quota", type=float, default=0, help="tokens/minute before HTTP 429 (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency, port=args.port, jitter=args.jitter,
+                              error_rate=args.error_rate, seed=args.seed, truncate_rate=args.truncate_rate,
+                              invalid_rate=args.invalid_rate, outlier_rate=args.outlier_rate,
+                              outlier_latency=args.outlier_latency, rpm_quota=args.rpm_quota,
+                              tpm_quota=args.tpm_quota)
+    print(f"Fake OpenAI server listening at {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Load test for the /report_jobs API.
+Serves the Flask app on a local threaded server with the LLM replaced by
+the fake OpenAI server, submits N report jobs concurrently, polls each
+until it finishes, and reports submit latency and completed jobs/sec.
+Also checks that re-submitting with the same Idempotency-Key returns the
+existing job.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+os.environ.setdefault("REPORT_JOBS_DB", os.path.join(tempfile.mkdtemp(), "report_jobs.sqlite"))
+
+from openai import OpenAI
+from werkzeug.serving import make_server
+import reportJobs
+from llmClient import set_openai_client
+from fake_openai_server import FakeOpenAIServer
+
+
+def call(method, url, body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json", **(headers or {})})
+    with urllib.request.urlopen(req) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+def run_job(base_url, index, poll_interval):
+    start = time.perf_counter()
+    status, job = call("POST", f"{base_url}/report_jobs",
+                       {"transcript": f"Patient: headache for {index} days", "no_cache": True},
+                       {"Idempotency-Key": f"load-test-{index}"})
+    submitted = time.perf_counter() - start
+    assert status == 202, status
+
+    # Double submit must not start a second job.
+    status, again = call("POST", f"{base_url}/report_jobs",
+                         {"transcript": "ignored"}, {"Idempotency-Key": f"load-test-{index}"})
+    assert status == 200 and again["job_id"] == job["job_id"], again
+
+    while True:
+        _, state = call("GET", f"{base_url}/report_jobs/{job['job_id']}")
+        if state["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(poll_interval)
+    return submitted, time.perf_counter() - start, state["status"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=25, help="concurrent submitting clients")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per LLM call (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    with FakeOpenAIServer(latency=args.latency) as llm:
+        set_openai_client(OpenAI(api_key="stub-key", base_url=llm.base_url))
+
+        import app as app_module
+        server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(lambda i: run_job(base_url, i, args.poll_interval), range(args.jobs)))
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+    submit_ms = [r[0] * 1000 for r in results]
+    failed = sum(1 for r in results if r[2] != "succeeded")
+    print(f"jobs={args.jobs} clients={args.clients} latency={args.latency}s "
+          f"workers={reportJobs.REPORT_JOB_WORKERS}")
+    print(f"submit latency: median {statistics.median(submit_ms):.1f}ms, max {max(submit_ms):.1f}ms")
+    print(f"completed:      {args.jobs - failed} ok, {failed} failed in {elapsed:.2f}s")
+    print(f"throughput:     {args.jobs / elapsed:.1f} jobs/s, LLM calls {llm.calls}")
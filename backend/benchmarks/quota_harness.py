@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Quota harness for the LLM rate limiter across worker processes. Starts the
+fake OpenAI server with an account-style requests/minute quota and runs
+several worker processes (as gunicorn would) against it, each with
+interactive threads (a call, then think time) and batch threads (calls
+back to back under rateLimiter.request_priority(BATCH)). Every worker is
+configured with the full account limit, and the limiter is either:
+
+- per-process: each worker has its own bucket (LLM_RATE_LIMIT_STATE_DIR="");
+- shared: all workers draw from one file-backed bucket.
+
+Prints, per mode, the 429s the server returned, successful calls/s, failed
+calls, and interactive vs batch call latency (limiter wait included).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+os.environ.setdefault("NEO4J_URI", "bolt://127.0.0.1:1")
+os.environ.setdefault("PATIENT_GRAPH_STORE_ENABLED", "0")
+
+from bench_pipeline import percentile
+from fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "Summarize the visit in one sentence."}]
+
+
+def worker(base_url, state_dir, args, results):
+    from openai import OpenAI
+    import llmClient
+    from asyncRunner import run_sync
+    from rateLimiter import BATCH, INTERACTIVE, request_priority
+
+    llmClient.set_rate_limit(args.rpm, 0, state_dir)
+    client = OpenAI(api_key="stub-key", base_url=base_url, max_retries=0)
+    stop_at = time.monotonic() + args.duration
+    samples = {INTERACTIVE: [], BATCH: []}
+    failed = {INTERACTIVE: 0, BATCH: 0}
+
+    def loop(priority, think):
+        with request_priority(priority):
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    run_sync(llmClient.chat_completion_async(client, "gpt-4o-mini", MESSAGES, max_tokens=32))
+                    samples[priority].append(time.perf_counter() - start)
+                except Exception:
+                    failed[priority] += 1
+                if think:
+                    time.sleep(think)
+
+    threads = [threading.Thread(target=loop, args=(INTERACTIVE, args.think)) for _ in range(args.interactive)]
+    threads += [threading.Thread(target=loop, args=(BATCH, 0)) for _ in range(args.batch)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put({"samples": samples, "failed": failed})
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeOpenAIServer(latency=args.latency, rpm_quota=args.rpm, quota_burst=args.burst) as server:
+        state_dir = tmp if mode == "shared" else ""
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        start = time.perf_counter()
+        processes = [context.Process(target=worker, args=(server.base_url, state_dir, args, results))
+                     for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        rate_limited = server.rate_limited
+
+    result = {"mode": mode, "http_429": rate_limited}
+    ok = 0
+    for priority in ("interactive", "batch"):
+        latencies = [s for r in reports for s in r["samples"][priority]]
+        ok += len(latencies)
+        result[f"{priority}_calls"] = len(latencies)
+        result[f"{priority}_failed"] = sum(r["failed"][priority] for r in reports)
+        if latencies:
+            result[f"{priority}_p50_ms"] = round(statistics.median(latencies) * 1000, 1)
+            result[f"{priority}_p95_ms"] = round(percentile(latencies, 95) * 1000, 1)
+    result["calls_per_s"] = round(ok / elapsed, 2)
+    result["quota_per_s"] = round(args.rpm / 60.0, 2)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    parser.add_argument("--interactive", type=int, default=2, help="interactive threads per worker")
+    parser.add_argument("--batch", type=int, default=4, help="batch threads per worker")
+    parser.add_argument("--think", type=float, default=1.0, help="interactive pause between calls (s)")
+    parser.add_argument("--rpm", type=float, default=600, help="account quota, and each worker's limit")
+    parser.add_argument("--burst", type=float, default=5.0, help="quota burst (seconds' worth)")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds each worker runs")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--modes", nargs="+", default=["per-process", "shared"], choices=["per-process", "shared"])
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        results.append(run_mode(mode, args))
+        r = results[-1]
+        print(f"{mode:<12} 429s={r['http_429']} calls/s={r['calls_per_s']} "
+              f"interactive p95={r.get('interactive_p95_ms')}ms batch p95={r.get('batch_p95_ms')}ms",
+              file=sys.stderr)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
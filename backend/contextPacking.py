@@ -0,0 +1,160 @@
+# backend/contextPacking.py
+import json
+import os
+import threading
+
+from mentionIndex import MentionIndex
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+NODE_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_NODE_PROMPT_TOKEN_BUDGET", "3000"))
+TOKENIZER_MODEL = "gpt-3.5-turbo"
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def compact_json(value):
+    """Minimal-whitespace JSON for prompts (indent=2 roughly doubles token count)."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+# -----------------------------
+# TOKEN COUNTING
+# -----------------------------
+def _get_encoder():
+    """tiktoken encoder if available; False if not (falls back to a heuristic)."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+                except Exception:
+                    # tiktoken missing, or its BPE file cannot be fetched offline
+                    _encoder = False
+    return _encoder
+
+
+def count_tokens(text):
+    """Token count with the local tokenizer (or ~4 chars/token without tiktoken)."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+# -----------------------------
+# CONTEXT PACKING
+# -----------------------------
+class NodeContextPacker:
+    """
+    Per-request helper that selects, for each graph node, only the EMR records
+    and transcript turns relevant to it, within a token budget.
+
+    Conditions, medications, alerts and transcript mentions are already in
+    the node's manual context (annotate_graph_manual); the packer adds the
+    EMR encounters and labs that mention the node plus allergies (always
+    safety-relevant), and moves transcript mentions into TRANSCRIPT so they
+    are not sent twice. Every section counts against the budget, filled in
+    priority order: allergies, the node's context records, transcript turns,
+    then encounters and labs (most recent first); whatever no longer fits
+    is dropped.
+    `transcript` is the request's parsedTranscript.ParsedTranscript, whose
+    per-line token counts are reused instead of re-tokenizing each mention
+    for every node that quotes it.
+    """
+
+    def __init__(self, emr_data, transcript, budget=NODE_PROMPT_TOKEN_BUDGET):
+        self.budget = budget
+        self.allergies = emr_data.get("allergies", [])
+        self.encounters = emr_data.get("encounters", [])
+        self.labs = emr_data.get("labs", [])
+        self._encounter_index = MentionIndex(
+            f"{e.get('reason', '')} {e.get('notes', '')}" for e in self.encounters
+        )
+        self._lab_index = MentionIndex(lab.get("test", "") for lab in self.labs)
+        self._allergy_tokens = [count_tokens(compact_json(allergy)) for allergy in self.allergies]
+        self._line_tokens = transcript.line_tokens
+        # What the unpacked prompt used to embed for every node.
+        self.full_context_tokens = count_tokens(json.dumps(emr_data, indent=2)) + transcript.token_count
+        self.prompt_tokens = 0
+        self.baseline_tokens = 0
+        self._lock = threading.Lock()
+
+    def pack(self, node, fixed_text):
+        """
+        Return (node_context_json, emr_json, transcript_text) for `node`.
+        `fixed_text` is the rest of the prompt (template + node fields); the
+        context, EMR and transcript sections are trimmed so the whole prompt
+        fits the budget (see the class docstring for what is kept first).
+        """
+        context = dict(node.get("context", {}))
+        mentions = context.pop("mentions", [])
+        name = node.get("name", "").lower()
+
+        skeleton = compact_json({"allergies": [], "encounters": [], "labs": []})
+        remaining = self.budget - count_tokens(fixed_text) - count_tokens(skeleton)
+        kept, remaining = self._fit(range(len(self.allergies)), remaining, self._allergy_tokens.__getitem__)
+        allergies = [self.allergies[i] for i in kept]
+        context, remaining = self._fit_context(context, remaining)
+
+        turns, remaining = self._fit(reversed(mentions), remaining, self._turn_tokens)
+        turns.reverse()
+        encounters, remaining = self._fit(
+            sorted((self.encounters[i] for i in self._encounter_index.find(name)),
+                   key=lambda e: e.get("date", ""), reverse=True),
+            remaining, self._record_tokens
+        )
+        labs, remaining = self._fit(
+            sorted((self.labs[i] for i in self._lab_index.find(name)),
+                   key=lambda lab: lab.get("date", ""), reverse=True),
+            remaining, self._record_tokens
+        )
+        context_json = compact_json(context)
+        emr_json = compact_json({"allergies": allergies, "encounters": encounters, "labs": labs})
+        transcript_text = "\n".join(turns)
+
+        fixed_tokens = count_tokens(fixed_text) + count_tokens(context_json)
+        with self._lock:
+            self.prompt_tokens += fixed_tokens + count_tokens(emr_json) + count_tokens(transcript_text)
+            self.baseline_tokens += fixed_tokens + self.full_context_tokens
+        return context_json, emr_json, transcript_text
+
+    def stats(self):
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "baseline_prompt_tokens": self.baseline_tokens,
+            "tokens_saved": self.baseline_tokens - self.prompt_tokens,
+        }
+
+    def _turn_tokens(self, turn):
+        tokens = self._line_tokens.get(turn)
+        return count_tokens(turn) if tokens is None else tokens
+
+    def _fit_context(self, context, remaining):
+        """Trim the list-valued records of a node's context (conditions, medications, alerts) to fit."""
+        packed = {key: [] if isinstance(value, list) else value for key, value in context.items()}
+        remaining -= count_tokens(compact_json(packed))
+        for key, value in context.items():
+            if isinstance(value, list):
+                packed[key], remaining = self._fit(value, remaining, self._record_tokens)
+        return packed, remaining
+
+    @staticmethod
+    def _record_tokens(record):
+        return count_tokens(compact_json(record))
+
+    @staticmethod
+    def _fit(items, remaining, tokens):
+        """Take items (highest priority first) while their tokens fit in `remaining`."""
+        kept = []
+        for item in items:
+            cost = tokens(item) + 1
+            if cost > remaining:
+                break
+            kept.append(item)
+            remaining -= cost
+        return kept, remaining
@@ -1,9 +1,14 @@
 # backend/createKnowledgeGraph.py
 import os
 import json
-import re
-from openai import OpenAI
+import logging
 from difflib import SequenceMatcher
+from asyncRunner import run_sync
+from llmClient import chat_text_async, get_openai_client
+from llmJson import IncrementalJSONParser, is_complete_json, parse_json_object
+from llmSchemas import GRAPH, GRAPH_EDGE_SCHEMA, GRAPH_NODE_SCHEMA, prune_invalid
+from nodeDedup import NameMatcher, dedupe_graph, merge_node_into
+from parsedTranscript import ParsedTranscript
 
 # -----------------------------
 # CONFIGURATION
@@ -19,6 +24,10 @@ NODE_COLORS = {
 MIN_NODE_SIZE = 40
 MAX_NODE_SIZE = 100
 SIMILARITY_THRESHOLD = 0.85  # fuzzy merge threshold
+GRAPH_REPAIR_ATTEMPTS = int(os.getenv("LLM_GRAPH_REPAIR_ATTEMPTS", "1"))  # follow-ups for cut-off graphs
+GRAPH_MODEL = "gpt-3.5-turbo"
+
+logger = logging.getLogger(__name__)
 
 TYPE_PRIORITY = {
     "Condition": 1.0,
@@ -32,12 +41,12 @@ TYPE_PRIORITY = {
 # INITIALIZATION
 # -----------------------------
 def init_client(api_key):
-    """Initialize OpenAI client"""
+    """Return the shared OpenAI client for `api_key`"""
     # print("Initializing OpenAI client...")
     if not api_key:
         # print("Warning: No API key provided!")
         pass
-    return OpenAI(api_key=api_key)
+    return get_openai_client(api_key)
 
 # -----------------------------
 # HELPER FUNCTIONS
@@ -61,52 +70,206 @@ def compute_node_size(importance, mention_count=0, node_type="Unknown", alias_co
 # -----------------------------
 # GRAPH GENERATION
 # -----------------------------
-def generate_graph_nodes(client, graph_prompt, conversation_text):
-    """Generate nodes and edges JSON from conversation using LLM"""
+def _as_graph(data):
+    """
+    Coerce parsed LLM output into a {"nodes": [...], "edges": [...]} dict,
+    dropping nodes/edges that do not match the schema in knowledgeGraphPrompt.txt
+    (see llmSchemas.prune_invalid) rather than re-requesting the graph.
+    """
+    if not isinstance(data, dict):
+        return {"nodes": [], "edges": []}
+    data["nodes"] = prune_invalid(data.get("nodes", []), GRAPH_NODE_SCHEMA)
+    data["edges"] = prune_invalid(data.get("edges", []), GRAPH_EDGE_SCHEMA)
+    return data
+
+
+def _parse_graph_output(output):
+    """Extract the nodes/edges JSON object from raw LLM output (complete or not)."""
+    data, complete = parse_json_object(output)
+    # if not complete: print("Warning: graph JSON was incomplete; kept the valid prefix.")
+    return _as_graph(data)
+
+
+async def _repair_graph(client, prompt, graph_data):
+    """
+    The graph output was cut off: keep the recovered prefix and ask only for
+    the nodes/edges that are missing, instead of regenerating the whole graph.
+    """
+    for _ in range(GRAPH_REPAIR_ATTEMPTS):
+        known_nodes = [n.get("name") for n in graph_data["nodes"]]
+        known_edges = [[e.get("from_node"), e.get("to_node")] for e in graph_data["edges"]]
+        repair_prompt = (
+            f"{prompt}\n\nYour previous answer was cut off. Already recorded nodes: "
+            f"{json.dumps(known_nodes, ensure_ascii=False)}. Already recorded edges: "
+            f"{json.dumps(known_edges, ensure_ascii=False)}. Return ONLY a JSON object "
+            '{"nodes": [...], "edges": [...]} with the remaining nodes and edges, '
+            "in the same format, without repeating recorded ones."
+        )
+        try:
+            output = await chat_text_async(
+                client,
+                GRAPH_MODEL,
+                [{"role": "user", "content": repair_prompt}],
+                validate=is_complete_json,
+                call_type="graph_repair",
+                **GRAPH.request_options(GRAPH_MODEL)
+            )
+        except Exception as e:
+            # print(f"Error calling LLM for graph repair: {e}")
+            break
+        data, complete = parse_json_object(output)
+        merge_graph_delta(graph_data, _as_graph(data))
+        if complete:
+            break
+    return graph_data
+
+
+async def generate_graph_nodes_async(client, graph_prompt, conversation_text):
+    """Generate nodes and edges JSON from conversation using LLM
+
+    The response is streamed into an incremental parser; if it is cut off,
+    the valid prefix is kept and only the missing part is re-requested.
+    """
     # print("Calling LLM to generate graph nodes...")
     prompt = f"Conversation: {conversation_text}\n\n{graph_prompt}"
     # print(f"Prompt sent to LLM:\n{prompt}")
 
+    parser = IncrementalJSONParser()
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
+        output = await chat_text_async(
+            client,
+            GRAPH_MODEL,
+            [{"role": "user", "content": prompt}],
+            validate=is_complete_json,
+            on_delta=parser.feed,
+            call_type="graph",
+            **GRAPH.request_options(GRAPH_MODEL)
         )
-        output = response.choices[0].message.content.strip()
         # print(f"Raw LLM output:\n{output}")
-
-        match = re.search(r'(\{.*\})', output, re.DOTALL)
-        if match:
-            try:
-                graph_json = json.loads(match.group(1))
-                # print(f"Parsed JSON from LLM output:\n{json.dumps(graph_json, indent=4)}")
-                return graph_json
-            except json.JSONDecodeError as e:
-                # print(f"JSONDecodeError: {e}")
-                return {"nodes": [], "edges": []}
-
-        # print("Warning: No JSON found in LLM output.")
+    except Exception as e:
+        # print(f"Error calling LLM: {e}")
         return {"nodes": [], "edges": []}
 
+    if parser.text.strip() != output:
+        # Served from the cache, or a hedged duplicate won: parse the returned output.
+        parser = IncrementalJSONParser()
+        parser.feed(output)
+    data, complete = parser.result()
+    graph_data = _as_graph(data)
+    if not complete:
+        graph_data = await _repair_graph(client, prompt, graph_data)
+    return graph_data
+
+
+async def generate_graph_delta_async(client, delta_prompt, graph_data, new_turns_text):
+    """Ask the LLM only for nodes/edges added or changed by the new turns"""
+    existing = [
+        {"name": n.get("name"), "type": n.get("type"), "aliases": n.get("aliases", [])}
+        for n in graph_data.get("nodes", [])
+    ]
+    prompt = (f"Existing graph nodes: {json.dumps(existing, ensure_ascii=False)}\n\n"
+              f"New conversation turns: {new_turns_text}\n\n{delta_prompt}")
+
+    try:
+        output = await chat_text_async(
+            client,
+            GRAPH_MODEL,
+            [{"role": "user", "content": prompt}],
+            validate=is_complete_json,
+            call_type="graph_delta",
+            **GRAPH.request_options(GRAPH_MODEL)
+        )
+        return _parse_graph_output(output)
+
     except Exception as e:
         # print(f"Error calling LLM: {e}")
         return {"nodes": [], "edges": []}
 
+
+def generate_graph_nodes(client, graph_prompt, conversation_text):
+    """Blocking wrapper around generate_graph_nodes_async (see asyncRunner.run_sync)."""
+    return run_sync(generate_graph_nodes_async(client, graph_prompt, conversation_text))
+
+
+def generate_graph_delta(client, delta_prompt, graph_data, new_turns_text):
+    """Blocking wrapper around generate_graph_delta_async (see asyncRunner.run_sync)."""
+    return run_sync(generate_graph_delta_async(client, delta_prompt, graph_data, new_turns_text))
+
+# -----------------------------
+# INCREMENTAL UPDATES
+# -----------------------------
+def merge_graph_delta(graph_data, delta):
+    """
+    Merge a delta of nodes/edges into `graph_data` in place, folding delta
+    nodes into existing ones with fuzzy matching on names and aliases.
+    Returns the set of node names that were added or changed.
+    """
+    nodes = graph_data.setdefault("nodes", [])
+    edges = graph_data.setdefault("edges", [])
+    renamed = {}
+    changed = set()
+
+    matcher = NameMatcher(SIMILARITY_THRESHOLD)
+    for index, node in enumerate(nodes):
+        for candidate in [node.get("name")] + node.get("aliases", []):
+            matcher.add(candidate, index)
+
+    for new_node in delta.get("nodes", []):
+        name = new_node.get("name")
+        if not name:
+            continue
+        matches = matcher.find(name)
+        if not matches:
+            nodes.append(new_node)
+            for candidate in [name] + new_node.get("aliases", []):
+                matcher.add(candidate, len(nodes) - 1)
+            changed.add(name)
+            continue
+
+        existing = nodes[matches[0]]
+        renamed[name] = existing["name"]
+        before = json.dumps(existing, sort_keys=True)
+        merge_node_into(existing, new_node)
+        if json.dumps(existing, sort_keys=True) != before:
+            changed.add(existing["name"])
+
+    node_names = {n.get("name") for n in nodes}
+    seen = {(e.get("from_node"), e.get("to_node"), e.get("type")) for e in edges}
+    for edge in delta.get("edges", []):
+        edge = dict(edge)
+        edge["from_node"] = renamed.get(edge.get("from_node"), edge.get("from_node"))
+        edge["to_node"] = renamed.get(edge.get("to_node"), edge.get("to_node"))
+        key = (edge["from_node"], edge["to_node"], edge.get("type"))
+        if key in seen or edge["from_node"] not in node_names or edge["to_node"] not in node_names:
+            continue
+        edges.append(edge)
+        seen.add(key)
+        changed.update((edge["from_node"], edge["to_node"]))
+
+    return changed
+
+
 # -----------------------------
 # MAIN FUNCTION
 # -----------------------------
-def build_knowledge_graph(transcript_text, graph_prompt, api_key, save_path=None):
+async def build_knowledge_graph_async(transcript_text, graph_prompt, api_key, save_path=None):
     """
     Build a knowledge graph from a transcript and prompt.
+    `transcript_text` may also be a conversation array or a ParsedTranscript.
     Optionally save to `save_path`.
     """
     # print("Starting knowledge graph building...")
     client = init_client(api_key)
 
     # print("Generating graph nodes...")
-    graph_data = generate_graph_nodes(client, graph_prompt, transcript_text)
+    graph_data = await generate_graph_nodes_async(client, graph_prompt, ParsedTranscript.parse(transcript_text).text)
     # print(f"Graph data returned: {graph_data}")
 
+    # The LLM often emits the same entity twice ("Headache" / "headaches")
+    merged = dedupe_graph(graph_data, SIMILARITY_THRESHOLD)
+    if merged:
+        logger.debug("merged %d duplicate graph nodes: %s", len(merged), merged)
+
     if save_path:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
         with open(save_path, "w") as f:
@@ -115,3 +278,29 @@ def build_knowledge_graph(transcript_text, graph_prompt, api_key, save_path=None
 
     # print("Knowledge graph building completed.")
     return graph_data
+
+
+def build_knowledge_graph(transcript_text, graph_prompt, api_key, save_path=None):
+    """Blocking wrapper around build_knowledge_graph_async (see asyncRunner.run_sync)."""
+    return run_sync(build_knowledge_graph_async(transcript_text, graph_prompt, api_key, save_path))
+
+
+async def update_knowledge_graph_async(graph_data, new_turns_text, delta_prompt, api_key):
+    """
+    Incrementally update an existing graph with only the newly added
+    transcript turns (a string or a conversation array).
+    Returns (graph_data, changed_node_names).
+    """
+    new_turns = ParsedTranscript.parse(new_turns_text)
+    if not new_turns:
+        return graph_data, set()
+
+    client = init_client(api_key)
+    delta = await generate_graph_delta_async(client, delta_prompt, graph_data, new_turns.text)
+    changed = merge_graph_delta(graph_data, delta)
+    return graph_data, changed
+
+
+def update_knowledge_graph(graph_data, new_turns_text, delta_prompt, api_key):
+    """Blocking wrapper around update_knowledge_graph_async."""
+    return run_sync(update_knowledge_graph_async(graph_data, new_turns_text, delta_prompt, api_key))
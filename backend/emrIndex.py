@@ -0,0 +1,447 @@
+# backend/emrIndex.py
+"""
+EMR ingestion for records too large to embed in a prompt whole.
+
+Small records (the example fixture, most intakes) are used as they are.
+Larger ones, given as a dict or as an EMR JSON file (PatientEMR.from_file), are read
+member by member (the file is never loaded as one string), their list
+sections (encounters, labs, medications, ...) are cut into chunks of about
+EMR_CHUNK_TOKENS, and a BM25 index over the chunks picks the ones most
+relevant to the transcript, within EMR_PROMPT_TOKEN_BUDGET. Indexes built
+from files are cached per (path, mtime, size), so a patient's record is
+ingested once and reused by later visits.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, NamedTuple, Union
+
+from contextPacking import compact_json
+from parsedTranscript import ParsedTranscript
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+EMR_PROMPT_TOKEN_BUDGET = int(os.getenv("EMR_PROMPT_TOKEN_BUDGET", "4000"))  # EMR share of one prompt
+EMR_CHUNK_TOKENS = int(os.getenv("EMR_CHUNK_TOKENS", "400"))
+EMR_TOP_K = int(os.getenv("EMR_TOP_K", "8"))  # best chunks considered for a single-call prompt
+EMR_MAP_REDUCE = os.getenv("EMR_MAP_REDUCE", "0").lower() in ("1", "true", "yes")  # summarize what does not fit
+EMR_MAP_MAX_CALLS = int(os.getenv("EMR_MAP_MAX_CALLS", "6"))  # map calls per record
+EMR_INDEX_CACHE_SIZE = int(os.getenv("EMR_INDEX_CACHE_SIZE", "8"))  # file-backed indexes kept in memory
+
+ALWAYS_INCLUDED = ("allergies", "alerts")  # safety-relevant lists, never cut
+DATE_FIELDS = ("date", "diagnosed", "start")
+# Sizes are estimated at ~4 chars/token: running the tokenizer over a
+# 50 MB record would cost more than the trimmed prompt saves.
+CHARS_PER_TOKEN = 4
+READ_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_NON_WS = re.compile(r"[^ \t\n\r]")
+_TERM = re.compile(r"[a-z0-9]{2,}")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+# -----------------------------
+# STREAMING INPUT
+# -----------------------------
+class _JSONReader:
+    """Decodes one JSON value at a time from a file, reading it in blocks."""
+
+    def __init__(self, f, read_size=READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self):
+        data = self.f.read(self.read_size)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ("" at end of input)."""
+        while True:
+            match = _NON_WS.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if not self._fill():
+                return ""
+
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Malformed EMR JSON: expected one of {expected!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buf) and self._fill():
+                continue  # a number cut at the block boundary may go on
+            self.pos = end
+            return value
+
+
+def iter_emr_file(path):
+    """
+    Yield the members of the EMR object in `path` as (key, value, is_item):
+    list members one element at a time (is_item=True), anything else
+    (and empty lists) whole.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _JSONReader(f)
+        reader.take("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.take(":")
+            if reader.peek() == "[":
+                reader.take("[")
+                if reader.peek() == "]":
+                    reader.take("]")
+                    yield key, [], False
+                else:
+                    while True:
+                        yield key, reader.value(), True
+                        if reader.take(",]") == "]":
+                            break
+            else:
+                yield key, reader.value(), False
+            if reader.take(",}") == "}":
+                return
+
+
+def iter_emr_dict(emr_data):
+    """iter_emr_file for an EMR already in memory."""
+    for key, value in emr_data.items():
+        if isinstance(value, list) and value:
+            for item in value:
+                yield key, item, True
+        else:
+            yield key, value, False
+
+# -----------------------------
+# BM25
+# -----------------------------
+def terms(text):
+    return _TERM.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of texts. Postings are kept as (doc ids, term
+    frequencies) int arrays per term, so an index over tens of thousands of
+    chunks stays a few bytes per posting.
+    """
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.lengths = array("I")
+        self.postings = {}
+        for doc, text in enumerate(texts):
+            counts = Counter(terms(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                entry = self.postings.get(term)
+                if entry is None:
+                    entry = self.postings[term] = (array("I"), array("I"))
+                entry[0].append(doc)
+                entry[1].append(tf)
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def scores(self, query):
+        """doc -> score, for the docs containing any term of `query`."""
+        n = len(self.lengths)
+        scores = {}
+        for term in set(terms(query)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs, tfs = entry
+            df = len(docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(docs, tfs):
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def search(self, query, k=None):
+        """Doc ids matching `query`, best first."""
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda doc: (-scores[doc], doc))
+        return ranked[:k] if k else ranked
+
+# -----------------------------
+# CHUNKED INDEX
+# -----------------------------
+class EMRChunk(NamedTuple):
+    index: int      # position in the record
+    section: str    # member the records belong to ("encounters", "labs", ...)
+    text: str       # the records as a compact JSON array
+    tokens: int     # estimated
+    latest: str     # most recent date among the records ("" if none)
+
+    def records(self):
+        return json.loads(self.text)
+
+
+def chunks_json(chunks):
+    """Compact {section: [records]} JSON for `chunks`, in record order."""
+    sections = {}
+    for chunk in sorted(chunks, key=lambda c: c.index):
+        sections.setdefault(chunk.section, []).extend(chunk.records())
+    return compact_json(sections)
+
+
+def _record_date(record):
+    if isinstance(record, dict):
+        for field in DATE_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str):
+                return value
+    return ""
+
+
+class EMRSelection(NamedTuple):
+    data: Dict[str, Any]          # EMR for prompts: the whole record, or fixed members + chosen chunks
+    complete: bool                # `data` is the whole record
+    fixed: Dict[str, Any]         # members every prompt gets
+    relevant: List[EMRChunk]      # chunks matching the transcript, best first
+    overflow: bool                # relevant chunks did not all fit in one prompt
+
+
+class EMRIndex:
+    """
+    Chunked, BM25-indexed view of one EMR.
+
+    Scalars, objects and the ALWAYS_INCLUDED lists are kept whole in
+    `fixed`; every other list is cut into chunks of consecutive records of
+    one section, about `chunk_tokens` each, stored as compact JSON text and
+    decoded only when selected.
+    """
+
+    def __init__(self, members, chunk_tokens=EMR_CHUNK_TOKENS):
+        self.fixed = {}
+        self.keys = []      # member names in record order
+        self.chunks = []
+        self.tokens = 0     # estimated size of the whole record as compact JSON
+        self._limit = chunk_tokens * CHARS_PER_TOKEN
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_latest = ""
+        self._section = None
+
+        for key, value, is_item in members:
+            if key != self._section:
+                self._flush()
+                self._section = key
+                if key not in self.keys:
+                    self.keys.append(key)
+            if not is_item:
+                self.fixed[key] = value
+            elif key in ALWAYS_INCLUDED:
+                self.fixed.setdefault(key, []).append(value)
+            else:
+                self._add_record(value)
+        self._flush()
+        del self._pending
+
+        self.fixed_tokens = estimate_tokens(compact_json(self.fixed))
+        self.tokens = self.fixed_tokens + sum(chunk.tokens for chunk in self.chunks)
+        self.bm25 = BM25Index(chunk.text for chunk in self.chunks)
+
+    @classmethod
+    def from_data(cls, emr_data, chunk_tokens=EMR_CHUNK_TOKENS):
+        return cls(iter_emr_dict(emr_data), chunk_tokens)
+
+    @classmethod
+    def from_file(cls, path, chunk_tokens=EMR_CHUNK_TOKENS):
+        return cls(iter_emr_file(path), chunk_tokens)
+
+    def _add_record(self, record):
+        text = compact_json(record)
+        if self._pending and self._pending_chars + len(text) > self._limit:
+            self._flush()
+        self._pending.append(text)
+        self._pending_chars += len(text) + 1
+        self._pending_latest = max(self._pending_latest, _record_date(record))
+
+    def _flush(self):
+        if not self._pending:
+            return
+        text = "[" + ",".join(self._pending) + "]"
+        self.chunks.append(EMRChunk(len(self.chunks), self._section, text, estimate_tokens(text),
+                                    self._pending_latest))
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_latest = ""
+
+    def to_dict(self, chunks=None):
+        """The record rebuilt from `fixed` and `chunks` (default: all), in its original member order."""
+        sections = {}
+        for chunk in sorted(self.chunks if chunks is None else chunks, key=lambda c: c.index):
+            sections.setdefault(chunk.section, []).extend(chunk.records())
+        return {key: self.fixed[key] if key in self.fixed else sections[key]
+                for key in self.keys if key in self.fixed or key in sections}
+
+    def select(self, query, budget=EMR_PROMPT_TOKEN_BUDGET, top_k=EMR_TOP_K):
+        """
+        The part of the record to embed for `query` (the transcript): all of
+        it if it fits in `budget`, else `fixed` plus the best of the top_k
+        chunks that fit. With no chunk matching the query, the most recent
+        chunks are used instead.
+        """
+        if self.tokens <= budget:
+            return EMRSelection(self.to_dict(), True, self.fixed, [], False)
+
+        relevant = [self.chunks[doc] for doc in self.bm25.search(query)]
+        candidates = relevant[:top_k] or sorted(self.chunks, key=lambda c: (c.latest, c.index), reverse=True)[:top_k]
+        remaining = budget - self.fixed_tokens
+        chosen = []
+        for chunk in candidates:
+            if chunk.tokens <= remaining:
+                chosen.append(chunk)
+                remaining -= chunk.tokens
+        overflow = sum(chunk.tokens for chunk in relevant) > budget - self.fixed_tokens
+        return EMRSelection(self.to_dict(chosen), False, self.fixed, relevant, overflow)
+
+
+def map_groups(chunks, budget=EMR_PROMPT_TOKEN_BUDGET, max_groups=EMR_MAP_MAX_CALLS):
+    """Pack ranked `chunks` into at most `max_groups` groups of about `budget` tokens, best first."""
+    groups, current, size = [], [], 0
+    for chunk in chunks:
+        if current and size + chunk.tokens > budget:
+            groups.append(current)
+            if len(groups) == max_groups:
+                return groups
+            current, size = [], 0
+        current.append(chunk)
+        size += chunk.tokens
+    if current:
+        groups.append(current)
+    return groups
+
+# -----------------------------
+# INDEX CACHE
+# -----------------------------
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def load_file_index(path):
+    """EMRIndex for the file at `path`, reused until the file changes."""
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+    index = EMRIndex.from_file(path)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > EMR_INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+# -----------------------------
+# PER-REQUEST EMR
+# -----------------------------
+class PatientEMR:
+    """
+    One request's EMR, shared by every stage like ParsedTranscript.
+
+    A dict within EMR_PROMPT_TOKEN_BUDGET is used as is, with no indexing.
+    A larger dict, or an EMR JSON file (from_file), is indexed (EMRIndex)
+    the first time a stage asks for it; the selection for the request's
+    transcript is computed once, off the event loop, and reused.
+    """
+
+    def __init__(self, data=None, path=None):
+        self.data = data
+        self.path = path
+        self._small = None      # dict within EMR_PROMPT_TOKEN_BUDGET; decided on first select
+        self._index = None
+        self._lock = threading.Lock()
+        self._selection = None  # (transcript, EMRSelection)
+        self._task = None       # (transcript, asyncio task), for select_async
+
+    @classmethod
+    def from_file(cls, path):
+        """A PatientEMR streamed from the EMR JSON file at `path` (trusted callers only, e.g. the batch CLI)."""
+        return cls(path=path)
+
+    @classmethod
+    def parse(cls, value):
+        """A PatientEMR from a dict or one already built. Strings are never opened as paths."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(data=value)
+        raise TypeError(f"EMR must be a JSON object. Got: {type(value).__name__}")
+
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = load_file_index(self.path) if self.path else EMRIndex.from_data(self.data)
+            return self._index
+
+    def _fits(self):
+        if self._small is None:
+            self._small = self.data is not None and estimate_tokens(compact_json(self.data)) <= EMR_PROMPT_TOKEN_BUDGET
+        return self._small
+
+    def select(self, transcript):
+        """EMRSelection for `transcript` (a ParsedTranscript, string or conversation array)."""
+        if self._fits():
+            return EMRSelection(self.data, True, self.data, [], False)
+        transcript = ParsedTranscript.parse(transcript)
+        cached = self._selection
+        if cached is not None and cached[0] is transcript:
+            return cached[1]
+        selection = self.index.select(transcript.text)
+        self._selection = (transcript, selection)
+        return selection
+
+    async def select_async(self, transcript):
+        """select() on a worker thread; stages asking concurrently share one computation."""
+        if self._small:  # already known to fit: no thread hop
+            return self.select(transcript)
+        transcript = ParsedTranscript.parse(transcript)
+        if self._task is None or self._task[0] is not transcript:
+            self._task = (transcript, asyncio.ensure_future(asyncio.to_thread(self.select, transcript)))
+        return await asyncio.shield(self._task[1])
+
+    async def relevant_async(self, transcript):
+        """The EMR dict the pipeline stages work from for `transcript`."""
+        return (await self.select_async(transcript)).data
+
+
+# What the pipeline entry points accept as an EMR
+EMRInput = Union[Dict[str, Any], PatientEMR]
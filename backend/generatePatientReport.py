@@ -1,95 +1,175 @@
 # backend/generatePatientReport.py
 
-import os
+import asyncio
 import json
+import logging
 from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
-
-# -----------------------------
-# PATHS
-# -----------------------------
-LLM_PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "LLM_Prompts")
-SUMMARY_PROMPT_PATH = os.path.join(LLM_PROMPTS_DIR, "summaryTabPrompt.txt")
-EMR_PROMPT_PATH = os.path.join(LLM_PROMPTS_DIR, "emrTabPrompt.txt")
+from asyncRunner import run_sync
+from contextPacking import compact_json
+from emrIndex import EMR_MAP_REDUCE, EMRInput, PatientEMR, chunks_json, map_groups
+from pipelineScheduler import Stage, run_stages_async
+from llmClient import chat_text_async, get_openai_client
+from llmDeadline import DeadlineExceeded
+from llmJson import parse_json_object
+from llmSchemas import EMR_TAB, SCHEMA_RETRY_ATTEMPTS, SUMMARY_TAB, OutputSchema
+from parsedTranscript import ParsedTranscript, TranscriptInput
+from pipelineMetrics import observe_fallback
+from promptRegistry import registry
 
 # -----------------------------
 # LLM
 # -----------------------------
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise RuntimeError("OPENAI_API_KEY not set")
-client = OpenAI(api_key=api_key)
 MODEL = "gpt-4o-mini"  # change here if needed
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # Utils
 # -----------------------------
-def only_patient_lines(transcript: str) -> List[str]:
-    if not transcript:
-        return []
-    out = []
-    for raw in transcript.splitlines():
-        s = raw.strip()
-        if s.lower().startswith("patient:"):
-            out.append(s.split(":", 1)[1].strip())
-    return out
+def only_patient_lines(transcript: TranscriptInput) -> List[str]:
+    return ParsedTranscript.parse(transcript).patient_lines
 
 def _extract_json(text: str) -> Optional[Dict[str, Any]]:
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-    start, end = text.find("{"), text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        try:
-            return json.loads(text[start:end+1])
-        except Exception:
-            return None
-    return None
-
-def chat_json(messages: List[Dict[str, str]]) -> Dict[str, Any]:
-    resp = client.chat.completions.create(model=MODEL, messages=messages)
-    content = (resp.choices[0].message.content or "").strip()
+    # Single pass; tolerates code fences / prose around the object.
+    data, complete = parse_json_object(text)
+    return data if complete else None
+
+async def _request_json(messages: List[Dict[str, str]], schema: OutputSchema) -> Dict[str, Any]:
+    def valid(text: str) -> bool:
+        data = _extract_json(text)
+        return data is not None and schema.is_valid(schema.fill_constants(data))
+
+    content = await chat_text_async(get_openai_client(), MODEL, messages, validate=valid, call_type=schema.name,
+                                    **schema.request_options(MODEL))
     data = _extract_json(content)
     if data is None:
         raise ValueError(f"Model did not return valid JSON. Got:\n{content[:600]}")
+    return schema.fill_constants(data)
+
+def _bad_fields(errors) -> List[str]:
+    return sorted({path[0] for path, _ in errors if path})
+
+async def chat_json_async(messages: List[Dict[str, str]], schema: OutputSchema) -> Dict[str, Any]:
+    """
+    Request a JSON object constrained to `schema` and validate it. If some
+    top-level fields are still missing or malformed, re-request only those
+    fields (with a sub-schema) and merge them in, rather than repeating the
+    whole call. Fields that stay invalid are logged and left as returned.
+    If the request deadline (llmDeadline) passes first, an empty but
+    schema-valid object is returned so the rest of the report still ships.
+    """
+    try:
+        data = await _request_json(messages, schema)
+    except DeadlineExceeded:
+        logger.warning("%s skipped: deadline exceeded", schema.name)
+        observe_fallback(schema.name, "empty")
+        return schema.empty()
+    errors = schema.validate(data)
+    for _ in range(SCHEMA_RETRY_ATTEMPTS):
+        fields = _bad_fields(errors)
+        if not fields:
+            break
+        problems = "; ".join(f"{'.'.join(map(str, path))}: {msg}" for path, msg in errors[:20])
+        fix = schema.subset(fields)
+        fix_messages = messages + [
+            {"role": "assistant", "content": json.dumps(data, ensure_ascii=False)},
+            {"role": "user", "content": f"These fields do not match the schema ({problems}). "
+                                        f"Return ONLY a JSON object with corrected values for: "
+                                        f"{', '.join(fields)}."},
+        ]
+        try:
+            patch = await _request_json(fix_messages, fix)
+        except DeadlineExceeded:
+            break
+        except ValueError:
+            continue
+        still_bad = set(_bad_fields(fix.validate(patch)))
+        data.update({k: patch[k] for k in fields if k in patch and k not in still_bad})
+        errors = schema.validate(data)
+    if errors:
+        logger.warning("%s output still invalid after field retries: %s", schema.name, errors[:5])
     return data
 
+def chat_json(messages: List[Dict[str, str]], schema: OutputSchema) -> Dict[str, Any]:
+    """Blocking wrapper around chat_json_async (see asyncRunner.run_sync)."""
+    return run_sync(chat_json_async(messages, schema))
+
 # -----------------------------
 # Builders
 # -----------------------------
-def generate_summary_tab(transcript_text: str) -> Dict[str, Any]:
-    with open(SUMMARY_PROMPT_PATH, "r", encoding="utf-8") as f:
-        prompt = f.read()
-    patient_lines = only_patient_lines(transcript_text)
-    user = prompt.replace("{PATIENT_LINES_JSON}", json.dumps(patient_lines, ensure_ascii=False, indent=2))
-    messages = [{"role": "system", "content": user.split("USER:")[0].strip()},
-                {"role": "user", "content": user.split("USER:")[1].strip()}]
-    data = chat_json(messages)
-    data.setdefault("type", "summary_tab")
-    return data
+async def generate_summary_tab_async(transcript: TranscriptInput) -> Dict[str, Any]:
+    transcript = ParsedTranscript.parse(transcript)
+    messages = registry.get("summary_tab").render_messages(PATIENT_LINES_JSON=transcript.patient_lines_json)
+    return await chat_json_async(messages, SUMMARY_TAB)
 
-def generate_emr_tab(emr_data: Dict[str, Any], transcript_text: str) -> Dict[str, Any]:
-    with open(EMR_PROMPT_PATH, "r", encoding="utf-8") as f:
-        prompt = f.read()
-    patient_lines = only_patient_lines(transcript_text)
-    user = (prompt
-            .replace("{EMR_JSON}", json.dumps(emr_data, ensure_ascii=False, indent=2))
-            .replace("{PATIENT_LINES_JSON}", json.dumps(patient_lines, ensure_ascii=False, indent=2)))
-    messages = [{"role": "system", "content": user.split("USER:")[0].strip()},
-                {"role": "user", "content": user.split("USER:")[1].strip()}]
-    data = chat_json(messages)
-    data.setdefault("type", "emr_tab")
-    return data
+async def _map_emr_chunks(groups: List[list], transcript: ParsedTranscript) -> Optional[List[str]]:
+    """Map step: condense each group of EMR chunks to notes on today's complaint (None past the deadline)."""
+    template = registry.get("emr_map")
+
+    async def condense(group):
+        messages = template.render_messages(EMR_CHUNK_JSON=chunks_json(group),
+                                            PATIENT_LINES_JSON=transcript.patient_lines_json)
+        return await chat_text_async(get_openai_client(), MODEL, messages, call_type="emr_map")
+
+    notes = await asyncio.gather(*(condense(group) for group in groups), return_exceptions=True)
+    if any(isinstance(note, DeadlineExceeded) for note in notes):
+        logger.warning("emr_map skipped: deadline exceeded")
+        observe_fallback("emr_map", "retrieval")
+        return None
+    for note in notes:
+        if isinstance(note, BaseException):
+            raise note
+    return [note for note in notes if note]
+
+async def _emr_prompt_json(emr: PatientEMR, transcript: ParsedTranscript) -> str:
+    """
+    EMR_JSON for the EMR tab. A record within EMR_PROMPT_TOKEN_BUDGET is
+    embedded whole, as before; a larger one is cut to the chunks most
+    relevant to the transcript (see emrIndex). With EMR_MAP_REDUCE, when the
+    relevant chunks do not fit in one call they are condensed group by
+    group (map) and the tab is generated from those notes (reduce).
+    """
+    selection = await emr.select_async(transcript)
+    if selection.complete:
+        return json.dumps(selection.data, ensure_ascii=False, indent=2)
+    if EMR_MAP_REDUCE and selection.overflow:
+        notes = await _map_emr_chunks(map_groups(selection.relevant), transcript)
+        if notes is not None:
+            return compact_json({**selection.fixed, "record_summaries": notes})
+    return compact_json(selection.data)
+
+async def generate_emr_tab_async(emr_data: EMRInput,
+                                 transcript: TranscriptInput) -> Dict[str, Any]:
+    transcript = ParsedTranscript.parse(transcript)
+    messages = registry.get("emr_tab").render_messages(
+        EMR_JSON=await _emr_prompt_json(PatientEMR.parse(emr_data), transcript),
+        PATIENT_LINES_JSON=transcript.patient_lines_json)
+    return await chat_json_async(messages, EMR_TAB)
+
+def generate_summary_tab(transcript: TranscriptInput) -> Dict[str, Any]:
+    return run_sync(generate_summary_tab_async(transcript))
+
+def generate_emr_tab(emr_data: EMRInput, transcript: TranscriptInput) -> Dict[str, Any]:
+    return run_sync(generate_emr_tab_async(emr_data, transcript))
+
+def report_tab_stages(emr_data: EMRInput, transcript: TranscriptInput) -> List[Stage]:
+    """Summary and EMR tabs depend only on the transcript/EMR, not the graph.
+    Both read the patient lines from one ParsedTranscript.
+    Stage funcs return coroutines (see pipelineScheduler.run_stages_async)."""
+    transcript = ParsedTranscript.parse(transcript)
+    emr_data = PatientEMR.parse(emr_data)
+    return [
+        Stage("summary_tab", lambda: generate_summary_tab_async(transcript)),
+        Stage("emr_tab", lambda: generate_emr_tab_async(emr_data, transcript)),
+    ]
 
 # -----------------------------
 # Main
 # -----------------------------
-def generate_patient_report(annotated_graph: Dict[str, Any],
-                            emr_data: Dict[str, Any],
-                            transcript_text: str) -> Dict[str, Any]:
+async def generate_patient_report_async(annotated_graph: Dict[str, Any],
+                                        emr_data: EMRInput,
+                                        transcript: TranscriptInput) -> Dict[str, Any]:
     """
     Returns:
     {
@@ -98,10 +178,15 @@ def generate_patient_report(annotated_graph: Dict[str, Any],
       "emr_tab": { ... }
     }
     """
-    summary_tab = generate_summary_tab(transcript_text)
-    emr_tab = generate_emr_tab(emr_data, transcript_text)
+    results, _ = await run_stages_async(report_tab_stages(emr_data, transcript))
     return {
         "annotated_graph": annotated_graph,
-        "summary_tab": summary_tab,
-        "emr_tab": emr_tab,
+        "summary_tab": results["summary_tab"],
+        "emr_tab": results["emr_tab"],
     }
+
+def generate_patient_report(annotated_graph: Dict[str, Any],
+                            emr_data: EMRInput,
+                            transcript: TranscriptInput) -> Dict[str, Any]:
+    """Blocking wrapper around generate_patient_report_async (see asyncRunner.run_sync)."""
+    return run_sync(generate_patient_report_async(annotated_graph, emr_data, transcript))
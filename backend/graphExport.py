@@ -0,0 +1,261 @@
+# backend/graphExport.py
+"""
+Compact frontend export of an annotated graph.
+
+annotate_graph_manual copies whole EMR condition/medication records and the
+full alerts list onto every node, so the verbose export grows with
+nodes x EMR size. The compact format stores each shared record once and
+refers to it by index, leaves transcript mentions, notes and LLM summaries
+to on-demand node details (GET /graph/<graph_id>/node, from a SQLite store
+shared by every worker process and kept across restarts), and carries
+server-side layout positions so the frontend can render without running
+its own layout:
+
+{
+  "format": "compact-v1",
+  "graph_id": "<sha256 prefix>",
+  "base_size": <default node size>,
+  "records": {"conditions": [...], "medications": [...], "alerts": [...],
+              "alert_lists": [[i, ...], ...]},
+  "colors": {<node type>: <color>},
+  "nodes": [{"id", "type", "size" (if not the default), "x", "y",
+             "conditions": [i, ...], "medications": [i, ...],
+             "alerts": <index into alert_lists>, "mentions": <count>}],
+  "edges": [[from_index, to_index, type], ...]
+}
+
+Every node carries the same EMR alerts list, so nodes refer to that list
+as a whole (alert_lists) rather than to each alert.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+COMPACT_FORMAT = "compact-v1"
+LAYOUT_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_ITERATIONS", "150"))
+LAYOUT_MAX_NODES = int(os.getenv("GRAPH_LAYOUT_MAX_NODES", "500"))  # O(n^2) per iteration; larger graphs lay out client-side
+LAYOUT_SIZE = 1000.0  # positions are scaled into [0, LAYOUT_SIZE]
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GRAPH_EXPORT_DB = os.getenv("GRAPH_EXPORT_DB", os.path.join(BASE_DIR, ".cache", "graph_exports.sqlite"))
+GRAPH_EXPORT_TTL = float(os.getenv("GRAPH_EXPORT_TTL", str(30 * 24 * 3600)))  # seconds node details are kept
+
+CONTEXT_RECORDS = ("conditions", "medications", "alerts")
+_CONTEXT_KEYS = {"conditions": "past_conditions", "medications": "medications", "alerts": "alerts"}
+
+# -----------------------------
+# LAYOUT
+# -----------------------------
+def force_layout(node_count, edge_pairs, iterations=None, seed=0):
+    """
+    Fruchterman-Reingold layout, vectorized with NumPy. `edge_pairs` are
+    (from_index, to_index). Returns a list of (x, y) in [0, LAYOUT_SIZE],
+    or None if NumPy is unavailable or the graph is too large.
+    """
+    if node_count == 0:
+        return []
+    if node_count > LAYOUT_MAX_NODES:
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-1.0, 1.0, size=(node_count, 2))
+    edges = np.asarray(edge_pairs, dtype=np.intp).reshape(-1, 2)
+    src, dst = edges[:, 0], edges[:, 1]
+    k = np.sqrt(4.0 / node_count)  # ideal edge length in a 2x2 box
+    iterations = LAYOUT_ITERATIONS if iterations is None else iterations
+    temperature = 0.2
+
+    x, y = pos[:, 0], pos[:, 1]  # views into pos
+    for step in range(iterations):
+        # Repulsion between every pair: k^2 / d along the unit vector,
+        # i.e. k^2 * delta / d^2 (x and y kept separate to avoid an n x n x 2 array).
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        weight = dx * dx
+        weight += dy * dy
+        np.maximum(weight, 1e-6, out=weight)
+        np.divide(k * k, weight, out=weight)
+        disp = np.stack(((dx * weight).sum(axis=1), (dy * weight).sum(axis=1)), axis=1)
+        if len(edges):
+            # Attraction along edges: d^2 / k.
+            edge_delta = pos[src] - pos[dst]
+            edge_dist = np.sqrt((edge_delta ** 2).sum(axis=-1))
+            pull = edge_delta * (edge_dist / k)[:, None]
+            for axis in (0, 1):  # bincount is a much faster scatter-add than np.add.at
+                disp[:, axis] += (np.bincount(dst, pull[:, axis], node_count)
+                                  - np.bincount(src, pull[:, axis], node_count))
+        # Weak gravity keeps disconnected components on screen.
+        disp -= pos * (0.05 * node_count * k)
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis=-1)), 1e-9)
+        step_size = temperature * (1.0 - step / iterations)
+        pos += disp * (np.minimum(length, step_size) / length)[:, None]
+
+    span = pos.max(axis=0) - pos.min(axis=0)
+    span[span == 0] = 1.0
+    pos = (pos - pos.min(axis=0)) / span * LAYOUT_SIZE
+    return [(round(float(x)), round(float(y))) for x, y in pos]
+
+# -----------------------------
+# COMPACT EXPORT
+# -----------------------------
+def graph_id(graph_data):
+    raw = json.dumps(graph_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def compact_graph(graph_data, node_colors=None, base_size=50, layout=True):
+    """Build the compact export (see module docstring) for an annotated graph."""
+    node_colors = node_colors or {}
+    records = {kind: [] for kind in CONTEXT_RECORDS + ("alert_lists",)}
+    record_ids = {kind: {} for kind in CONTEXT_RECORDS + ("alert_lists",)}
+
+    def record_index(kind, record):
+        key = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        index = record_ids[kind].get(key)
+        if index is None:
+            index = record_ids[kind][key] = len(records[kind])
+            records[kind].append(record)
+        return index
+
+    nodes = []
+    colors = {}
+    index_of = {}
+    for node in graph_data.get("nodes", []):
+        name = node.get("name")
+        if name is None or name in index_of:
+            continue
+        context = node.get("context", {})
+        entry = {"id": name, "type": node.get("type")}
+        if node.get("size", base_size) != base_size:
+            entry["size"] = node["size"]
+        colors.setdefault(entry["type"], node_colors.get(entry["type"], "#cccccc"))
+        for kind in CONTEXT_RECORDS:
+            refs = [record_index(kind, record) for record in context.get(_CONTEXT_KEYS[kind], [])]
+            if refs:
+                entry[kind] = record_index("alert_lists", refs) if kind == "alerts" else refs
+        if context.get("mentions"):
+            entry["mentions"] = len(context["mentions"])
+        index_of[name] = len(nodes)
+        nodes.append(entry)
+
+    edges = [
+        [index_of[e.get("from_node")], index_of[e.get("to_node")], e.get("type")]
+        for e in graph_data.get("edges", [])
+        if e.get("from_node") in index_of and e.get("to_node") in index_of
+    ]
+
+    positions = force_layout(len(nodes), [(a, b) for a, b, _ in edges]) if layout else None
+    if positions:
+        for entry, (x, y) in zip(nodes, positions):
+            entry["x"], entry["y"] = x, y
+
+    return {
+        "format": COMPACT_FORMAT,
+        "graph_id": graph_id(graph_data),
+        "records": records,
+        "base_size": base_size,
+        "colors": colors,
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+def dumps_compact(value):
+    """Minimal-whitespace JSON for exported graphs."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+# -----------------------------
+# NODE DETAILS
+# -----------------------------
+def node_details(node):
+    """Full context and LLM summary of one node, as served by GET /graph/<graph_id>/node."""
+    return {
+        "id": node.get("name"),
+        "type": node.get("type"),
+        "aliases": node.get("aliases", []),
+        "notes": node.get("notes"),
+        "context": node.get("context", {}),
+        "llm_summary": node.get("llm_summary", ""),
+    }
+
+
+class GraphDetailStore:
+    """
+    SQLite store of exported graphs' node details by (graph_id, node name),
+    shared by every worker process on the host, so a detail request can
+    land on any worker and still finds graphs exported before a restart.
+    Entries expire `ttl` seconds after the graph was last exported.
+    """
+
+    def __init__(self, path=GRAPH_EXPORT_DB, ttl=GRAPH_EXPORT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS graph_nodes (
+                graph_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                details TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (graph_id, name)
+            )
+            """
+        )
+
+    def put(self, gid, graph_data):
+        now = time.time()
+        rows = [(gid, node["name"], json.dumps(node_details(node), ensure_ascii=False, default=str), now + self.ttl)
+                for node in graph_data.get("nodes", []) if node.get("name") is not None]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM graph_nodes WHERE expires_at < ?", (now,))
+                self._conn.executemany("INSERT OR REPLACE INTO graph_nodes VALUES (?, ?, ?, ?)", rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def node_details(self, gid, name):
+        """Details of one node (see node_details), or None if unknown or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT details FROM graph_nodes WHERE graph_id = ? AND name = ? AND expires_at >= ?",
+                (gid, name, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_export_store():
+    """Shared GraphDetailStore, created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GraphDetailStore()
+    return _store
+
+
+def export_graph(graph_data, node_colors=None, base_size=50):
+    """Compact export that also stores the graph's node details for on-demand lookups."""
+    compact = compact_graph(graph_data, node_colors, base_size)
+    get_export_store().put(compact["graph_id"], graph_data)
+    return compact
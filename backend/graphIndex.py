@@ -0,0 +1,132 @@
+# backend/graphIndex.py
+from array import array
+
+from nodeDedup import normalize_name
+
+
+class IndexedGraph:
+    """
+    Indexed view over a {"nodes": [...], "edges": [...]} graph.
+
+    Node names are interned to integer ids; edge endpoints are stored as
+    two int arrays with per-node in/out adjacency lists of edge ids, so
+    neighbour queries cost O(degree) instead of a scan over every edge.
+    Lookup by name, or by normalized name/alias (nodeDedup.normalize_name),
+    is a dict hit.
+
+    The node and edge dicts themselves are shared, not copied: from_json is
+    one pass over the lists, to_json returns the same JSON shape, and
+    changes made through node() are visible in both.
+    Edges are indexed under whichever endpoints are nodes; an endpoint that
+    is not a node never shows up as a neighbour.
+    """
+
+    __slots__ = ("nodes", "edges", "names", "_ids", "_keys", "_src", "_dst", "_out", "_in")
+
+    def __init__(self):
+        self.nodes = []          # node id -> node dict
+        self.edges = []          # edge id -> edge dict
+        self.names = []          # node id -> name
+        self._ids = {}           # name -> node id
+        self._keys = {}          # normalized name / alias -> node id
+        self._src = array("l")   # edge id -> source node id (-1 if not a node)
+        self._dst = array("l")   # edge id -> target node id (-1 if not a node)
+        self._out = []           # node id -> outgoing edge ids
+        self._in = []            # node id -> incoming edge ids
+
+    @classmethod
+    def from_json(cls, graph_data):
+        graph = cls()
+        for node in graph_data.get("nodes", []):
+            graph.add_node(node)
+        for edge in graph_data.get("edges", []):
+            graph.add_edge(edge)
+        return graph
+
+    def to_json(self):
+        return {"nodes": self.nodes, "edges": self.edges}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    # -----------------------------
+    # MUTATION
+    # -----------------------------
+    def add_node(self, node):
+        """Add a node dict; returns its id (the existing id for a repeated name)."""
+        name = node.get("name")
+        node_id = self._ids.get(name)
+        if node_id is not None:
+            return node_id
+        node_id = len(self.nodes)
+        self.nodes.append(node)
+        self.names.append(name)
+        self._ids[name] = node_id
+        self._out.append([])
+        self._in.append([])
+        for candidate in [name] + list(node.get("aliases", [])):
+            key = normalize_name(candidate)
+            if key:
+                self._keys.setdefault(key, node_id)
+        return node_id
+
+    def add_edge(self, edge):
+        edge_id = len(self.edges)
+        src = self._ids.get(edge.get("from_node"), -1)
+        dst = self._ids.get(edge.get("to_node"), -1)
+        self.edges.append(edge)
+        self._src.append(src)
+        self._dst.append(dst)
+        if src != -1:
+            self._out[src].append(edge_id)
+        if dst != -1:
+            self._in[dst].append(edge_id)
+        return edge_id
+
+    # -----------------------------
+    # LOOKUP
+    # -----------------------------
+    def id_of(self, name):
+        """Node id by exact name, else by normalized name or alias; None if unknown."""
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = self._keys.get(normalize_name(name))
+        return node_id
+
+    def node(self, name):
+        node_id = self.id_of(name)
+        return None if node_id is None else self.nodes[node_id]
+
+    def out_edges(self, name):
+        node_id = self._ids.get(name)
+        return [] if node_id is None else [self.edges[e] for e in self._out[node_id]]
+
+    def in_edges(self, name):
+        node_id = self._ids.get(name)
+        return [] if node_id is None else [self.edges[e] for e in self._in[node_id]]
+
+    def neighbors(self, name):
+        """Names connected to `name` by an edge in either direction: targets first, then sources."""
+        node_id = self._ids.get(name)
+        if node_id is None:
+            return []
+        seen = {node_id}
+        result = []
+        for other in [self._dst[e] for e in self._out[node_id]] + [self._src[e] for e in self._in[node_id]]:
+            if other != -1 and other not in seen:
+                seen.add(other)
+                result.append(self.names[other])
+        return result
+
+    def edges_touching(self, names):
+        """Edges with at least one endpoint in `names`, in their original order."""
+        edge_ids = set()
+        for name in names:
+            node_id = self._ids.get(name)
+            if node_id is not None:
+                edge_ids.update(self._out[node_id])
+                edge_ids.update(self._in[node_id])
+        return [self.edges[e] for e in sorted(edge_ids)]
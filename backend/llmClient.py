@@ -0,0 +1,341 @@
+# backend/llmClient.py
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from asyncRunner import run_sync
+from contextPacking import count_tokens
+from llmCache import cache_key, llm_cache
+from llmDeadline import DeadlineExceeded, check_deadline, latencies, time_remaining
+from pipelineMetrics import observe_cache, observe_fallback, observe_hedge, observe_llm_call, observe_usage
+from rateLimiter import RequestLimiter
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))  # seconds per attempt
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "0"))  # requests/minute; 0 = off
+LLM_RATE_LIMIT_TPM = float(os.getenv("LLM_RATE_LIMIT_TPM", "0"))  # estimated tokens/minute; 0 = off
+# Directory for the limiter state shared by all worker processes on the host; "" = per process.
+LLM_RATE_LIMIT_STATE_DIR = os.getenv("LLM_RATE_LIMIT_STATE_DIR",
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+LLM_RATE_LIMIT_BATCH_RESERVE = float(os.getenv("LLM_RATE_LIMIT_BATCH_RESERVE", "0.2"))  # kept for interactive calls
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "256"))  # when max_tokens is unset
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1") != "0"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.9"))  # hedge after this observed latency
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "gpt-4o-mini")  # used when the deadline is near; "" = off
+
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {(api_key, base_url): AsyncOpenAI}
+_rate_limiter = None
+
+# -----------------------------
+# CLIENT PROVIDER
+# -----------------------------
+def get_openai_client(api_key=None):
+    """
+    Shared OpenAI client, created on first use rather than at import.
+    One client per API key per process, so every module reuses the same
+    HTTP connection pool. `api_key` defaults to OPENAI_API_KEY.
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY not set")
+    # The SDK takes ~0.5s to import, so it is loaded on first use, not at startup.
+    from openai import OpenAI
+    with _clients_lock:
+        if api_key not in _clients:
+            # Retries are handled by chat_completion_async, not the SDK.
+            _clients[api_key] = OpenAI(api_key=api_key, max_retries=0)
+        return _clients[api_key]
+
+
+def set_openai_client(client, api_key=None):
+    """Install `client` as the shared client (e.g. pointed at a local stub)."""
+    with _clients_lock:
+        _clients[api_key or os.getenv("OPENAI_API_KEY")] = client
+
+
+def get_async_openai_client(api_key=None):
+    """AsyncOpenAI counterpart of get_openai_client for the running event loop."""
+    return async_client(get_openai_client(api_key))
+
+
+def async_client(client):
+    """
+    The AsyncOpenAI client matching `client` (same API key and base URL).
+    Async clients are bound to the event loop they were created on, so one
+    is kept per loop; an AsyncOpenAI `client` is returned unchanged.
+    """
+    from openai import AsyncOpenAI
+    if isinstance(client, AsyncOpenAI):
+        return client
+    loop = asyncio.get_running_loop()
+    key = (client.api_key, str(client.base_url))
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = AsyncOpenAI(api_key=client.api_key, base_url=client.base_url,
+                                       timeout=client.timeout, max_retries=0)
+        return clients[key]
+
+def set_rate_limit(requests_per_minute, tokens_per_minute=None, state_dir=None):
+    """
+    Cap LLM requests and estimated tokens per minute (0 or None = unlimited).
+    The budget is shared by every process using the same `state_dir`
+    (default LLM_RATE_LIMIT_STATE_DIR; "" keeps it per process).
+    """
+    global _rate_limiter
+    limiter = RequestLimiter(
+        requests_per_minute or 0,
+        LLM_RATE_LIMIT_TPM if tokens_per_minute is None else tokens_per_minute,
+        LLM_RATE_LIMIT_STATE_DIR if state_dir is None else state_dir,
+        LLM_RATE_LIMIT_BATCH_RESERVE,
+    )
+    _rate_limiter = limiter if limiter else None
+
+
+set_rate_limit(LLM_RATE_LIMIT_RPM)
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def _is_retryable(error):
+    """Rate-limit, timeout, connection and 5xx errors are worth retrying."""
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError))
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it sent a Retry-After header."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Prompt tokens (local tokenizer) plus the completion budget, charged to the TPM limit up front."""
+    prompt = sum(count_tokens(str(m.get("content", ""))) + 4 for m in messages)
+    return prompt + (max_tokens or LLM_COMPLETION_TOKEN_ESTIMATE)
+
+
+def _deadline_timeout(timeout):
+    """Per-attempt timeout, shortened so no attempt outlives the current deadline."""
+    remaining = time_remaining()
+    return timeout if remaining is None else max(0.001, min(timeout, remaining))
+
+
+def _backoff_delay(attempt, error):
+    """Exponential backoff with full jitter, capped at LLM_BACKOFF_MAX."""
+    delay = _retry_after(error)
+    if delay is None:
+        delay = random.uniform(0, LLM_BACKOFF_BASE * (2 ** attempt))
+    return min(delay, LLM_BACKOFF_MAX)
+
+# -----------------------------
+# MAIN FUNCTIONS
+# -----------------------------
+async def chat_completion_async(client, model, messages, timeout=None, max_retries=None, **kwargs):
+    """
+    Call `client.chat.completions.create` with a per-attempt timeout and
+    retries with backoff on rate-limit / transient errors; `client` may be
+    sync (see async_client). Every attempt first takes a request slot and
+    its estimated tokens from the rate limit, if one is set (shared across
+    worker processes; calls made under rateLimiter.request_priority(BATCH)
+    leave headroom for interactive ones). Returns the raw completion
+    response. Wall time, token usage and retries are recorded in
+    pipelineMetrics.
+    Inside an llmDeadline.deadline() block, attempts are cut short at the
+    deadline and DeadlineExceeded is raised instead of retrying past it.
+    """
+    client = async_client(client)
+    timeout = LLM_REQUEST_TIMEOUT if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+
+    attempt = 0
+    start = time.perf_counter()
+    token_estimate = None
+    while True:
+        check_deadline()
+        limiter = _rate_limiter
+        if limiter is not None:
+            if token_estimate is None and limiter.tokens is not None:
+                token_estimate = estimate_tokens(messages, kwargs.get("max_tokens"))
+            await limiter.acquire_async(token_estimate or 0)
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=_deadline_timeout(timeout),
+                **kwargs
+            )
+        except Exception as e:
+            delay = _backoff_delay(attempt, e)
+            remaining = time_remaining()
+            out_of_time = remaining is not None and remaining <= delay
+            if not _is_retryable(e) or attempt >= max_retries or out_of_time:
+                observe_llm_call(model, time.perf_counter() - start, retries=attempt, outcome="error")
+                if out_of_time and _is_retryable(e):
+                    raise DeadlineExceeded("LLM deadline exceeded") from e
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        observe_llm_call(model, time.perf_counter() - start, getattr(response, "usage", None), retries=attempt)
+        return response
+
+
+async def chat_stream_async(client, model, messages, on_delta=None, **kwargs):
+    """
+    Streamed `chat_completion_async`: calls `on_delta(text)` for each
+    content chunk as it arrives and returns (content, finish_reason).
+    If the stream breaks after some content has arrived, the partial
+    content is returned with finish_reason None so the caller can salvage
+    it; errors before the first chunk are raised as usual. The same
+    applies when the deadline passes mid-stream. To stop early, cancel the
+    task: the stream is closed and the request aborted.
+    """
+    stream = await chat_completion_async(client, model, messages, stream=True,
+                                         stream_options={"include_usage": True}, **kwargs)
+    parts = []
+    finish_reason = None
+    try:
+        async with stream:
+            async for chunk in stream:
+                remaining = time_remaining()
+                if remaining is not None and remaining <= 0:
+                    if not parts:
+                        raise DeadlineExceeded("LLM deadline exceeded")
+                    break
+                if chunk.usage is not None:
+                    observe_usage(model, chunk.usage)
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                text = choice.delta.content if choice.delta else None
+                if text:
+                    parts.append(text)
+                    if on_delta:
+                        on_delta(text)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        if not parts:
+            raise
+    return "".join(parts), finish_reason
+
+
+async def _hedged(call_type, attempt):
+    """
+    Await `attempt(primary)`; if it has not finished after the p90 latency
+    observed for `call_type`, start a duplicate and return whichever
+    succeeds first. The losing request is cancelled (its HTTP request is
+    aborted), as are both if the caller is cancelled.
+    """
+    delay = latencies.quantile(call_type, LLM_HEDGE_QUANTILE) if LLM_HEDGE_ENABLED else None
+    remaining = time_remaining()
+    if delay is None or (remaining is not None and remaining <= delay):
+        return await attempt(True)
+
+    primary = asyncio.ensure_future(attempt(True))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        pending.add(asyncio.ensure_future(attempt(False)))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = error or task.exception()
+                    continue
+                observe_hedge(call_type, "primary" if task is primary else "backup")
+                return task.result()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _choose_model(model, call_type):
+    """The cheaper fallback model if the deadline is closer than this call's usual p90."""
+    remaining = time_remaining()
+    if remaining is None or not call_type or not LLM_FALLBACK_MODEL or model == LLM_FALLBACK_MODEL:
+        return model
+    expected = latencies.quantile(call_type, LLM_HEDGE_QUANTILE)
+    if expected is not None and remaining < expected:
+        observe_fallback(call_type, "model")
+        return LLM_FALLBACK_MODEL
+    return model
+
+
+async def chat_text_async(client, model, messages, cache=True, validate=None, on_delta=None, call_type=None,
+                          **kwargs):
+    """
+    Like `chat_completion_async`, but return the stripped message content.
+
+    Identical (model, messages, options) requests are served from the shared
+    LLM cache unless `cache=False` or the caller is inside `llmCache.bypass()`.
+    If `validate` is given, content is only cached when `validate(content)`
+    is truthy, so malformed outputs are not replayed.
+    With `on_delta`, the response is streamed (see `chat_stream_async`) and
+    `on_delta` receives each chunk; cache hits are returned without it.
+
+    `call_type` (e.g. "graph", "node_summary") names the kind of call for
+    latency tracking: once its p90 is known, a slow request is hedged with
+    a duplicate (see `_hedged`), and near the deadline the call switches to
+    LLM_FALLBACK_MODEL. Only the primary request streams into `on_delta`;
+    if the duplicate wins, the returned content differs from what was
+    streamed and callers should use the return value.
+    """
+    key = cache_key(model, messages, **kwargs) if cache else None
+    if key is not None:
+        cached = llm_cache.get(key)
+        observe_cache(cached is not None)
+        if cached is not None:
+            return cached
+
+    check_deadline()
+    request_model = _choose_model(model, call_type)
+
+    async def attempt(primary):
+        start = time.perf_counter()
+        if on_delta is not None:
+            content, _ = await chat_stream_async(client, request_model, messages,
+                                                 on_delta=on_delta if primary else None, **kwargs)
+        else:
+            response = await chat_completion_async(client, request_model, messages, **kwargs)
+            content = response.choices[0].message.content or ""
+        if call_type:
+            latencies.observe(call_type, time.perf_counter() - start)
+        return content.strip()
+
+    content = await (_hedged(call_type, attempt) if call_type else attempt(True))
+
+    if key is not None and request_model == model and (validate is None or validate(content)):
+        llm_cache.set(key, content)
+    return content
+
+
+def chat_text(client, model, messages, cache=True, validate=None, on_delta=None, call_type=None, **kwargs):
+    """Blocking wrapper around `chat_text_async` (see asyncRunner.run_sync); `on_delta` runs on the loop thread."""
+    return run_sync(chat_text_async(client, model, messages, cache=cache, validate=validate,
+                                    on_delta=on_delta, call_type=call_type, **kwargs))
@@ -0,0 +1,84 @@
+# backend/llmDeadline.py
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+REPORT_DEADLINE_SECONDS = float(os.getenv("REPORT_DEADLINE_SECONDS", "0"))  # default per report; 0 = none
+LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))        # recent samples kept per call type
+LATENCY_MIN_SAMPLES = int(os.getenv("LLM_LATENCY_MIN_SAMPLES", "20"))  # before p90 is trusted
+
+_deadline = ContextVar("llm_deadline", default=None)  # time.monotonic() value, or None
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's end-to-end deadline passed before the LLM call could finish."""
+
+# -----------------------------
+# DEADLINES
+# -----------------------------
+@contextmanager
+def deadline(seconds):
+    """
+    End-to-end deadline for LLM calls made inside this block (and the
+    threads it copies its context to). Nested deadlines keep the earlier
+    one; `seconds` of None or <= 0 leaves the current deadline unchanged.
+    """
+    current = _deadline.get()
+    if seconds and seconds > 0:
+        at = time.monotonic() + seconds
+        current = at if current is None else min(current, at)
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining():
+    """Seconds left before the current deadline, or None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    remaining = time_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("LLM deadline exceeded")
+
+# -----------------------------
+# OBSERVED LATENCY
+# -----------------------------
+class LatencyTracker:
+    """Sliding window of recent LLM call durations per call type, for hedging decisions."""
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=LATENCY_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, call_type, seconds):
+        with self._lock:
+            samples = self._samples.get(call_type)
+            if samples is None:
+                samples = self._samples[call_type] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, call_type, q):
+        """The q-quantile of recent durations, or None until min_samples are seen."""
+        with self._lock:
+            samples = self._samples.get(call_type)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+latencies = LatencyTracker()
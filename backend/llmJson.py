@@ -0,0 +1,113 @@
+# backend/llmJson.py
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass scanner for the first JSON object in LLM output.
+
+    Text can be fed in chunks as it streams in; each character is scanned
+    once. Prose and ``` code fences around the object are ignored. If the
+    output is truncated, result() recovers the longest valid prefix by
+    cutting after the last complete top-level field or array element (so
+    half-written nodes/edges are dropped, not kept partially) and closing
+    the open containers,
+    e.g. '{"nodes": [{"name": "A"}, {"na' -> {"nodes": [{"name": "A"}]}.
+    """
+
+    _CLOSERS = {"{": "}", "[": "]"}
+
+    def __init__(self):
+        self._chunks = []
+        self._length = 0       # characters fed so far
+        self._start = -1       # index of the opening "{"
+        self._end = -1         # index just past the matching "}"
+        self._stack = []       # open containers
+        self._in_string = False
+        self._escape = False
+        self._safe = None      # (cut index, closers) of the last complete element
+
+    @property
+    def text(self):
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        base = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        if self._end != -1:
+            return
+        stack = self._stack
+        for offset, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._start == -1:
+                if ch == "{":
+                    self._start = base + offset
+                    stack.append("{")
+                    self._safe = (base + offset + 1, "}")
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                stack.append(ch)
+                if ch == "[" and len(stack) <= 2:
+                    self._safe = (base + offset + 1, self._closers())
+            elif ch in "}]":
+                stack.pop()
+                if not stack:
+                    self._end = base + offset + 1
+                    return
+                if len(stack) <= 2:
+                    self._safe = (base + offset + 1, self._closers())
+            elif ch == "," and len(stack) <= 2:
+                self._safe = (base + offset, self._closers())
+
+    def _closers(self):
+        return "".join(self._CLOSERS[c] for c in reversed(self._stack))
+
+    @property
+    def complete(self):
+        return self._end != -1
+
+    def result(self):
+        """
+        Return (data, complete). `data` is the parsed object, a recovered
+        prefix of it if the output was cut off, or None if nothing usable
+        was found.
+        """
+        if self._start == -1:
+            return None, False
+        if self._end != -1:
+            try:
+                return json.loads(self.text[self._start:self._end]), True
+            except json.JSONDecodeError:
+                return None, False
+        if self._safe is None:
+            return None, False
+        cut, closers = self._safe
+        try:
+            return json.loads(self.text[self._start:cut] + closers), False
+        except json.JSONDecodeError:
+            return None, False
+
+
+def parse_json_object(text):
+    """(data, complete) for the first JSON object in `text`; see IncrementalJSONParser."""
+    parser = IncrementalJSONParser()
+    parser.feed(text or "")
+    return parser.result()
+
+
+def is_complete_json(text):
+    """True if `text` contains a complete, valid JSON object."""
+    data, complete = parse_json_object(text)
+    return complete and data is not None
@@ -0,0 +1,239 @@
+# backend/llmSchemas.py
+"""
+JSON schemas for the structured LLM outputs (knowledge graph, summary tab,
+EMR tab), defined once and used both as structured-output constraints on
+the request and, compiled into plain Python checks, to validate replies.
+"""
+
+import os
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") != "0"  # send response_format constraints
+SCHEMA_RETRY_ATTEMPTS = int(os.getenv("LLM_SCHEMA_RETRY_ATTEMPTS", "1"))  # field-level re-requests
+
+# Models that accept response_format={"type": "json_schema", ...}; others
+# get JSON mode ({"type": "json_object"}), which guarantees syntax only.
+JSON_SCHEMA_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-5", "o3", "o4")
+
+NODE_TYPES = ["Condition", "Subcondition", "Symptom", "Cause", "Treatment", "Medication",
+              "Trigger", "Timing", "Related"]
+EDGE_TYPES = ["has_symptom", "may_be_caused_by", "treated_with", "related_to", "associated_with",
+              "same_concept"]
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+
+def _object(properties, required=None):
+    """Object schema; every property is required unless `required` is given."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties) if required is None else required,
+        "additionalProperties": False,
+    }
+
+# -----------------------------
+# SCHEMAS
+# -----------------------------
+# From LLM_Prompts/knowledgeGraphPrompt.txt; optional fields stay optional,
+# so this one is sent non-strict.
+GRAPH_NODE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": _STRING,
+        "type": {"type": "string", "enum": NODE_TYPES},
+        "aliases": _STRING_LIST,
+        "confidence": {"type": "number"},
+        "size": {"type": "number"},
+        "color": _STRING,
+        "notes": _STRING,
+    },
+    "required": ["name", "type"],
+}
+GRAPH_EDGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "from_node": _STRING,
+        "to_node": _STRING,
+        "type": {"type": "string", "enum": EDGE_TYPES},
+        "confidence": {"type": "number"},
+        "weight": {"type": "number"},
+    },
+    "required": ["from_node", "to_node", "type"],
+}
+GRAPH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nodes": {"type": "array", "items": GRAPH_NODE_SCHEMA},
+        "edges": {"type": "array", "items": GRAPH_EDGE_SCHEMA},
+    },
+    "required": ["nodes", "edges"],
+}
+
+# From LLM_Prompts/SummaryTabPrompt.txt
+SUMMARY_TAB_SCHEMA = _object({
+    "type": {"type": "string", "enum": ["summary_tab"]},
+    "visit_focus": _object({
+        "chief_complaint": _STRING,
+        "onset_duration_severity": _STRING,
+        "associated": _object({"positives": _STRING_LIST, "negatives": _STRING_LIST}),
+    }),
+    "concise_summary": _STRING,
+    "next_best_actions": _STRING_LIST,
+    "quick_checks": _STRING_LIST,
+    "transcript_snippets": _STRING_LIST,
+})
+
+# From LLM_Prompts/EmrTabPrompt.txt
+EMR_TAB_SCHEMA = _object({
+    "type": {"type": "string", "enum": ["emr_tab"]},
+    "relevant_history": _object({
+        "conditions": {"type": "array", "items": _object({"name": _STRING, "status": _STRING})},
+        "meds": {"type": "array", "items": _object({"name": _STRING, "purpose": _STRING})},
+        "allergies_alerts": _STRING_LIST,
+    }),
+    "risk_flags": _STRING_LIST,
+    "trend_insights": _STRING_LIST,
+    "care_gaps": _STRING_LIST,
+    "emr_transcript_conflicts": _STRING_LIST,
+})
+
+# -----------------------------
+# COMPILED VALIDATORS
+# -----------------------------
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+}
+
+
+def compile_schema(schema):
+    """
+    Compile a JSON-schema subset (type, enum, properties, required, items,
+    additionalProperties) into a function `check(value, path=())` that
+    returns a list of (path, message) errors. Compiling once up front keeps
+    per-reply validation to plain isinstance checks.
+    """
+    type_check = _TYPE_CHECKS.get(schema.get("type"))
+    type_name = schema.get("type")
+    enum = set(schema["enum"]) if "enum" in schema else None
+    properties = {k: compile_schema(v) for k, v in schema.get("properties", {}).items()}
+    required = tuple(schema.get("required", ()))
+    closed = schema.get("additionalProperties") is False
+    items = compile_schema(schema["items"]) if "items" in schema else None
+
+    def check(value, path=()):
+        if type_check is not None and not type_check(value):
+            return [(path, f"expected {type_name}")]
+        if enum is not None and value not in enum:
+            return [(path, f"not one of {sorted(enum)}")]
+        errors = []
+        if properties or required:
+            for key in required:
+                if key not in value:
+                    errors.append((path + (key,), "missing"))
+            for key, sub in value.items():
+                child = properties.get(key)
+                if child is not None:
+                    errors.extend(child(sub, path + (key,)))
+                elif closed:
+                    errors.append((path + (key,), "unexpected field"))
+        if items is not None:
+            for index, element in enumerate(value):
+                errors.extend(items(element, path + (index,)))
+        return errors
+
+    return check
+
+
+class OutputSchema:
+    """A named schema with its compiled validator and request constraint."""
+
+    def __init__(self, name, schema, strict=True):
+        self.name = name
+        self.schema = schema
+        self.strict = strict
+        self.check = compile_schema(schema)
+
+    def validate(self, data):
+        return self.check(data)
+
+    def is_valid(self, data):
+        return not self.check(data)
+
+    def response_format(self, model):
+        """Structured-output constraint for `model` (JSON schema or JSON mode)."""
+        if model.startswith(JSON_SCHEMA_MODEL_PREFIXES):
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": self.name, "schema": self.schema, "strict": self.strict},
+            }
+        return {"type": "json_object"}
+
+    def request_options(self, model):
+        """Extra chat-completion kwargs; empty when LLM_STRUCTURED_OUTPUT=0."""
+        return {"response_format": self.response_format(model)} if STRUCTURED_OUTPUT else {}
+
+    def fill_constants(self, data):
+        """Fill missing single-value enum fields (e.g. "type": "summary_tab") in place."""
+        for key, prop in self.schema["properties"].items():
+            if len(prop.get("enum", ())) == 1:
+                data.setdefault(key, prop["enum"][0])
+        return data
+
+    def empty(self):
+        """A schema-valid placeholder with empty values (e.g. when no LLM output is available)."""
+        return _empty_value(self.schema)
+
+    def subset(self, fields):
+        """Schema restricted to the given top-level `fields` (for field-level retries)."""
+        properties = {k: v for k, v in self.schema["properties"].items() if k in fields}
+        return OutputSchema(f"{self.name}_fix", _object(properties), self.strict)
+
+
+def _empty_value(schema):
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {k: _empty_value(v) for k, v in schema.get("properties", {}).items()
+                if k in schema.get("required", ())}
+    return {"array": [], "string": "", "number": 0, "integer": 0, "boolean": False}.get(kind)
+
+
+_compiled = {}
+
+
+def prune_invalid(items, item_schema):
+    """
+    Keep the elements of `items` that match `item_schema`. Elements with a
+    malformed optional field keep the rest of their fields; elements with a
+    missing or malformed required field are dropped.
+    """
+    check = _compiled.get(id(item_schema))
+    if check is None:
+        check = _compiled[id(item_schema)] = compile_schema(item_schema)
+    required = set(item_schema.get("required", ()))
+    kept = []
+    for item in items if isinstance(items, list) else ():
+        errors = check(item)
+        if not errors:
+            kept.append(item)
+            continue
+        bad = {path[0] for path, _ in errors if path}
+        if any(not path for path, _ in errors) or bad & required:
+            continue  # not an object, or a required field is wrong
+        kept.append({k: v for k, v in item.items() if k not in bad})
+    return kept
+
+
+GRAPH = OutputSchema("knowledge_graph", GRAPH_SCHEMA, strict=False)
+SUMMARY_TAB = OutputSchema("summary_tab", SUMMARY_TAB_SCHEMA)
+EMR_TAB = OutputSchema("emr_tab", EMR_TAB_SCHEMA)
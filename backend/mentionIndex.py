@@ -0,0 +1,49 @@
+# backend/mentionIndex.py
+from bisect import bisect_right
+from itertools import accumulate
+
+SEPARATOR = "\x00"
+
+
+class MentionIndex:
+    """
+    Substring lookup over a list of texts, built once per request.
+
+    The texts are lowercased once and joined into a single buffer with their
+    start offsets recorded, so `find(needle)` is one C-level `str.find` scan
+    of the buffer plus a bisect per hit, instead of a Python loop that
+    re-lowercases every text for every needle. Results match
+    `[i for i, t in enumerate(texts) if needle in t.lower()]` exactly.
+    """
+
+    def __init__(self, texts):
+        self.lowered = [t.lower() for t in texts]
+        self.buffer = SEPARATOR.join(self.lowered)
+        self.starts = [0] + list(accumulate(len(t) + 1 for t in self.lowered))[:-1]
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.lowered)
+
+    def find(self, needle):
+        """Indices of the texts containing `needle` (lowercase), in order."""
+        if needle in self._cache:
+            return self._cache[needle]
+
+        if not needle:
+            hits = list(range(len(self.lowered)))
+        elif SEPARATOR in needle:
+            # Could straddle two texts in the buffer; check each text directly.
+            hits = [i for i, text in enumerate(self.lowered) if needle in text]
+        else:
+            hits = []
+            pos = self.buffer.find(needle)
+            while pos != -1:
+                i = bisect_right(self.starts, pos) - 1
+                hits.append(i)
+                if i + 1 >= len(self.starts):
+                    break
+                pos = self.buffer.find(needle, self.starts[i + 1])
+
+        self._cache[needle] = hits
+        return hits
@@ -0,0 +1,119 @@
+# backend/neo4jClient.py
+import asyncio
+import os
+import threading
+import weakref
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+NEO4J_MAX_RETRY_TIME = float(os.getenv("NEO4J_MAX_RETRY_TIME", "15"))  # seconds of transient-error retries
+NEO4J_CONNECT_TIMEOUT = float(os.getenv("NEO4J_CONNECT_TIMEOUT", "5"))  # seconds per probe
+NEO4J_REPROBE_INTERVAL = float(os.getenv("NEO4J_REPROBE_INTERVAL", "60"))  # seconds between health checks
+
+
+class Neo4jProvider:
+    """
+    Lazily-created, shared Neo4j driver with a background health check.
+
+    Nothing connects at import time. The first call to `start()` (or
+    `get_driver()`) launches a daemon thread that probes the database,
+    caches the result in `available`, and re-probes every
+    NEO4J_REPROBE_INTERVAL seconds. `get_driver()` never blocks: it returns
+    the driver only while the last probe succeeded, and None otherwise.
+    `get_async_driver()` does the same for coroutines, with one async
+    driver per event loop (async drivers cannot be shared across loops).
+    """
+
+    def __init__(self, uri=NEO4J_URI, user=NEO4J_USER, password=None,
+                 reprobe_interval=NEO4J_REPROBE_INTERVAL):
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.reprobe_interval = reprobe_interval
+        self.available = False
+        self._driver = None
+        self._async_drivers = weakref.WeakKeyDictionary()  # event loop -> AsyncDriver
+        self._on_connect = []
+        self._connected_once = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_connect(self, callback):
+        """Register `callback(driver)` to run after the first successful probe (e.g. schema setup)."""
+        self._on_connect.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._probe_loop, name="neo4j-health", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
+            # Async drivers can only be closed from their own loop; just drop them.
+            self._async_drivers.clear()
+            self.available = False
+
+    def get_driver(self):
+        self.start()
+        return self._driver if self.available else None
+
+    def get_async_driver(self):
+        if self.get_driver() is None:
+            return None
+        from neo4j import AsyncGraphDatabase
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            driver = self._async_drivers.get(loop)
+            if driver is None:
+                driver = self._async_drivers[loop] = AsyncGraphDatabase.driver(self.uri, **self._driver_options())
+            return driver
+
+    def _driver_options(self):
+        password = self.password if self.password is not None else os.getenv("NEO4J_PASSWORD")
+        return {
+            "auth": (self.user, password),
+            "max_connection_pool_size": NEO4J_POOL_SIZE,
+            "max_transaction_retry_time": NEO4J_MAX_RETRY_TIME,
+            "connection_timeout": NEO4J_CONNECT_TIMEOUT,
+        }
+
+    def probe(self):
+        """Run one health check now; returns the new availability flag."""
+        try:
+            # Imported here so the driver package is loaded off the startup path;
+            # an ImportError just leaves Neo4j unavailable.
+            from neo4j import GraphDatabase
+            with self._lock:
+                if self._driver is None:
+                    self._driver = GraphDatabase.driver(self.uri, **self._driver_options())
+                driver = self._driver
+            driver.verify_connectivity()
+            if not self._connected_once:
+                for callback in self._on_connect:
+                    callback(driver)
+                self._connected_once = True
+            self.available = True
+        except Exception:
+            # Neo4j not available, continuing without database
+            self.available = False
+        return self.available
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.reprobe_interval)
+
+
+# Shared process-wide provider.
+neo4j_provider = Neo4jProvider()
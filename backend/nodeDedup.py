@@ -0,0 +1,206 @@
+# backend/nodeDedup.py
+import re
+from difflib import SequenceMatcher
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+SIMILARITY_THRESHOLD = 0.85  # same default as createKnowledgeGraph.similar()
+NGRAM_SIZE = 3
+MIN_SHARED_NGRAMS = 0.5      # fraction of the shorter name's n-grams a candidate must share
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+# Names that are close as strings but clinically opposite: a token starting
+# with one side never matches a token starting with the other.
+OPPOSITE_PREFIXES = [
+    ("hyper", "hypo"),    # hypertension / hypotension, hyperkalemia / hypokalemia
+    ("tachy", "brady"),   # tachycardia / bradycardia
+    ("macro", "micro"),   # macrocytic / microcytic
+    ("poly", "oligo"),    # polyuria / oliguria
+    ("left", "right"),
+    ("upper", "lower"),
+    ("pre", "post"),      # preoperative / postoperative
+]
+
+
+def normalize_name(name):
+    """Lowercase, drop punctuation and fold simple plurals ("Headaches" -> "headache")."""
+    tokens = _NON_ALNUM.sub(" ", (name or "").lower()).split()
+    return " ".join(t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+                    for t in tokens)
+
+
+def _ngrams(key):
+    padded = " " * (NGRAM_SIZE - 1) + key + " "
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def _are_opposites(a, b):
+    """True if normalized names `a` and `b` differ in a number or an opposite prefix."""
+    if _NUMBER.findall(a) != _NUMBER.findall(b):  # type 1 / type 2 diabetes, C5 / C6
+        return True
+    a_tokens, b_tokens = set(a.split()), set(b.split())
+    only_a, only_b = a_tokens - b_tokens, b_tokens - a_tokens
+    for x in only_a:
+        for y in only_b:
+            for p, q in OPPOSITE_PREFIXES:
+                if (x.startswith(p) and y.startswith(q)) or (x.startswith(q) and y.startswith(p)):
+                    return True
+    return False
+
+
+def _is_similar(a, b, threshold):
+    """SequenceMatcher ratio >= threshold, trying its cheap upper bounds first."""
+    matcher = SequenceMatcher(None, a, b)
+    return (matcher.real_quick_ratio() >= threshold
+            and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+# -----------------------------
+# CANDIDATE INDEX
+# -----------------------------
+class NameMatcher:
+    """
+    Index of names -> items for fuzzy lookup without comparing against every
+    name. Names are normalized; identical normalized names match directly,
+    otherwise only names sharing enough character n-grams (and of compatible
+    length) are scored with SequenceMatcher, and names that are clinical
+    opposites (OPPOSITE_PREFIXES, differing numbers) never match.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._items = {}      # normalized name -> [items]
+        self._keys = []       # key id -> normalized name
+        self._key_grams = []  # key id -> n-gram set
+        self._grams = {}      # n-gram -> [key ids]
+
+    def add(self, name, item):
+        key = normalize_name(name)
+        if not key:
+            return
+        items = self._items.get(key)
+        if items is not None:
+            if item not in items:
+                items.append(item)
+            return
+        self._items[key] = [item]
+        key_id = len(self._keys)
+        grams = _ngrams(key)
+        self._keys.append(key)
+        self._key_grams.append(grams)
+        for gram in grams:
+            self._grams.setdefault(gram, []).append(key_id)
+
+    def find(self, name):
+        """Items whose indexed names are similar to `name`, in insertion order."""
+        key = normalize_name(name)
+        if not key:
+            return []
+        found = list(self._items.get(key, []))
+
+        # Any candidate must share at least `required` of our n-grams, so it
+        # must appear in one of the (len(grams) - required + 1) rarest ones.
+        length = len(key)
+        min_length = min(length, int(length * self.threshold / (2 - self.threshold)))
+        required = max(1, int(MIN_SHARED_NGRAMS * (min_length + 1)))
+        grams = _ngrams(key)
+        rarest = sorted(grams, key=lambda g: len(self._grams.get(g, ())))
+        candidates = set()
+        for gram in rarest[:max(1, len(grams) - required + 1)]:
+            candidates.update(self._grams.get(gram, ()))
+
+        for key_id in sorted(candidates):
+            other = self._keys[key_id]
+            if other == key:
+                continue
+            shortest = min(length, len(other))
+            # ratio = 2*matches/total can never exceed this length bound
+            if 2.0 * shortest / (length + len(other)) < self.threshold:
+                continue
+            if len(grams & self._key_grams[key_id]) < MIN_SHARED_NGRAMS * (shortest + 1):
+                continue
+            if _is_similar(key, other, self.threshold) and not _are_opposites(key, other):
+                found.extend(item for item in self._items[other] if item not in found)
+        return found
+
+# -----------------------------
+# NODE MERGING
+# -----------------------------
+def merge_node_into(existing, node):
+    """Fold `node` into `existing` in place: aliases, max confidence, joined notes."""
+    aliases = existing.get("aliases", [])
+    for alias in [node.get("name")] + node.get("aliases", []):
+        if alias and alias != existing.get("name") and alias not in aliases:
+            aliases.append(alias)
+    if aliases:
+        existing["aliases"] = aliases
+    if "confidence" in node:
+        existing["confidence"] = max(existing.get("confidence", 0.0), node["confidence"])
+    if node.get("notes") and node["notes"] != existing.get("notes"):
+        existing["notes"] = "; ".join(filter(None, [existing.get("notes"), node["notes"]]))
+    for field, value in node.items():
+        if field not in ("name", "aliases"):
+            existing.setdefault(field, value)
+
+
+def dedupe_graph(graph_data, threshold=SIMILARITY_THRESHOLD):
+    """
+    Merge duplicate nodes (similar names or aliases) in place. The first
+    node of each group survives and absorbs the others' names as aliases;
+    edges are rewired to the survivor and duplicate edges dropped.
+    Returns {merged node name: surviving node name}.
+    """
+    nodes = graph_data.get("nodes", [])
+    parent = list(range(len(nodes)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    matcher = NameMatcher(threshold)
+    for i, node in enumerate(nodes):
+        names = [n for n in [node.get("name")] + node.get("aliases", []) if n]
+        for name in names:
+            for j in matcher.find(name):
+                a, b = root(i), root(j)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+        for name in names:
+            matcher.add(name, i)
+
+    renamed = {}
+    survivors = []
+    for i, node in enumerate(nodes):
+        r = root(i)
+        if r == i:
+            survivors.append(node)
+            continue
+        merge_node_into(nodes[r], node)
+        if node.get("name") and node.get("name") != nodes[r].get("name"):
+            renamed[node["name"]] = nodes[r]["name"]
+    if not renamed and len(survivors) == len(nodes):
+        return renamed
+
+    graph_data["nodes"] = survivors
+    edges = []
+    seen = set()
+    for edge in graph_data.get("edges", []):
+        source, target = edge.get("from_node"), edge.get("to_node")
+        edge["from_node"] = renamed.get(source, source)
+        edge["to_node"] = renamed.get(target, target)
+        key = (edge["from_node"], edge["to_node"], edge.get("type"))
+        # Self-loops that only exist because two duplicates were linked
+        if edge["from_node"] == edge["to_node"] and source != target:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        edges.append(edge)
+    if "edges" in graph_data:
+        graph_data["edges"] = edges
+    return renamed
@@ -0,0 +1,148 @@
+# backend/parsedTranscript.py
+import json
+from itertools import accumulate
+from typing import Any, Dict, List, Union
+
+from contextPacking import count_tokens
+from mentionIndex import MentionIndex
+
+PATIENT_SPEAKER = "Patient"
+ASSISTANT_SPEAKER = "AI"
+
+
+class ParsedTranscript:
+    """
+    A transcript parsed once per request and shared by every pipeline stage.
+
+    Built from either the raw "Speaker: text" string (one turn per line) or
+    the `conversation` array the frontend holds ([{"role", "content"}, ...]);
+    the array is taken turn by turn, so it is never joined into a string
+    only to be split again. Everything derived from the turns (the joined
+    text, line offsets, the lowercased MentionIndex, token counts and the
+    patient-lines JSON the tab prompts embed) is computed on first use and
+    then reused by later stages.
+    """
+
+    __slots__ = ("speakers", "texts", "lines", "_text", "_offsets", "_index",
+                 "_token_count", "_line_tokens", "_patient_lines", "_patient_lines_json")
+
+    def __init__(self, speakers, texts, lines):
+        self.speakers = speakers  # turn -> speaker label ("" if the line has none)
+        self.texts = texts        # turn -> what was said, without the speaker label
+        self.lines = lines        # turn -> "Speaker: text", as rendered in prompts
+        self._text = None
+        self._offsets = None
+        self._index = None
+        self._token_count = None
+        self._line_tokens = None
+        self._patient_lines = None
+        self._patient_lines_json = None
+
+    @classmethod
+    def from_text(cls, text):
+        """One turn per line; the speaker is whatever precedes the first colon."""
+        speakers, texts = [], []
+        lines = text.split("\n") if text else []
+        for line in lines:
+            head, sep, rest = line.strip().partition(":")
+            speakers.append(head if sep else "")
+            texts.append(rest.strip() if sep else line.strip())
+        parsed = cls(speakers, texts, lines)
+        parsed._text = text or ""
+        return parsed
+
+    @classmethod
+    def from_conversation(cls, messages):
+        """From [{"role", "content"}, ...], labelled like the frontend's transcript string."""
+        speakers, texts, lines = [], [], []
+        for message in messages:
+            if not isinstance(message, dict):
+                raise TypeError(f"conversation turns must be objects. Got: {type(message).__name__}")
+            content = message.get("content", "")
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False)
+            speaker = ASSISTANT_SPEAKER if message.get("role") == "assistant" else PATIENT_SPEAKER
+            speakers.append(speaker)
+            texts.append(content.strip())
+            lines.append(f"{speaker}: {content}")
+        return cls(speakers, texts, lines)
+
+    @classmethod
+    def parse(cls, value):
+        """A ParsedTranscript from a transcript string, a conversation array, or one already parsed."""
+        if isinstance(value, cls):
+            return value
+        if value is None or isinstance(value, str):
+            return cls.from_text(value)
+        if isinstance(value, list):
+            return cls.from_conversation(value)
+        raise TypeError(f"transcript must be a string or a conversation list. Got: {type(value).__name__}")
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return any(text for text in self.texts)
+
+    # -----------------------------
+    # DERIVED VIEWS
+    # -----------------------------
+    @property
+    def text(self):
+        """The transcript as one "Speaker: text" string, a line per turn."""
+        if self._text is None:
+            self._text = "\n".join(self.lines)
+        return self._text
+
+    @property
+    def offsets(self):
+        """turn -> start offset of its line in `text`."""
+        if self._offsets is None:
+            self._offsets = [0] + list(accumulate(len(line) + 1 for line in self.lines))[:-1]
+        return self._offsets
+
+    @property
+    def index(self):
+        """Lowercased MentionIndex over the turns' lines."""
+        if self._index is None:
+            self._index = MentionIndex(self.lines)
+        return self._index
+
+    @property
+    def lowered(self):
+        return self.index.lowered
+
+    @property
+    def token_count(self):
+        if self._token_count is None:
+            self._token_count = count_tokens(self.text)
+        return self._token_count
+
+    @property
+    def line_tokens(self):
+        """line -> token count, for every distinct line."""
+        if self._line_tokens is None:
+            self._line_tokens = {line: count_tokens(line) for line in self.lines}
+        return self._line_tokens
+
+    @property
+    def patient_lines(self):
+        if self._patient_lines is None:
+            self._patient_lines = [text for speaker, text in zip(self.speakers, self.texts)
+                                   if speaker.lower() == "patient"]
+        return self._patient_lines
+
+    @property
+    def patient_lines_json(self):
+        """patient_lines as the PATIENT_LINES_JSON the summary and EMR tab prompts embed."""
+        if self._patient_lines_json is None:
+            self._patient_lines_json = json.dumps(self.patient_lines, ensure_ascii=False, indent=2)
+        return self._patient_lines_json
+
+    def mentions(self, needle):
+        """Lines of the turns containing `needle` (lowercase), in order."""
+        return [self.lines[i] for i in self.index.find(needle)]
+
+
+# What the pipeline entry points accept as a transcript
+TranscriptInput = Union[str, List[Dict[str, Any]], ParsedTranscript]
@@ -0,0 +1,208 @@
+# backend/patientGraphStore.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from nodeDedup import NameMatcher, SIMILARITY_THRESHOLD
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Off by default: requests without their own EMR all share the example fixture's patient_id
+PATIENT_GRAPH_STORE_ENABLED = os.getenv("PATIENT_GRAPH_STORE_ENABLED", "0").lower() not in ("0", "false", "no")
+PATIENT_GRAPH_DB = os.getenv("PATIENT_GRAPH_DB", os.path.join(BASE_DIR, ".cache", "patient_graphs.sqlite"))
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS patient_nodes (
+        patient_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT,
+        confidence REAL NOT NULL DEFAULT 0,
+        aliases TEXT NOT NULL DEFAULT '[]',
+        notes TEXT,
+        context TEXT,
+        summary_key TEXT,
+        llm_summary TEXT,
+        visits INTEGER NOT NULL DEFAULT 0,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        PRIMARY KEY (patient_id, name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS patient_edges (
+        patient_id TEXT NOT NULL,
+        from_node TEXT NOT NULL,
+        to_node TEXT NOT NULL,
+        type TEXT NOT NULL DEFAULT '',
+        confidence REAL NOT NULL DEFAULT 0,
+        last_seen REAL NOT NULL,
+        PRIMARY KEY (patient_id, from_node, to_node, type)
+    )
+    """,
+]
+
+_NODE_COLUMNS = "name, type, confidence, aliases, notes, context, summary_key, llm_summary, visits, first_seen, last_seen"
+
+
+def summary_key(node):
+    """
+    Fingerprint of what a node's llm_summary was generated from: its type,
+    EMR-derived context and the transcript lines that mention it. A stored
+    summary with the same key can be reused; one written for a different
+    conversation cannot.
+    """
+    context = node.get("context", {})
+    mentions = hashlib.sha256(json.dumps(context.get("mentions", []), ensure_ascii=False).encode("utf-8"))
+    context = {k: v for k, v in context.items() if k != "mentions"}
+    payload = json.dumps([node.get("type"), context, mentions.hexdigest()], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PatientGraphStore:
+    """
+    Longitudinal graph per patient_id in a local SQLite file, independent of
+    Neo4j. Each visit's graph is merged into the patient's history with
+    confidence accumulated per visit (as update_graph does in Cypher), and a
+    visit only loads the stored nodes that match its own.
+    """
+
+    def __init__(self, path=PATIENT_GRAPH_DB, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def _match_names(self, patient_id, names):
+        """Map each visit node name to the stored node it refers to (name or alias match)."""
+        matcher = NameMatcher(self.threshold)
+        rows = self._conn.execute(
+            "SELECT name, aliases FROM patient_nodes WHERE patient_id = ?", (patient_id,)
+        )
+        for stored_name, aliases in rows:
+            for candidate in [stored_name] + json.loads(aliases):
+                matcher.add(candidate, stored_name)
+        matches = {}
+        for name in names:
+            found = matcher.find(name)
+            if found:
+                matches[name] = found[0]
+        return matches
+
+    def load_subgraph(self, patient_id, names):
+        """
+        Stored history for the given visit node names:
+        {"nodes": {visit name: stored node}, "edges": [edges among those nodes]}.
+        """
+        with self._lock:
+            matches = self._match_names(patient_id, names)
+            stored_names = sorted(set(matches.values()))
+            if not stored_names:
+                return {"nodes": {}, "edges": []}
+            placeholders = ", ".join("?" for _ in stored_names)
+            rows = self._conn.execute(
+                f"SELECT {_NODE_COLUMNS} FROM patient_nodes "
+                f"WHERE patient_id = ? AND name IN ({placeholders})", (patient_id, *stored_names)
+            ).fetchall()
+            edges = self._conn.execute(
+                f"SELECT from_node, to_node, type, confidence FROM patient_edges "
+                f"WHERE patient_id = ? AND from_node IN ({placeholders}) AND to_node IN ({placeholders})",
+                (patient_id, *stored_names, *stored_names)
+            ).fetchall()
+
+        stored = {}
+        for row in rows:
+            node = dict(zip([c.strip() for c in _NODE_COLUMNS.split(",")], row))
+            node["aliases"] = json.loads(node["aliases"])
+            node["context"] = json.loads(node["context"]) if node["context"] else {}
+            stored[node["name"]] = node
+        return {
+            "nodes": {name: stored[stored_name] for name, stored_name in matches.items() if stored_name in stored},
+            "edges": [
+                {"from_node": f, "to_node": t, "type": edge_type, "confidence": confidence}
+                for f, t, edge_type, confidence in edges
+            ],
+        }
+
+    def merge_visit(self, patient_id, graph_data):
+        """
+        Merge one visit's annotated graph into the patient's history in a
+        single transaction. Visit nodes matching a stored node (by name or
+        alias) are folded into it; confidence is summed across visits.
+        """
+        now = time.time()
+        nodes = [n for n in graph_data.get("nodes", []) if n.get("name")]
+        with self._lock:
+            matches = self._match_names(patient_id, [n["name"] for n in nodes])
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for node in nodes:
+                    name = matches.get(node["name"], node["name"])
+                    self._upsert_node(patient_id, name, node, now)
+                for edge in graph_data.get("edges", []):
+                    source = matches.get(edge.get("from_node"), edge.get("from_node"))
+                    target = matches.get(edge.get("to_node"), edge.get("to_node"))
+                    if not source or not target:
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO patient_edges (patient_id, from_node, to_node, type, confidence, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (patient_id, from_node, to_node, type) DO UPDATE SET "
+                        "confidence = confidence + excluded.confidence, last_seen = excluded.last_seen",
+                        (patient_id, source, target, edge.get("type") or "", edge.get("confidence", 0.0), now)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _upsert_node(self, patient_id, name, node, now):
+        row = self._conn.execute(
+            "SELECT aliases FROM patient_nodes WHERE patient_id = ? AND name = ?", (patient_id, name)
+        ).fetchone()
+        aliases = json.loads(row[0]) if row else []
+        # Deadline fallbacks (summary_source "manual") are not worth reusing on the next visit.
+        llm_summary = node.get("llm_summary") if node.get("summary_source") != "manual" else None
+        llm_summary = llm_summary or None
+        for alias in [node["name"]] + node.get("aliases", []):
+            if alias and alias != name and alias not in aliases:
+                aliases.append(alias)
+        self._conn.execute(
+            "INSERT INTO patient_nodes (patient_id, name, type, confidence, aliases, notes, context, "
+            "summary_key, llm_summary, visits, first_seen, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?) "
+            "ON CONFLICT (patient_id, name) DO UPDATE SET "
+            "type = excluded.type, confidence = confidence + excluded.confidence, "
+            "aliases = excluded.aliases, notes = COALESCE(excluded.notes, notes), "
+            "context = excluded.context, summary_key = COALESCE(excluded.summary_key, summary_key), "
+            "llm_summary = COALESCE(excluded.llm_summary, llm_summary), "
+            "visits = visits + 1, last_seen = excluded.last_seen",
+            (patient_id, name, node.get("type"), node.get("confidence", 0.0), json.dumps(aliases),
+             node.get("notes") or None, json.dumps(node.get("context", {}), ensure_ascii=False),
+             summary_key(node) if llm_summary else None, llm_summary, now, now)
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_patient_store():
+    """Shared PatientGraphStore, created on first use; None when disabled."""
+    global _store
+    if not PATIENT_GRAPH_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PatientGraphStore()
+    return _store
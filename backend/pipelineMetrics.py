@@ -0,0 +1,236 @@
+# backend/pipelineMetrics.py
+import bisect
+import contextlib
+import contextvars
+import threading
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per 1K (prompt, completion) tokens, used for the cost estimate.
+LLM_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+# -----------------------------
+# METRIC TYPES
+# -----------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels (Prometheus `counter`)."""
+
+    type = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple((n, labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(f"{self.name}{_format_labels(key)}", value) for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels (Prometheus `histogram`)."""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((n, labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                cumulative += count
+                lines.append((f"{self.name}_bucket{_format_labels(key + (('le', bound),))}", cumulative))
+            lines.append((f"{self.name}_sum{_format_labels(key)}", state[-1]))
+            lines.append((f"{self.name}_count{_format_labels(key)}", cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format for /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{sample} {_format_value(value)}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram("pipeline_stage_seconds", "Wall time per pipeline stage", ["stage"])
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "llm_request_seconds", "Wall time per LLM call, including retries", ["model", "outcome"]
+)
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens reported in response.usage", ["model", "kind"])
+LLM_RETRIES = metrics.counter("llm_retries_total", "LLM call attempts that were retried", ["model"])
+LLM_COST = metrics.counter("llm_cost_usd_total", "Estimated LLM spend in USD (see LLM_PRICES)", ["model"])
+LLM_CACHE_REQUESTS = metrics.counter("llm_cache_requests_total", "LLM cache lookups", ["result"])
+LLM_HEDGES = metrics.counter("llm_hedged_requests_total", "Duplicate requests sent after the p90 delay",
+                             ["call_type", "winner"])
+LLM_FALLBACKS = metrics.counter("llm_deadline_fallbacks_total", "Calls degraded because the deadline was near",
+                                ["call_type", "kind"])
+NEO4J_WRITE_SECONDS = metrics.histogram("neo4j_write_seconds", "Wall time per Neo4j graph write")
+
+# -----------------------------
+# PER-REQUEST USAGE
+# -----------------------------
+class RequestUsage:
+    """
+    Totals for one request, shared by every stage thread it fans out to.
+    Amounts also roll up into the enclosing tracker, if any.
+    """
+
+    FIELDS = ("llm_calls", "llm_seconds", "prompt_tokens", "completion_tokens", "retries",
+              "cache_hits", "cache_misses", "cost_usd", "neo4j_seconds", "hedges", "fallbacks")
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._values = dict.fromkeys(self.FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self._values[field] += amount
+        if self.parent is not None:
+            self.parent.add(**amounts)
+
+    def snapshot(self):
+        with self._lock:
+            return {k: round(v, 6) if isinstance(v, float) else v for k, v in self._values.items()}
+
+
+_request_usage = contextvars.ContextVar("request_usage", default=None)
+
+
+@contextlib.contextmanager
+def track_request():
+    """Collect LLM / Neo4j usage for the enclosed work (and the threads it copies its context to)."""
+    usage = RequestUsage(parent=_request_usage.get())
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def _record(**amounts):
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.add(**amounts)
+
+# -----------------------------
+# RECORDING HELPERS
+# -----------------------------
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def observe_llm_call(model, seconds, usage=None, retries=0, outcome="ok"):
+    """Record one chat completion; `usage` is the response's usage object, if any."""
+    LLM_REQUEST_SECONDS.observe(seconds, model=model, outcome=outcome)
+    if retries:
+        LLM_RETRIES.inc(retries, model=model)
+    _record(llm_calls=1, llm_seconds=seconds, retries=retries)
+    observe_usage(model, usage)
+
+
+def observe_usage(model, usage):
+    """Record token usage and estimated cost (for streams, from the final chunk)."""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if not (prompt_tokens or completion_tokens):
+        return
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    prompt_price, completion_price = LLM_PRICES.get(model, (0.0, 0.0))
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+    if cost:
+        LLM_COST.inc(cost, model=model)
+    _record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=cost)
+
+
+def observe_cache(hit):
+    LLM_CACHE_REQUESTS.inc(result="hit" if hit else "miss")
+    _record(**({"cache_hits": 1} if hit else {"cache_misses": 1}))
+
+
+def observe_hedge(call_type, winner):
+    """`winner` is "primary" or "backup"."""
+    LLM_HEDGES.inc(call_type=call_type, winner=winner)
+    _record(hedges=1)
+
+
+def observe_fallback(call_type, kind):
+    """`kind` is "model" (cheaper model), "manual" or "empty" (no LLM output used)."""
+    LLM_FALLBACKS.inc(call_type=call_type, kind=kind)
+    _record(fallbacks=1)
+
+
+def observe_neo4j_write(seconds):
+    NEO4J_WRITE_SECONDS.observe(seconds)
+    _record(neo4j_seconds=seconds)
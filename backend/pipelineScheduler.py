@@ -0,0 +1,93 @@
+# backend/pipelineScheduler.py
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from pipelineMetrics import observe_stage
+
+
+class Stage(NamedTuple):
+    """
+    One pipeline stage. `func` is called with the results of `deps`
+    as positional arguments, in the order they are listed.
+    """
+    name: str
+    func: Callable[..., Any]
+    deps: Sequence[str] = ()
+
+
+def _check_stages(stages: Sequence[Stage]) -> None:
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("Duplicate stage names")
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"Stage '{s.name}' depends on unknown stage(s): {missing}")
+
+
+async def _run_timed_async(stage: Stage, args: List[Any], t0: float) -> Tuple[Any, Dict[str, float]]:
+    start = time.perf_counter()
+    result = stage.func(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    end = time.perf_counter()
+    observe_stage(stage.name, end - start)
+    return result, {
+        "start": round(start - t0, 4),
+        "end": round(end - t0, 4),
+        "seconds": round(end - start, 4),
+    }
+
+
+async def run_stages_async(stages: Sequence[Stage],
+                           on_complete: Callable[[str, Any], None] = None
+                           ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """
+    Run `stages` as a dependency DAG on the event loop: every stage starts
+    as a task as soon as all of its dependencies have finished, so
+    independent stages overlap and the total latency is the longest path
+    rather than the sum of all stages. A stage `func` may return an
+    awaitable (e.g. an async function) which is awaited; plain functions
+    run inline, so they must not block.
+
+    Returns (results, timings), both keyed by stage name. Timings hold the
+    start/end offsets from pipeline start and the duration in seconds, plus
+    a "total" entry. If a stage fails, the stages still running are
+    cancelled before the exception is re-raised.
+
+    `on_complete(name, result)` is called as each stage finishes, before
+    any dependent stage is started.
+    """
+    _check_stages(stages)
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, float]] = {}
+    pending = {s.name: s for s in stages}
+    running = {}
+    t0 = time.perf_counter()
+
+    try:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(d in results for d in stage.deps):
+                    args = [results[d] for d in stage.deps]
+                    running[asyncio.ensure_future(_run_timed_async(stage, args, t0))] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                results[name], timings[name] = task.result()
+                if on_complete:
+                    on_complete(name, results[name])
+    finally:
+        for task in running:
+            task.cancel()
+
+    total = round(time.perf_counter() - t0, 4)
+    timings["total"] = {"start": 0.0, "end": total, "seconds": total}
+    return results, timings
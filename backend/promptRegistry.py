@@ -0,0 +1,143 @@
+# backend/promptRegistry.py
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+# -----------------------------
+# PATHS / CONFIGURATION
+# -----------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LLM_PROMPTS_DIR = os.path.join(BASE_DIR, "LLM_Prompts")
+EXAMPLE_EMR_PATH = os.path.join(BASE_DIR, "exampleEMR.json")
+
+# How often (seconds) a cached file's mtime is re-checked; 0 = every access.
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2"))
+
+
+class WatchedFile:
+    """
+    A file parsed once by `loader(path)` and cached in memory. Its mtime is
+    re-checked at most every `check_interval` seconds and the file reloaded
+    when it changes, so edits apply without a restart while the hot path
+    stays free of file I/O.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any], check_interval: float = PROMPT_RELOAD_INTERVAL):
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._value = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self._mtime:
+                # Parse before swapping so a bad edit keeps the last good version.
+                self._value = self.loader(self.path)
+                self._mtime = mtime
+            self._checked_at = now
+            return self._value
+
+
+class PromptTemplate:
+    """
+    A prompt file with its placeholders validated at load time. Templates
+    with a "SYSTEM: ... USER: ..." layout are split once here rather than
+    on every render.
+    """
+
+    def __init__(self, name: str, text: str, placeholders: Sequence[str] = (), split_user: bool = False):
+        missing = [p for p in placeholders if p not in text]
+        if missing:
+            raise ValueError(f"Prompt '{name}' is missing placeholder(s): {missing}")
+        self.name = name
+        self.text = text
+        self.placeholders = tuple(placeholders)
+        self.system = self.user = None
+        if split_user:
+            if "USER:" not in text:
+                raise ValueError(f"Prompt '{name}' has no 'USER:' section")
+            system, user = text.split("USER:", 1)
+            self.system = system.strip()
+            self.user = user.strip()
+
+    @staticmethod
+    def _fill(text: str, values: Dict[str, str]) -> str:
+        for placeholder, value in values.items():
+            text = text.replace(placeholder, value)
+        return text
+
+    def render(self, **values: str) -> str:
+        """Substitute `{NAME}` placeholders given as NAME=value."""
+        return self._fill(self.text, {"{" + k + "}": v for k, v in values.items()})
+
+    def render_messages(self, **values: str) -> List[Dict[str, str]]:
+        """System/user chat messages for a split template."""
+        values = {"{" + k + "}": v for k, v in values.items()}
+        return [{"role": "system", "content": self._fill(self.system, values)},
+                {"role": "user", "content": self._fill(self.user, values)}]
+
+
+class PromptRegistry:
+    """Named prompt templates and JSON fixtures, loaded once and hot-reloaded on change."""
+
+    def __init__(self):
+        self._files: Dict[str, WatchedFile] = {}
+
+    def register_prompt(self, name: str, path: str, placeholders: Sequence[str] = (), split_user: bool = False):
+        def load(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                return PromptTemplate(name, f.read(), placeholders, split_user)
+        self._files[name] = WatchedFile(path, load)
+
+    def register_json(self, name: str, path: str):
+        def load(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        self._files[name] = WatchedFile(path, load)
+
+    def get(self, name: str) -> Any:
+        return self._files[name].get()
+
+    def load_all(self):
+        """Load and validate everything now (call at startup to fail fast)."""
+        for watched in self._files.values():
+            watched.get()
+
+
+registry = PromptRegistry()
+registry.register_prompt("knowledge_graph", os.path.join(LLM_PROMPTS_DIR, "knowledgeGraphPrompt.txt"))
+registry.register_prompt("knowledge_graph_delta", os.path.join(LLM_PROMPTS_DIR, "knowledgeGraphDeltaPrompt.txt"))
+registry.register_prompt(
+    "node_context",
+    os.path.join(LLM_PROMPTS_DIR, "nodeContextSummarizationPrompt.txt"),
+    placeholders=["{NODE_NAME}", "{NODE_TYPE}", "{NODE_CONTEXT}", "{CONNECTED_NODES}", "{EMR_DATA}", "{TRANSCRIPT}"]
+)
+registry.register_prompt(
+    "summary_tab",
+    os.path.join(LLM_PROMPTS_DIR, "SummaryTabPrompt.txt"),
+    placeholders=["{PATIENT_LINES_JSON}"],
+    split_user=True
+)
+registry.register_prompt(
+    "emr_tab",
+    os.path.join(LLM_PROMPTS_DIR, "EmrTabPrompt.txt"),
+    placeholders=["{EMR_JSON}", "{PATIENT_LINES_JSON}"],
+    split_user=True
+)
+registry.register_prompt(
+    "emr_map",
+    os.path.join(LLM_PROMPTS_DIR, "EmrMapPrompt.txt"),
+    placeholders=["{EMR_CHUNK_JSON}", "{PATIENT_LINES_JSON}"],
+    split_user=True
+)
+# Read-only: the same parsed object is shared by every request.
+registry.register_json("example_emr", EXAMPLE_EMR_PATH)
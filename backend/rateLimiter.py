@@ -0,0 +1,192 @@
+# backend/rateLimiter.py
+import asyncio
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, limits stay per process
+    fcntl = None
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    """Mark LLM calls made inside this block (and threads copying its context) as INTERACTIVE or BATCH."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursting up to
+    `capacity` (default: one second's worth). acquire() blocks until
+    enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, tokens, floor):
+        """Take `tokens` if at least `floor` would remain; else return the seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens - tokens >= floor:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens + floor - self._tokens) / self.rate
+
+    def acquire(self, tokens=1.0, reserve=0.0):
+        """
+        Take `tokens`, sleeping as needed; returns the seconds spent waiting.
+        With `reserve` (a fraction of capacity), the take only succeeds if
+        that much is left afterwards, which keeps headroom for callers that
+        acquire without a reserve (e.g. batch work yields to interactive).
+        """
+        tokens, floor = self._request(tokens, reserve)
+        waited = 0.0
+        while True:
+            delay = self._take(tokens, floor)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens=1.0, reserve=0.0):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the thread."""
+        tokens, floor = self._request(tokens, reserve)
+        waited = 0.0
+        while True:
+            delay = self._take(tokens, floor)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def _request(self, tokens, reserve):
+        tokens = min(float(tokens), self.capacity)
+        return tokens, min(reserve * self.capacity, self.capacity - tokens)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state (tokens, last refill time) lives in a small file,
+    so every process on the host that opens the same `path` (e.g. each
+    gunicorn worker) draws from one budget. Updates are serialized with
+    fcntl.flock; wall-clock time is used because monotonic clocks are not
+    comparable across processes.
+    """
+
+    _STATE = struct.Struct("dd")
+
+    def __init__(self, path, rate, capacity=None):
+        super().__init__(rate, capacity)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _take(self, tokens, floor):
+        # flock is per open file, so threads of this process also need the thread lock.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                raw = os.pread(self._fd, self._STATE.size, 0)
+                if len(raw) == self._STATE.size:
+                    available, updated = self._STATE.unpack(raw)
+                    available = min(self.capacity, available + max(0.0, now - updated) * self.rate)
+                else:
+                    available = self.capacity
+                delay = 0.0
+                if available - tokens >= floor:
+                    available -= tokens
+                else:
+                    delay = (tokens + floor - available) / self.rate
+                os.pwrite(self._fd, self._STATE.pack(available, now), 0)
+                return delay
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_bucket(rate, capacity=None, path=None):
+    """SharedTokenBucket at `path` where flock is available, else a per-process TokenBucket."""
+    if path and fcntl is not None:
+        return SharedTokenBucket(path, rate, capacity)
+    return TokenBucket(rate, capacity)
+
+
+class RequestLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets for LLM calls.
+    `state_dir` shares both budgets across processes (see SharedTokenBucket).
+    BATCH callers leave `batch_reserve` of each bucket for INTERACTIVE ones.
+    """
+
+    REQUEST_BURST_SECONDS = 5  # enough headroom for the batch reserve to mean something
+    TOKEN_BURST_SECONDS = 10   # a TPM bucket must hold at least one large prompt
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, state_dir=None, batch_reserve=0.2):
+        self.batch_reserve = batch_reserve
+        self.requests = None
+        self.tokens = None
+        if requests_per_minute:
+            path = os.path.join(state_dir, "llm_requests.bucket") if state_dir else None
+            rate = requests_per_minute / 60.0
+            self.requests = make_bucket(rate, max(1.0, rate * self.REQUEST_BURST_SECONDS), path=path)
+        if tokens_per_minute:
+            rate = tokens_per_minute / 60.0
+            path = os.path.join(state_dir, "llm_tokens.bucket") if state_dir else None
+            self.tokens = make_bucket(rate, rate * self.TOKEN_BURST_SECONDS, path=path)
+
+    def __bool__(self):
+        return self.requests is not None or self.tokens is not None
+
+    def acquire(self, tokens=0, priority=None):
+        """Wait for one request slot and `tokens` estimated tokens; returns seconds waited."""
+        reserve = self.batch_reserve if (priority or current_priority()) == BATCH else 0.0
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire(1, reserve)
+        if self.tokens is not None and tokens:
+            waited += self.tokens.acquire(tokens, reserve)
+        return waited
+
+    async def acquire_async(self, tokens=0, priority=None):
+        """acquire() for coroutines."""
+        reserve = self.batch_reserve if (priority or current_priority()) == BATCH else 0.0
+        waited = 0.0
+        if self.requests is not None:
+            waited += await self.requests.acquire_async(1, reserve)
+        if self.tokens is not None and tokens:
+            waited += await self.tokens.acquire_async(tokens, reserve)
+        return waited
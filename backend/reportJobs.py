@@ -0,0 +1,178 @@
+# backend/reportJobs.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# -----------------------------
+# CONFIGURATION
+# -----------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_JOBS_DB = os.getenv("REPORT_JOBS_DB", os.path.join(BASE_DIR, ".cache", "report_jobs.sqlite"))
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "4"))
+REPORT_JOB_TTL = float(os.getenv("REPORT_JOB_TTL", "3600"))  # seconds a finished job is kept
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class JobStore:
+    """SQLite result store for report jobs, shared by every worker process on the host."""
+
+    def __init__(self, path: str = REPORT_JOBS_DB, ttl: float = REPORT_JOB_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_jobs (
+                id TEXT PRIMARY KEY,
+                idempotency_key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                partial TEXT,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+
+    def create(self, idempotency_key: Optional[str]) -> Tuple[str, bool]:
+        """Insert a queued job; returns (job_id, created). An unexpired job with
+        the same idempotency key is returned instead of creating a new one."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("DELETE FROM report_jobs WHERE expires_at < ?", (now,))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO report_jobs (id, idempotency_key, status, created_at, updated_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, idempotency_key, QUEUED, now, now, now + self.ttl)
+            )
+            if cursor.rowcount:
+                return job_id, True
+            row = self._conn.execute(
+                "SELECT id FROM report_jobs WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            return row[0], False
+
+    def update(self, job_id: str, **fields: Any):
+        now = time.time()
+        fields["updated_at"] = now
+        if fields.get("status") in (SUCCEEDED, FAILED):
+            fields["expires_at"] = now + self.ttl
+        for key in ("partial", "result"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key], ensure_ascii=False)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE report_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, created_at, updated_at, partial, result, error FROM report_jobs "
+                "WHERE id = ? AND expires_at >= ?", (job_id, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "created_at": row[2],
+            "updated_at": row[3],
+            "partial": json.loads(row[4]) if row[4] else {},
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+        }
+
+
+class ReportJobQueue:
+    """
+    In-process job queue: submitted reports run on a bounded thread pool
+    (`workers`, default REPORT_JOB_WORKERS) and their status, partial stage
+    results and final response are written to a JobStore.
+
+    `run_job(payload, on_stage, on_node)` does the actual work and returns
+    the final result dict. Its callbacks may be called on an event loop
+    (run_report runs on asyncRunner's), so they only snapshot the partial
+    results; the SQLite writes happen on a single writer thread, in order,
+    with bursts of callbacks coalesced into one write.
+    """
+
+    def __init__(self, run_job: Callable, store: Optional[JobStore] = None, workers: int = REPORT_JOB_WORKERS):
+        self.run_job = run_job
+        self.store = store or JobStore()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-job-store")
+
+    def submit(self, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Enqueue a job; returns (job_id, created)."""
+        job_id, created = self.store.create(idempotency_key)
+        if created:
+            self._pool.submit(self._run, job_id, payload)
+        return job_id, created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+        self._writer.shutdown(wait=wait)
+
+    def _run(self, job_id: str, payload: Dict[str, Any]):
+        stages: Dict[str, str] = {}     # stage name -> JSON snapshot of its result
+        summaries: Dict[str, str] = {}  # node name -> LLM summary
+        lock = threading.Lock()
+        writes = {"queued": False, "last": None}  # a write not yet started; the latest submitted
+
+        def write_partial():
+            with lock:
+                writes["queued"] = False
+                snapshot, node_summaries = dict(stages), dict(summaries)
+            partial = {name: json.loads(text) for name, text in snapshot.items()}
+            if node_summaries:
+                partial["node_summaries"] = node_summaries
+            self.store.update(job_id, partial=partial)
+
+        def schedule_write():
+            # Called with `lock` held; a write already queued picks this change up.
+            if not writes["queued"]:
+                writes["queued"] = True
+                writes["last"] = self._writer.submit(write_partial)
+
+        def on_stage(name, result):
+            # annotated_graph arrives node by node and ends up in the result
+            if name == "annotated_graph":
+                return
+            # Snapshot now: later stages mutate the graph in place.
+            text = json.dumps(result)
+            with lock:
+                stages[name] = text
+                schedule_write()
+
+        def on_node(index, node, summary):
+            with lock:
+                summaries[node.get("name")] = summary
+                schedule_write()
+
+        self.store.update(job_id, status=RUNNING)
+        try:
+            result = self.run_job(payload, on_stage, on_node)
+            final = {"status": SUCCEEDED, "result": result}
+        except Exception as e:
+            final = {"status": FAILED, "error": str(e)}
+        # Let queued partial-result writes land before the final status.
+        with lock:
+            last = writes["last"]
+        if last is not None:
+            wait([last])
+        self.store.update(job_id, **final)
@@ -0,0 +1,98 @@
+# backend/reportPipeline.py
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import llmCache
+import llmDeadline
+from asyncRunner import run_sync
+from createKnowledgeGraph import build_knowledge_graph_async
+from emrIndex import EMRInput, PatientEMR
+from generatePatientReport import report_tab_stages
+from parsedTranscript import ParsedTranscript, TranscriptInput
+from pipelineScheduler import Stage, run_stages_async
+from promptRegistry import registry
+from reviseKnowledgeGraph import revise_knowledge_graph_async
+
+
+def load_pipeline_inputs() -> Tuple[Dict[str, Any], str]:
+    """EMR and knowledge-graph prompt used by every report (cached in memory)."""
+    emr_data = registry.get("example_emr")
+    try:
+        graph_prompt = registry.get("knowledge_graph").text
+    except FileNotFoundError:
+        graph_prompt = ""
+    return emr_data, graph_prompt
+
+
+def report_stages(transcript: TranscriptInput, emr_data: EMRInput, graph_prompt: str,
+                  on_node: Optional[Callable] = None) -> List[Stage]:
+    """Graph build -> revise runs alongside the summary/EMR tabs, which only
+    need the transcript and EMR. Every stage shares one ParsedTranscript and
+    one PatientEMR. Stage funcs return coroutines."""
+    transcript = ParsedTranscript.parse(transcript)
+    emr = PatientEMR.parse(emr_data)
+    api_key = os.getenv("OPENAI_API_KEY")
+
+    async def revise(graph):
+        # Large records: only the part relevant to this transcript (see emrIndex).
+        relevant_emr = await emr.relevant_async(transcript)
+        return await revise_knowledge_graph_async(graph, relevant_emr, transcript, on_node=on_node)
+
+    return [
+        Stage("graph", lambda: build_knowledge_graph_async(transcript, graph_prompt, api_key)),
+        Stage("annotated_graph", revise, deps=("graph",)),
+        *report_tab_stages(emr, transcript),
+    ]
+
+
+def report_response(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape stage results into the legacy /generate_report response."""
+    summary_tab = report.get("summary_tab", {})
+    emr_tab = report.get("emr_tab", {})
+    next_steps = summary_tab.get("next_best_actions", [])
+
+    return {
+        "message": "Report generated successfully",
+        "insights_report": summary_tab,            # summary tab object (legacy key)
+        "next_steps": next_steps,                  # convenience array
+        "graph": report.get("annotated_graph"),    # unchanged
+        "emr_tab": emr_tab                         # NEW: EMR insights tab
+    }
+
+
+async def run_report_async(transcript: TranscriptInput, emr_data: Optional[EMRInput] = None,
+                           no_cache: bool = False,
+                           on_node: Optional[Callable] = None,
+                           on_stage: Optional[Callable] = None,
+                           deadline: Optional[float] = None
+                           ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """
+    Run the full report pipeline for one transcript: a "Speaker: text"
+    string, a conversation array ([{"role", "content"}, ...]) or a
+    ParsedTranscript; it is parsed once and shared by every stage.
+    Returns (legacy /generate_report response, per-stage timings).
+    `emr_data` (a dict, or a PatientEMR such as PatientEMR.from_file for
+    trusted local files; strings are rejected) defaults to the
+    example EMR fixture; records larger than EMR_PROMPT_TOKEN_BUDGET are
+    chunked and only the parts relevant to the transcript reach the prompts.
+    `deadline` (seconds, default REPORT_DEADLINE_SECONDS) bounds every LLM
+    call in the pipeline; slow calls are hedged and, near the deadline,
+    degrade to a cheaper model or to deterministic output (see llmClient).
+    `on_node` / `on_stage` run on the event loop and must not block.
+    """
+    default_emr, graph_prompt = load_pipeline_inputs()
+    emr_data = default_emr if emr_data is None else emr_data
+    if deadline is None:
+        deadline = llmDeadline.REPORT_DEADLINE_SECONDS
+    with llmCache.bypass(no_cache), llmDeadline.deadline(deadline):
+        report, timings = await run_stages_async(report_stages(transcript, emr_data, graph_prompt, on_node),
+                                                 on_complete=on_stage)
+    return report_response(report), timings
+
+
+def run_report(transcript: TranscriptInput, emr_data: Optional[EMRInput] = None, no_cache: bool = False,
+               on_node: Optional[Callable] = None,
+               on_stage: Optional[Callable] = None,
+               deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """Blocking wrapper around run_report_async (see asyncRunner.run_sync)."""
+    return run_sync(run_report_async(transcript, emr_data, no_cache, on_node, on_stage, deadline))
@@ -0,0 +1,55 @@
+# backend/requestOptions.py
+"""Request options and CORS rules shared by the Flask app (app.py) and the ASGI app (asgiApp.py)."""
+from parsedTranscript import ParsedTranscript
+
+ALLOWED_ORIGINS = {"http://localhost:3000", "http://localhost:3001"}
+CORS_PATHS = ("/generate_report", "/report_jobs", "/graph/")
+
+
+def cors_headers(origin, path):
+    """Headers granting `origin` access to `path`; empty for other origins / paths."""
+    if origin not in ALLOWED_ORIGINS or not path.startswith(CORS_PATHS):
+        return {}
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Vary": "Origin",
+        "Access-Control-Allow-Headers": "Content-Type, Idempotency-Key, X-Deadline-Ms",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    }
+
+
+def transcript_requested(data):
+    # {"conversation": [{"role", "content"}, ...]} (the frontend's message array) or {"transcript": "Patient: ..."};
+    # parsed once here and shared by every stage. None if missing, empty or malformed.
+    value = data.get("conversation") or data.get("transcript")
+    if not isinstance(value, (str, list)):
+        return None
+    try:
+        transcript = ParsedTranscript.parse(value)
+    except TypeError:
+        return None
+    return transcript or None
+
+
+def no_cache_requested(data, headers):
+    # Clients can force fresh LLM calls with {"no_cache": true} or Cache-Control: no-cache
+    return bool(data.get("no_cache")) or "no-cache" in headers.get("Cache-Control", "")
+
+
+def deadline_requested(data, headers):
+    # End-to-end LLM budget: {"deadline_ms": 20000} or an X-Deadline-Ms header (default REPORT_DEADLINE_SECONDS)
+    value = data.get("deadline_ms") or headers.get("X-Deadline-Ms")
+    try:
+        return float(value) / 1000 if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def compact_graph_requested(data, args):
+    # {"graph_format": "compact"} or ?graph=compact; see graphExport for the format
+    return (data.get("graph_format") or args.get("graph")) == "compact"
+
+
+def timings_requested(data, args):
+    # Opt-in breakdown: {"include_timings": true} or ?timings=1
+    return bool(data.get("include_timings")) or args.get("timings") in ("1", "true")
@@ -1,33 +1,36 @@
 # backend/reviseKnowledgeGraph.py
+import asyncio
 import json
-try:
-    from neo4j import GraphDatabase
-except ImportError:
-    # Neo4j driver not available
-    GraphDatabase = None
-from openai import OpenAI
+import logging
+import time
 import os
 from dotenv import load_dotenv
-
-# -----------------------------
-# PATH CONFIGURATION
-# -----------------------------
-BASE_DIR = os.path.dirname(__file__)
-LLM_PROMPTS_DIR = os.path.join(BASE_DIR, "LLM_Prompts")
-NODE_CONTEXT_PROMPT_PATH = os.path.join(LLM_PROMPTS_DIR, "nodeContextSummarizationPrompt.txt")
+from asyncRunner import run_sync
+from llmClient import chat_text_async, get_openai_client
+from llmDeadline import DeadlineExceeded
+from neo4jClient import neo4j_provider
+from mentionIndex import MentionIndex
+from parsedTranscript import ParsedTranscript
+from promptRegistry import registry
+from contextPacking import NodeContextPacker, compact_json
+from graphExport import dumps_compact, export_graph
+from graphIndex import IndexedGraph
+from patientGraphStore import get_patient_store, summary_key
+from pipelineMetrics import observe_fallback, observe_neo4j_write
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # LLM CONFIGURATION
 # -----------------------------
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
+LLM_MODEL = "gpt-3.5-turbo"
+ANNOTATE_MAX_WORKERS = int(os.getenv("LLM_ANNOTATE_CONCURRENCY", "8"))
 
 # -----------------------------
 # GRAPH CONFIGURATION
 # -----------------------------
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_AUTH = ("neo4j", os.getenv("NEO4J_PASSWORD"))
+NEO4J_BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "500"))  # rows per UNWIND
 
 NODE_COLORS = {
     "Symptom": "#007BFF",
@@ -39,141 +42,272 @@ NODE_COLORS = {
 BASE_SIZE = 50
 IMPORTANCE_SCALE = 50
 
-# Try to connect to Neo4j, but make it optional
-try:
-    if GraphDatabase is None:
-        raise ImportError("Neo4j driver not available")
-    driver = GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH)
-    # Test the connection
-    with driver.session() as session:
-        session.run("RETURN 1")
-    NEO4J_AVAILABLE = True
-    # Neo4j connection established
-    pass
-except Exception as e:
-    driver = None
-    NEO4J_AVAILABLE = False
-    # Neo4j not available, continuing without database
-    pass
+SCHEMA_QUERIES = [
+    # Uniqueness constraint also backs the MERGE / edge MATCH lookups with an index.
+    "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (n:Entity) REQUIRE n.name IS UNIQUE",
+]
+
+
+def ensure_schema(neo4j_driver):
+    """Idempotently create the constraints/indexes update_graph relies on."""
+    with neo4j_driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+
+
+# Neo4j is optional: the shared provider connects in the background and
+# update_graph skips writes while it is unavailable.
+neo4j_provider.on_connect(ensure_schema)
 
 # -----------------------------
 # HELPER FUNCTIONS
 # -----------------------------
 def annotate_graph_manual(graph_data, emr_data, transcript):
-    """Merge EMR + transcript context into nodes deterministically."""
+    """Merge EMR + transcript context into nodes deterministically.
+
+    EMR condition/medication names are lowercased and indexed once per call
+    (MentionIndex), not once per node; transcript turns use the request's
+    ParsedTranscript index, built once and shared with the other stages.
+    """
+    conditions = emr_data.get("conditions", [])
+    medications = emr_data.get("medications", [])
+    transcript = ParsedTranscript.parse(transcript)
+    condition_index = MentionIndex(cond.get("name", "") for cond in conditions)
+    medication_index = MentionIndex(med.get("name", "") for med in medications)
+    alerts = emr_data.get("alerts", [])
+
     for node in graph_data.get("nodes", []):
         node_name_lower = node.get("name", "").lower()
-        past_conditions = [
-            cond for cond in emr_data.get("conditions", [])
-            if node_name_lower in cond.get("name", "").lower()
-        ]
-        related_meds = [
-            med for med in emr_data.get("medications", [])
-            if node_name_lower in med.get("name", "").lower()
-        ]
-        mentions = [
-            turn for turn in transcript.split("\n")
-            if node_name_lower in turn.lower()
-        ]
-        alerts = emr_data.get("alerts", [])
-
         node["context"] = {
-            "past_conditions": past_conditions,
-            "medications": related_meds,
-            "mentions": mentions,
+            "past_conditions": [conditions[i] for i in condition_index.find(node_name_lower)],
+            "medications": [medications[i] for i in medication_index.find(node_name_lower)],
+            "mentions": transcript.mentions(node_name_lower),
             "alerts": alerts
         }
     return graph_data
 
 
-def annotate_graph_llm(graph_data, emr_data, transcript):
-    """Generate LLM-driven summaries for each node."""
-    with open(NODE_CONTEXT_PROMPT_PATH, "r", encoding="utf-8") as f:
-        prompt_template = f.read()
+def manual_summary(node):
+    """Deterministic summary from the node's manual context (annotate_graph_manual)."""
+    context = node.get("context", {})
+    parts = [f"{node.get('name')} ({node.get('type', 'Unknown')})."]
+    mentions = context.get("mentions", [])
+    if mentions:
+        parts.append(f"Mentioned in {len(mentions)} transcript turn(s).")
+    conditions = [c.get("name") + (f" ({c['status']})" if c.get("status") else "")
+                  for c in context.get("past_conditions", []) if c.get("name")]
+    if conditions:
+        parts.append("EMR conditions: " + ", ".join(dict.fromkeys(conditions)) + ".")
+    medications = [m.get("name") for m in context.get("medications", []) if m.get("name")]
+    if medications:
+        parts.append("EMR medications: " + ", ".join(dict.fromkeys(medications)) + ".")
+    return " ".join(parts)
+
+
+async def _summarize_node(node, graph, prompt_template, packer):
+    """Build the per-node prompt and return the LLM summary."""
+    connected_nodes = graph.neighbors(node["name"])
+    connected_json = compact_json(connected_nodes)
+    node_type = node.get("type", "Unknown")
+
+    # Only the EMR records / transcript turns relevant to this node, within budget.
+    context_json, emr_json, transcript_text = packer.pack(
+        node, prompt_template.text + node["name"] + node_type + connected_json
+    )
+    prompt = prompt_template.render(
+        NODE_NAME=node["name"],
+        NODE_TYPE=node_type,
+        NODE_CONTEXT=context_json,
+        CONNECTED_NODES=connected_json,
+        EMR_DATA=emr_json,
+        TRANSCRIPT=transcript_text
+    )
+
+    return await chat_text_async(get_openai_client(), LLM_MODEL, [{"role": "user", "content": prompt}],
+                                 call_type="node_summary")
+
+
+async def annotate_graph_llm_async(graph_data, emr_data, transcript, max_workers=None, on_node=None, only=None):
+    """Generate LLM-driven summaries for each node.
+
+    Nodes are summarized concurrently, at most `max_workers` (default
+    LLM_ANNOTATE_CONCURRENCY) calls in flight; summaries are written back
+    in node order once all calls have finished.
+    `on_node(index, node, summary)` is called as each summary arrives, for
+    callers that stream partial results.
+    If `only` is given, just the nodes with those names are re-summarized.
+    Each prompt carries only the EMR records and transcript turns relevant
+    to its node (see contextPacking.NodeContextPacker), and the nodes it is
+    connected to in either direction (looked up via graphIndex.IndexedGraph).
+    Nodes the request deadline (llmDeadline) leaves no time for get
+    manual_summary() instead, with node["summary_source"] = "manual".
+    """
+    prompt_template = registry.get("node_context")
 
-    for node in graph_data.get("nodes", []):
-        context = node.get("context", {})
-        connected_nodes = [
-            edge["to_node"] for edge in graph_data.get("edges", [])
-            if edge["from_node"] == node["name"]
-        ]
-
-        prompt = prompt_template.replace("{NODE_NAME}", node["name"]) \
-                                .replace("{NODE_TYPE}", node.get("type", "Unknown")) \
-                                .replace("{NODE_CONTEXT}", json.dumps(context, indent=2)) \
-                                .replace("{CONNECTED_NODES}", json.dumps(connected_nodes, indent=2)) \
-                                .replace("{EMR_DATA}", json.dumps(emr_data, indent=2)) \
-                                .replace("{TRANSCRIPT}", transcript)
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        node["llm_summary"] = response.choices[0].message.content.strip()
+    nodes = graph_data.get("nodes", [])
+    if only is not None:
+        nodes = [node for node in nodes if node.get("name") in only]
+    if not nodes:
+        return graph_data
+
+    packer = NodeContextPacker(emr_data, ParsedTranscript.parse(transcript))
+    graph = IndexedGraph.from_json(graph_data)
+    slots = asyncio.Semaphore(max(1, max_workers or ANNOTATE_MAX_WORKERS))
+
+    async def summarize(index, node):
+        try:
+            async with slots:
+                summary = await _summarize_node(node, graph, prompt_template, packer)
+            node.pop("summary_source", None)
+        except DeadlineExceeded:
+            observe_fallback("node_summary", "manual")
+            node["summary_source"] = "manual"
+            summary = manual_summary(node)
+        if on_node:
+            on_node(index, node, summary)
+        return summary
+
+    summaries = await asyncio.gather(*(summarize(index, node) for index, node in enumerate(nodes)))
+
+    for node, summary in zip(nodes, summaries):
+        node["llm_summary"] = summary
+
+    logger.info("annotate_graph_llm: %d nodes, prompt tokens %s", len(nodes), packer.stats())
 
     return graph_data
 
 
-def update_graph(graph_data):
-    """Update Neo4j graph with nodes and edges."""
-    if not NEO4J_AVAILABLE or driver is None:
-        # Skipping Neo4j update (database not available)
+def annotate_graph_llm(graph_data, emr_data, transcript, max_workers=None, on_node=None, only=None):
+    """Blocking wrapper around annotate_graph_llm_async (see asyncRunner.run_sync)."""
+    return run_sync(annotate_graph_llm_async(graph_data, emr_data, transcript, max_workers, on_node, only))
+
+
+NODE_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (n:Entity {name: row.name})
+SET n.type = row.type,
+    n.color = row.color,
+    n.size = row.size,
+    n.confidence = coalesce(n.confidence, 0.0) + row.confidence,
+    n.notes = row.notes,
+    n.context = row.context,
+    n.llm_summary = row.llm_summary,
+    n.last_seen = timestamp()
+WITH n, coalesce(row.aliases, []) AS new_aliases
+WHERE size(new_aliases) > 0
+SET n.aliases = reduce(acc = [], a IN new_aliases + coalesce(n.aliases, []) |
+                       CASE WHEN a IN acc THEN acc ELSE acc + a END)
+"""
+
+EDGE_UPSERT_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Entity {name: row.from_node}), (b:Entity {name: row.to_node})
+MERGE (a)-[r:RELATION {type: row.type}]->(b)
+SET r.confidence = coalesce(r.confidence, 0.0) + row.confidence
+"""
+
+def _node_rows(graph_data):
+    rows = []
+    for node in graph_data.get("nodes", []):
+        node_type = node.get("type", "Unknown")
+        importance = node.get("importance", node.get("confidence", 0.0))
+        rows.append({
+            "name": node.get("name"),
+            "type": node_type,
+            "color": NODE_COLORS.get(node_type, "#cccccc"),
+            "size": BASE_SIZE + IMPORTANCE_SCALE * importance,
+            "confidence": node.get("confidence", 0.0),
+            "notes": node.get("notes", ""),
+            "context": json.dumps(node.get("context", {})),
+            "llm_summary": node.get("llm_summary", ""),
+            "aliases": node.get("aliases", [])
+        })
+    return rows
+
+
+def _edge_rows(graph_data):
+    return [
+        {
+            "from_node": edge.get("from_node"),
+            "to_node": edge.get("to_node"),
+            "type": edge.get("type"),
+            "confidence": edge.get("confidence", 0.0)
+        }
+        for edge in graph_data.get("edges", [])
+    ]
+
+
+def _write_graph_tx(tx, node_rows, edge_rows, batch_size):
+    for i in range(0, len(node_rows), batch_size):
+        tx.run(NODE_UPSERT_QUERY, rows=node_rows[i:i + batch_size]).consume()
+    for i in range(0, len(edge_rows), batch_size):
+        tx.run(EDGE_UPSERT_QUERY, rows=edge_rows[i:i + batch_size]).consume()
+
+
+async def _write_graph_tx_async(tx, node_rows, edge_rows, batch_size):
+    for i in range(0, len(node_rows), batch_size):
+        await (await tx.run(NODE_UPSERT_QUERY, rows=node_rows[i:i + batch_size])).consume()
+    for i in range(0, len(edge_rows), batch_size):
+        await (await tx.run(EDGE_UPSERT_QUERY, rows=edge_rows[i:i + batch_size])).consume()
+
+
+def update_graph(graph_data, neo4j_driver=None, batch_size=None):
+    """Update Neo4j graph with nodes and edges.
+
+    All nodes, then all edges, are written as parameterized UNWIND batches
+    of `batch_size` rows inside one managed write transaction, which the
+    driver retries on transient errors. Pass `neo4j_driver` to write
+    somewhere other than the shared provider's connection.
+    """
+    if neo4j_driver is None:
+        neo4j_driver = neo4j_provider.get_driver()
+        if neo4j_driver is None:
+            # Skipping Neo4j update (database not available)
+            return
+
+    node_rows = _node_rows(graph_data)
+    edge_rows = _edge_rows(graph_data)
+    if not node_rows and not edge_rows:
+        return
+
+    start = time.perf_counter()
+    with neo4j_driver.session() as session:
+        session.execute_write(_write_graph_tx, node_rows, edge_rows, batch_size or NEO4J_BATCH_SIZE)
+    observe_neo4j_write(time.perf_counter() - start)
+
+
+async def update_graph_async(graph_data, neo4j_driver=None, batch_size=None):
+    """update_graph with the async Neo4j driver (neo4j_provider.get_async_driver by default)."""
+    if neo4j_driver is None:
+        neo4j_driver = neo4j_provider.get_async_driver()
+        if neo4j_driver is None:
+            return
+
+    node_rows = _node_rows(graph_data)
+    edge_rows = _edge_rows(graph_data)
+    if not node_rows and not edge_rows:
         return
-    
-    with driver.session() as session:
-        for node in graph_data.get("nodes", []):
-            node_type = node.get("type", "Unknown")
-            importance = node.get("importance", node.get("confidence", 0.0))
-            node_color = NODE_COLORS.get(node_type, "#cccccc")
-            node_size = BASE_SIZE + IMPORTANCE_SCALE * importance
-
-            session.run(
-                """
-                MERGE (n:Entity {name:$name})
-                SET n.type = $type,
-                    n.color = $color,
-                    n.size = $size,
-                    n.confidence = coalesce(n.confidence, 0.0) + $confidence,
-                    n.notes = $notes,
-                    n.context = $context,
-                    n.llm_summary = $llm_summary,
-                    n.last_seen = timestamp()
-                WITH n, $aliases AS new_aliases
-                UNWIND coalesce(new_aliases, []) AS a
-                WITH n, collect(DISTINCT a) AS alias_list, coalesce(n.aliases, []) AS existing
-                WITH n, alias_list + existing AS merged
-                UNWIND merged AS m
-                WITH n, collect(DISTINCT m) AS final_aliases
-                SET n.aliases = final_aliases
-                """,
-                name=node.get("name"),
-                type=node_type,
-                color=node_color,
-                size=node_size,
-                confidence=node.get("confidence", 0.0),
-                notes=node.get("notes", ""),
-                context=json.dumps(node.get("context", {})),
-                llm_summary=node.get("llm_summary", ""),
-                aliases=node.get("aliases", [])
-            )
-
-        for edge in graph_data.get("edges", []):
-            session.run(
-                """
-                MATCH (a:Entity {name:$from_node}), (b:Entity {name:$to_node})
-                MERGE (a)-[r:RELATION {type:$type}]->(b)
-                SET r.confidence = coalesce(r.confidence,0.0) + $confidence
-                """,
-                from_node=edge.get("from_node"),
-                to_node=edge.get("to_node"),
-                type=edge.get("type"),
-                confidence=edge.get("confidence", 0.0)
-            )
-
-
-def export_frontend_json(graph_data, output_path):
-    """Export frontend-ready JSON including context and llm_summary."""
+
+    start = time.perf_counter()
+    async with neo4j_driver.session() as session:
+        await session.execute_write(_write_graph_tx_async, node_rows, edge_rows, batch_size or NEO4J_BATCH_SIZE)
+    observe_neo4j_write(time.perf_counter() - start)
+
+
+def export_frontend_json(graph_data, output_path, compact=True):
+    """Export frontend-ready JSON.
+
+    The default compact format (graphExport.export_graph) stores shared EMR
+    records once and includes precomputed layout positions; per-node
+    mentions, notes and summaries go to the graph detail store, from which
+    GET /graph/<graph_id>/node serves them. `compact=False` writes the
+    verbose format with full context and llm_summary on every node.
+    """
+    if compact:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(dumps_compact(export_graph(graph_data, NODE_COLORS, BASE_SIZE)))
+        return
+
     frontend_graph = {
         "nodes": [],
         "edges": graph_data.get("edges", [])
@@ -209,33 +343,135 @@ def _load_json_input(value, label):
     raise TypeError(f"{label} must be a path to a JSON file or a JSON object/string. Got: {type(value).__name__}")
 
 
-def _load_text_input(value, label):
+def _load_transcript_input(value, label):
     if isinstance(value, str):
         if os.path.exists(value):
             with open(value, "r") as f:
-                return f.read()
-        return value
-    raise TypeError(f"{label} must be a path to a text file or a string. Got: {type(value).__name__}")
+                return ParsedTranscript.from_text(f.read())
+        return ParsedTranscript.from_text(value)
+    if isinstance(value, (ParsedTranscript, list)):
+        return ParsedTranscript.parse(value)
+    raise TypeError(f"{label} must be a path to a text file, a transcript string or a conversation list. "
+                    f"Got: {type(value).__name__}")
 
 
-def revise_knowledge_graph(graph_json_file, emr_json_file, transcript_txt_file, frontend_output=None):
+def reuse_prior_summaries(graph_data, emr_data):
+    """Copy stored llm_summary values onto nodes a returning patient already has.
+
+    A summary is reused when the stored node was summarized from the same
+    type, EMR context and transcript mentions (patientGraphStore.summary_key).
+    Returns (names of the nodes that still need a fresh summary, indexes of
+    the nodes that got a stored one).
+    """
+    names = [node.get("name") for node in graph_data.get("nodes", [])]
+    store = get_patient_store()
+    patient_id = emr_data.get("patient_id")
+    if store is None or not patient_id:
+        return set(names), []
+
+    history = store.load_subgraph(str(patient_id), names)["nodes"]
+    stale, reused = set(), []
+    for index, node in enumerate(graph_data.get("nodes", [])):
+        prior = history.get(node.get("name"))
+        if prior and prior.get("llm_summary") and prior.get("summary_key") == summary_key(node):
+            node["llm_summary"] = prior["llm_summary"]
+            reused.append(index)
+        else:
+            stale.add(node.get("name"))
+    return stale, reused
+
+
+def save_patient_visit(graph_data, emr_data):
+    """Merge this visit's graph into the patient's longitudinal history, if enabled."""
+    store = get_patient_store()
+    patient_id = emr_data.get("patient_id")
+    if store is not None and patient_id:
+        store.merge_visit(str(patient_id), graph_data)
+
+
+async def revise_knowledge_graph_async(graph_json_file, emr_json_file, transcript_txt_file, frontend_output=None,
+                                       on_node=None, persist=True):
     """Full pipeline to revise knowledge graph with manual and LLM context.
 
     Accepts either file paths or in-memory data:
     - graph_json_file: path to JSON file, JSON dict/list, or JSON string
     - emr_json_file: path to JSON file, JSON dict/list, or JSON string
-    - transcript_txt_file: path to text file or raw transcript string
+    - transcript_txt_file: path to text file, raw transcript string, conversation
+      array ([{"role", "content"}, ...]) or ParsedTranscript
     - frontend_output: optional path to write a frontend-ready JSON
+    - on_node: optional callback(index, node, summary) per annotated node
+    - persist: write the graph to Neo4j and the patient store; False for the
+      provisional graphs of a visit still in progress (see
+      revise_knowledge_graph_incremental), which the final report persists
+
+    With PATIENT_GRAPH_STORE_ENABLED, for a returning patient (EMR
+    `patient_id` seen before), summaries of nodes whose EMR context and
+    mentions are unchanged are reused from the patient graph store instead
+    of regenerated; the visit is then merged into that store.
+    The SQLite patient store is accessed from a worker thread, so the event
+    loop is not blocked.
     """
     graph_data = _load_json_input(graph_json_file, "graph_json_file")
     emr_data = _load_json_input(emr_json_file, "emr_json_file")
-    transcript = _load_text_input(transcript_txt_file, "transcript_txt_file")
+    transcript = _load_transcript_input(transcript_txt_file, "transcript_txt_file")
 
     annotated_graph = annotate_graph_manual(graph_data, emr_data, transcript)
-    annotated_graph = annotate_graph_llm(annotated_graph, emr_data, transcript)
-    update_graph(annotated_graph)
+    stale, reused = await asyncio.to_thread(reuse_prior_summaries, annotated_graph, emr_data)
+    if on_node:  # back on the event loop, like the callbacks for fresh summaries
+        for index in reused:
+            node = annotated_graph["nodes"][index]
+            on_node(index, node, node["llm_summary"])
+    annotated_graph = await annotate_graph_llm_async(annotated_graph, emr_data, transcript, on_node=on_node,
+                                                     only=stale)
+    if persist:
+        await update_graph_async(annotated_graph)
+        await asyncio.to_thread(save_patient_visit, annotated_graph, emr_data)
 
     if frontend_output:
         export_frontend_json(annotated_graph, frontend_output)
 
     return annotated_graph
+
+
+def revise_knowledge_graph(graph_json_file, emr_json_file, transcript_txt_file, frontend_output=None, on_node=None,
+                           persist=True):
+    """Blocking wrapper around revise_knowledge_graph_async (see asyncRunner.run_sync)."""
+    return run_sync(revise_knowledge_graph_async(graph_json_file, emr_json_file, transcript_txt_file,
+                                                 frontend_output, on_node, persist))
+
+
+async def revise_knowledge_graph_incremental_async(graph_data, emr_data, transcript, changed_nodes=(), on_node=None):
+    """Re-annotate only the nodes whose context changed since the last revision.
+
+    `graph_data` is a previously annotated graph that has had a delta merged
+    into it (see createKnowledgeGraph.update_knowledge_graph); `changed_nodes`
+    are the names that delta touched. Manual context is recomputed for every
+    node (it is cheap), but LLM summaries are regenerated only for nodes that
+    are new, were touched by the delta, or whose context differs.
+    Nothing is written to Neo4j: the upserts add each write's confidence to
+    the stored one, so writing every mid-visit update would count the same
+    evidence once per turn. The visit is persisted once, by the final report.
+    Returns (graph_data, re-annotated node names).
+    """
+    previous_context = {
+        node.get("name"): json.dumps(node.get("context", {}), sort_keys=True)
+        for node in graph_data.get("nodes", [])
+        if "llm_summary" in node and node.get("summary_source") != "manual"
+    }
+
+    transcript = ParsedTranscript.parse(transcript)
+    annotate_graph_manual(graph_data, emr_data, transcript)
+
+    stale = set(changed_nodes)
+    for node in graph_data.get("nodes", []):
+        name = node.get("name")
+        if previous_context.get(name) != json.dumps(node.get("context", {}), sort_keys=True):
+            stale.add(name)
+
+    await annotate_graph_llm_async(graph_data, emr_data, transcript, on_node=on_node, only=stale)
+    return graph_data, stale
+
+
+def revise_knowledge_graph_incremental(graph_data, emr_data, transcript, changed_nodes=(), on_node=None):
+    """Blocking wrapper around revise_knowledge_graph_incremental_async."""
+    return run_sync(revise_knowledge_graph_incremental_async(graph_data, emr_data, transcript, changed_nodes, on_node))
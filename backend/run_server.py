@@ -2,6 +2,8 @@
 """
 Startup script for the PreViz AI Flask backend server.
 Run this script to start the backend server for the healthcare application.
+SERVER_MODE=asgi serves the async app (asgiApp.py) with hypercorn instead,
+using hypercorn.toml; FLASK_HOST / FLASK_PORT still set the bind address.
 """
 
 import os
@@ -15,9 +17,28 @@ sys.path.insert(0, backend_dir)
 # Load environment variables
 load_dotenv()
 
-from app import app
+
+def run_asgi(host, port):
+    import asyncio
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from asgiApp import app as asgi_app
+
+    config = Config.from_toml(os.path.join(backend_dir, "hypercorn.toml"))
+    config.bind = [f"{host}:{port}"]
+    print(f"Starting PreViz AI Backend Server (ASGI)...")
+    print(f"Server will be available at: http://{host}:{port}")
+    # serve() runs a single worker; use the hypercorn CLI for several.
+    asyncio.run(serve(asgi_app, config))
+
 
 if __name__ == "__main__":
+    if os.getenv("SERVER_MODE", "flask").lower() == "asgi":
+        run_asgi(os.getenv("FLASK_HOST", "127.0.0.1"), int(os.getenv("FLASK_PORT", "5000")))
+        sys.exit(0)
+
+    from app import app
+
     # Get configuration from environment variables
     host = os.getenv("FLASK_HOST", "127.0.0.1")
     port = int(os.getenv("FLASK_PORT", "5000"))
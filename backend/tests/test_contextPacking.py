@@ -0,0 +1,75 @@
+"""Tests for contextPacking.NodeContextPacker: every node prompt stays within its budget."""
+
+import json
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contextPacking import NodeContextPacker, count_tokens
+from parsedTranscript import ParsedTranscript
+
+FIXED_TEXT = "Summarize this node for the clinician. " * 20
+BUDGET = 3000
+
+
+def _emr(labs=500, encounters=200, allergies=50):
+    return {
+        "allergies": [{"substance": f"Substance {i}", "reaction": "Rash and hives"} for i in range(allergies)],
+        "encounters": [{"date": f"20{i % 25:02d}-01-01", "reason": "Headache follow-up",
+                        "notes": "Headache improved with rest, advised hydration."} for i in range(encounters)],
+        "labs": [{"test": "Headache panel", "value": str(i), "date": f"20{i % 25:02d}-{i % 12 + 1:02d}-01"}
+                 for i in range(labs)],
+    }
+
+
+def _node(records=100):
+    return {
+        "name": "Headache",
+        "type": "Symptom",
+        "context": {
+            "past_conditions": [{"name": f"Migraine {i}", "status": "chronic"} for i in range(records)],
+            "medications": [{"name": f"Drug {i}", "dose": "10mg"} for i in range(records)],
+            "alerts": [f"Alert number {i} for this patient" for i in range(records)],
+            "mentions": [f"Patient: my headache is back, day {i}" for i in range(records)],
+        },
+    }
+
+
+def _prompt_tokens(packer, node):
+    context_json, emr_json, transcript_text = packer.pack(node, FIXED_TEXT)
+    return (count_tokens(FIXED_TEXT) + count_tokens(context_json) + count_tokens(emr_json)
+            + count_tokens(transcript_text))
+
+
+def test_many_labs_stay_within_budget():
+    transcript = ParsedTranscript.from_text("Patient: I have a headache")
+    packer = NodeContextPacker(_emr(), transcript, BUDGET)
+    assert _prompt_tokens(packer, _node(records=0)) <= BUDGET
+    assert packer.stats()["prompt_tokens"] <= BUDGET
+
+
+def test_large_context_and_allergies_stay_within_budget():
+    node = _node()
+    transcript = ParsedTranscript.from_text("\n".join(node["context"]["mentions"]))
+    packer = NodeContextPacker(_emr(allergies=400), transcript, BUDGET)
+    assert _prompt_tokens(packer, node) <= BUDGET
+
+
+def test_most_recent_labs_are_kept():
+    packer = NodeContextPacker(_emr(labs=500, encounters=0, allergies=0),
+                               ParsedTranscript.from_text(""), 400)
+    _, emr_json, _ = packer.pack(_node(records=0), "")
+    dates = [lab["date"] for lab in json.loads(emr_json)["labs"]]
+    assert dates and dates == sorted(dates, reverse=True)
+    assert dates[0] == max(lab["date"] for lab in packer.labs)
+
+
+def test_small_inputs_are_not_trimmed():
+    emr = _emr(labs=2, encounters=2, allergies=2)
+    packer = NodeContextPacker(emr, ParsedTranscript.from_text("Patient: headache"), BUDGET)
+    context_json, emr_json, transcript_text = packer.pack(_node(records=2), FIXED_TEXT)
+    assert emr_json.count('"test"') == 2 and emr_json.count('"reason"') == 2 and emr_json.count('"substance"') == 2
+    assert context_json.count("Migraine") == 2
+    assert transcript_text.count("\n") == 1
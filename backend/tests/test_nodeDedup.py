@@ -0,0 +1,51 @@
+"""Tests for nodeDedup: near-duplicate names merge, clinical opposites never do."""
+
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodeDedup import NameMatcher, dedupe_graph
+
+OPPOSITES = [
+    ("Hypertension", "Hypotension"),
+    ("Hyperglycemia", "Hypoglycemia"),
+    ("Hyperthyroidism", "Hypothyroidism"),
+    ("Hyperkalemia", "Hypokalemia"),
+    ("Tachycardia", "Bradycardia"),
+    ("Type 1 Diabetes", "Type 2 Diabetes"),
+]
+
+
+@pytest.mark.parametrize("first, second", OPPOSITES)
+def test_opposites_are_not_merged(first, second):
+    graph = {
+        "nodes": [{"name": first, "type": "Condition"}, {"name": second, "type": "Condition"}],
+        "edges": [{"from_node": first, "to_node": second, "type": "related_to"}],
+    }
+    assert dedupe_graph(graph) == {}
+    assert [node["name"] for node in graph["nodes"]] == [first, second]
+    assert graph["edges"] == [{"from_node": first, "to_node": second, "type": "related_to"}]
+
+
+@pytest.mark.parametrize("first, second", OPPOSITES)
+def test_matcher_does_not_find_opposite(first, second):
+    matcher = NameMatcher()
+    matcher.add(first, 0)
+    assert matcher.find(second) == []
+
+
+def test_near_duplicates_are_merged():
+    graph = {
+        "nodes": [{"name": "Hypertension", "type": "Condition"},
+                  {"name": "hypertensions", "type": "Condition"},
+                  {"name": "Headache", "type": "Symptom"}],
+        "edges": [{"from_node": "hypertensions", "to_node": "Headache", "type": "related_to"}],
+    }
+    assert dedupe_graph(graph) == {"hypertensions": "Hypertension"}
+    assert [node["name"] for node in graph["nodes"]] == ["Hypertension", "Headache"]
+    assert graph["nodes"][0]["aliases"] == ["hypertensions"]
+    assert graph["edges"] == [{"from_node": "Hypertension", "to_node": "Headache", "type": "related_to"}]
@@ -972,10 +972,14 @@ function DoctorDashboardContent() {
                             ))}
                           </div>
 
-                          <KnowledgeGraph
-                            nodes={openReport.annotated_graph.nodes || []}
-                            edges={openReport.annotated_graph.edges || []}
-                          />
+                          {openReport.annotated_graph.format === "compact-v1" ? (
+                            <KnowledgeGraph compact={openReport.annotated_graph} />
+                          ) : (
+                            <KnowledgeGraph
+                              nodes={openReport.annotated_graph.nodes || []}
+                              edges={openReport.annotated_graph.edges || []}
+                            />
+                          )}
                         </>
                       ) : (
                         <p className="text-sm text-gray-500">
@@ -49,16 +49,10 @@ function PatientIntakeContent() {
     }
   }, [messages]);
 
-  function buildTranscriptString(msgs: any[]) {
-    return msgs
-      .map((m) => {
-        const who = m.role === "assistant" ? "AI" : "Patient";
-        const text =
-          typeof m.content === "string" ? m.content : JSON.stringify(m.content);
-
-        return `${who}: ${text}`;
-      })
-      .join("\n");
+  // Same { role, content } shape as the generate-report route; the backend
+  // parses the turns directly, so no "AI: ... / Patient: ..." string is built.
+  function buildConversation(msgs: any[]) {
+    return msgs.map((m) => ({ role: m.role, content: m.content }));
   }
 
   const canComplete = messages.length > 0;
@@ -124,7 +118,9 @@ function PatientIntakeContent() {
     }
   };
 
-  async function sendTranscriptToFlask(transcript: string) {
+  async function sendTranscriptToFlask(
+    conversation: { role: string; content: unknown }[]
+  ) {
     const url =
       (process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:5000") +
       "/generate_report";
@@ -134,7 +130,7 @@ function PatientIntakeContent() {
       headers: {
         "Content-Type": "application/json",
       },
-      body: JSON.stringify({ transcript }),
+      body: JSON.stringify({ conversation, graph_format: "compact" }),
     });
 
     if (!res.ok) {
@@ -151,8 +147,8 @@ function PatientIntakeContent() {
     setIsSubmitting(true);
 
     try {
-      const transcript = buildTranscriptString(messages);
-      const data = await sendTranscriptToFlask(transcript);
+      const conversation = buildConversation(messages);
+      const data = await sendTranscriptToFlask(conversation);
 
       console.log("Report from Flask:", data);
       setIsCompleted(true);
@@ -13,25 +13,53 @@ interface Edge {
   to_node: string;
   type: string;
 }
+// Compact export from the backend ({"graph_format": "compact"}); see backend/graphExport.py
+export interface CompactGraph {
+  format: "compact-v1";
+  graph_id: string;
+  base_size: number;
+  records: Record<string, any[]>;
+  colors: Record<string, string>;
+  nodes: { id: string; type: string; x?: number; y?: number; mentions?: number }[];
+  edges: [number, number, string][];
+}
 interface KnowledgeGraphProps {
-  nodes: Node[];
-  edges: Edge[];
+  nodes?: Node[];
+  edges?: Edge[];
+  compact?: CompactGraph;
 }
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:5000";
 cytoscape.use(coseBilkent);
-const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({ nodes, edges }) => {
+const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({ nodes = [], edges = [], compact }) => {
   const cyRef = useRef<HTMLDivElement>(null);
   const [isClient, setIsClient] = useState(false);
   useEffect(() => setIsClient(true), []);
   useEffect(() => {
     if (!isClient || !cyRef.current) return;
-    const validNodeIds = new Set(nodes.map((n) => n.name));
-    const filteredEdges = edges.filter(
+    // Compact graphs: details (notes, summary) are fetched on hover and
+    // positions are precomputed server-side.
+    const graphNodes: Node[] = compact
+      ? compact.nodes.map((n) => ({ name: n.id, type: n.type }))
+      : nodes;
+    const graphEdges: Edge[] = compact
+      ? compact.edges.map(([a, b, type]) => ({
+          from_node: compact.nodes[a].id,
+          to_node: compact.nodes[b].id,
+          type,
+        }))
+      : edges;
+    const positions = compact?.nodes.every((n) => n.x !== undefined)
+      ? compact.nodes.map((n) => ({ x: n.x as number, y: n.y as number }))
+      : null;
+    const validNodeIds = new Set(graphNodes.map((n) => n.name));
+    const filteredEdges = graphEdges.filter(
       (e) => validNodeIds.has(e.from_node) && validNodeIds.has(e.to_node)
     );
     const cy = cytoscape({
       container: cyRef.current,
       elements: [
-        ...nodes.map((n) => ({
+        ...graphNodes.map((n, i) => ({
+          ...(positions ? { position: positions[i] } : {}),
           data: {
             id: n.name,
             label: n.name,
@@ -71,7 +99,7 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({ nodes, edges }) => {
           },
         },
       ],
-      layout: {
+      layout: positions ? ({ name: "preset", fit: true } as any) : {
         name: "cose-bilkent",
         animate: true,
         animationDuration: 500,
@@ -108,13 +136,28 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({ nodes, edges }) => {
       tooltipDiv.style.position = "absolute";
       tooltipDiv.style.pointerEvents = "none";
       tooltipDiv.style.display = "none";
-      tooltipDiv.innerHTML = `<strong>${node.data("label")}</strong><br/>
+      const renderTooltip = () => {
+        tooltipDiv.innerHTML = `<strong>${node.data("label")}</strong><br/>
                               Type: ${node.data("type") || "N/A"}<br/>
                               Notes: ${node.data("notes") || "N/A"}<br/>
                               Summary: ${node.data("summary") || "N/A"}`;
+      };
+      renderTooltip();
       document.body.appendChild(tooltipDiv);
+      let detailsRequested = false;
       node.on("mouseover", () => {
       tooltipDiv.style.display = "block";
+      if (compact && !detailsRequested) {
+        detailsRequested = true;
+        fetch(`${BACKEND_URL}/graph/${compact.graph_id}/node?name=${encodeURIComponent(node.id())}`)
+          .then((res) => (res.ok ? res.json() : null))
+          .then((details) => {
+            if (!details) return;
+            node.data({ notes: details.notes, summary: details.llm_summary });
+            renderTooltip();
+          })
+          .catch(() => {});
+      }
       });
       node.on("mouseout", () => {
       tooltipDiv.style.display = "none";
@@ -146,7 +189,7 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({ nodes, edges }) => {
     return () => {
       if (cyRef.current) cyRef.current.innerHTML = "";
     };
-  }, [nodes, edges, isClient]);
+  }, [nodes, edges, compact, isClient]);
   return <div ref={cyRef} className="w-full h-full border rounded-lg" />; //"w-full h-80 border rounded-lg" style={{ minHeight: "320px" }}
 };
 export default KnowledgeGraph;
\ No newline at end of file